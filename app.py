@@ -23,6 +23,7 @@ from src.repositories.expenses_repo import ExpensesRepository
 from src.ai.providers import get_available_providers
 from src.ui.main_page import main_page
 from src.ui.sidebar import sidebar
+from src.utils.logger import logger
 
 # Available providers
 AVAILABLE_PROVIDERS = get_available_providers()
@@ -129,6 +130,12 @@ st.components.v1.html(
     height=0,
 )
 
+# Ensure MongoDB indexes once per process; reruns and later calls are registry hits
+try:
+    ensure_indexes(get_database())
+except Exception as e:
+    logger.error("Failed to ensure MongoDB indexes", {"error": str(e)})
+
 # Initialize services and session state
 if 'categories' not in st.session_state:
     try:
@@ -142,7 +149,6 @@ if 'categories' not in st.session_state:
 if 'expenses' not in st.session_state:
     try:
         db = get_database()
-        ensure_indexes(db)
         repo = ExpensesRepository(db)
         st.session_state.expenses = repo.list_recent(limit=20)
     except Exception:
@@ -152,6 +158,7 @@ if 'settings' not in st.session_state:
     st.session_state.settings = {
         'provider': settings.default_ai_provider,
         'model': settings.default_ai_model,
+        'strategy': 'cascade' if settings.cascade_enabled else ('hedged' if settings.hedge_enabled else 'single'),
         'updated_at': datetime.now()
     }
 
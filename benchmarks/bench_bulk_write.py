@@ -0,0 +1,145 @@
+"""
+Per-row vs bulk expense writes against the in-memory Mongo.
+
+Inserts, updates and deletes --rows synthetic expenses (10k by default) once
+through the per-row repository calls (`insert_expense`, `update_expense`,
+`delete_expense`) and once through `insert_many_expenses`,
+`bulk_update_expenses` and `bulk_delete_expenses`, with a simulated round-trip
+time per call, and prints rows/s, round trips and speedup per operation.
+
+    python -m benchmarks.bench_bulk_write --rows 10000 --db-rtt-ms 1 --chunk-size 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+
+from benchmarks.fake_mongo import InMemoryMongoClient
+from benchmarks.harness import save_report
+from src.models.expense import ExpenseCreate, ExpenseUpdate
+from src.repositories.expenses_repo import ExpensesRepository
+
+OPERATIONS = ("insert", "update", "delete")
+
+_ITEMS = [
+    ("Food & Dining", "Snacks", "padika"),
+    ("Transportation", "Public Transport", "bus ticket"),
+    ("Food & Dining", "Restaurants", "lunch"),
+    ("Transportation", "Fuel", "petrol"),
+    ("Entertainment", "Movies", "movie ticket"),
+    ("Bills & Utilities", "Electricity", "light bill"),
+]
+
+
+def make_expenses(rows: int, seed: int) -> List[ExpenseCreate]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    expenses = []
+    for i in range(rows):
+        category, subcategory, words = _ITEMS[i % len(_ITEMS)]
+        amount = rng.randint(10, 2000)
+        expenses.append(ExpenseCreate(
+            amount=amount, category=category, subcategory=subcategory, description=f"{words} {amount}",
+            datetime=start + timedelta(minutes=37 * i), provider="bench", model="bench",
+            original_query=f"{words} {amount}",
+        ))
+    return expenses
+
+
+def _timed(fn: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run_path(bulk: bool, expenses: List[ExpenseCreate], args: argparse.Namespace) -> Dict[str, dict]:
+    """Insert, update and delete every row on a fresh database; per-operation seconds and round trips."""
+    db = InMemoryMongoClient(rtt_ms=args.db_rtt_ms)["expense_tracker"]
+    repo = ExpensesRepository(db)
+    collection = db["expenses"]
+    ids: List[str] = []
+    stats: Dict[str, dict] = {}
+    errors = 0
+
+    def measure(operation: str, fn: Callable[[], object]) -> None:
+        trips = collection.round_trips
+        elapsed = _timed(fn)
+        stats[operation] = {"seconds": round(elapsed, 3), "rows_per_s": round(len(expenses) / elapsed, 1) if elapsed else None,
+                            "round_trips": collection.round_trips - trips}
+
+    if bulk:
+        def insert() -> None:
+            nonlocal errors
+            result = repo.insert_many_expenses(expenses, chunk_size=args.chunk_size)
+            ids.extend(result.ids)
+            errors += len(result.errors)
+
+        def update() -> None:
+            nonlocal errors
+            result = repo.bulk_update_expenses([(_id, ExpenseUpdate(amount=1.0)) for _id in ids], chunk_size=args.chunk_size)
+            errors += len(result.errors)
+
+        def delete() -> None:
+            nonlocal errors
+            errors += len(repo.bulk_delete_expenses(ids, chunk_size=args.chunk_size).errors)
+    else:
+        def insert() -> None:
+            ids.extend(repo.insert_expense(expense) for expense in expenses)
+
+        def update() -> None:
+            for _id in ids:
+                repo.update_expense(ObjectId(_id), ExpenseUpdate(amount=1.0))
+
+        def delete() -> None:
+            for _id in ids:
+                repo.delete_expense(ObjectId(_id))
+
+    for operation, fn in (("insert", insert), ("update", update), ("delete", delete)):
+        if operation in args.operations:
+            measure(operation, fn)
+    stats["remaining_rows"] = {"count": collection.count_documents({}), "errors": errors}
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="operations per bulk_write call")
+    parser.add_argument("--db-rtt-ms", type=float, default=0.5, help="simulated Mongo round-trip time")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="comma-separated subset of insert,update,delete")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args(argv)
+    args.operations = [op for op in args.operations.split(",") if op in OPERATIONS]
+    # Deletes and updates need the inserted ids
+    if set(args.operations) - {"insert"} and "insert" not in args.operations:
+        args.operations.insert(0, "insert")
+
+    expenses = make_expenses(args.rows, args.seed)
+    table = {"per_row": run_path(False, expenses, args), "bulk": run_path(True, expenses, args)}
+
+    print(f"{'operation':<10}{'path':<10}{'seconds':>10}{'rows/s':>14}{'round trips':>14}")
+    for operation in args.operations:
+        for path, stats in table.items():
+            row = stats[operation]
+            print(f"{operation:<10}{path:<10}{row['seconds']:>10.3f}{str(row['rows_per_s']):>14}{row['round_trips']:>14}")
+        per_row, bulk = table["per_row"][operation]["seconds"], table["bulk"][operation]["seconds"]
+        if bulk:
+            print(f"{operation}: bulk is {per_row / bulk:.1f}x faster")
+    print(f"bulk write errors: {table['bulk']['remaining_rows']['errors']}")
+    if args.output:
+        save_report(args.output, {"config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+                                  "table": table})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+End-to-end extraction benchmark with a fake chat model and in-memory Mongo.
+
+Times each stage of the `extract_and_save` path separately (index ensure,
+chain build, categories block, prompt render, LLM, parse, log insert, expense
+insert) plus the full call, reports p50/p95/p99, throughput and create_index
+round trips per request, and fails when a stage regresses against the stored
+baseline. Garbage collection is paused while timing (as `timeit` does), so
+collector pauses don't land in the tail percentiles.
+
+    python -m benchmarks.bench_extraction --iterations 200 --llm-latency-ms 400 --llm-sigma 0.4
+    python -m benchmarks.bench_extraction --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Tuple
+
+from benchmarks.fake_mongo import InMemoryMongoClient
+from benchmarks.fakes import install_fake_llm, uninstall_fake_llm
+from benchmarks.harness import StageTimer, envelope, find_regressions, load_baseline, save_report
+from src.ai.chains import (
+    _chain_inputs, _loads_model_json, _result_from_raw, build_extraction_chain, clear_chain_cache,
+    clear_result_cache, expand_output, get_categories_snapshot, get_extraction_chain, prompt_variant,
+)
+from src.ai.fast_path import find_amounts
+from src.ai.prompts import EXTRACTION_PROMPTS
+from src.ai.providers import get_llm
+from src.config.settings import settings
+from src.db.indexes import ensure_indexes, get_index_stats
+from src.db.mongo import get_database, set_mongo_client
+from src.models.expense import ExpenseCreate, ExtractionLog
+from src.repositories.expenses_repo import ExpensesRepository
+from src.services.category_service import CategoryService, bump_category_generation
+from src.services.expense_service import extract_and_save
+from src.utils.datetime_utils import IST
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "extraction.json"
+# Where the report goes, not what was measured: kept out of the stored config
+_LOCAL_ARGS = ("baseline", "update_baseline", "baseline_runs", "output")
+# How strictly to compare, not what was measured
+_CHECK_ARGS = ("tolerance", "min_delta_ms")
+
+QUERIES = [
+    "20rs na padika",
+    "kaale bus ma 15 rupiya",
+    "aaje lunch 120",
+    "petrol 500 nu bharavyu",
+    "movie ticket 250 rs",
+    "doctor fees 400 aapya",
+    "uber ma 180",
+    "light bill 1450",
+]
+
+_INPUT_LINE = re.compile(r"Input: (.*)\Z", re.DOTALL)
+
+
+def _responder(prompt: str) -> str:
+    """Canned but input-dependent JSON, shaped like a real model answer."""
+    match = _INPUT_LINE.search(prompt)
+    text = match.group(1).strip() if match else ""
+    amounts, _ = find_amounts(text)
+    variant = prompt_variant()
+    if variant == "compact":
+        return json.dumps({"a": amounts[0] if amounts else None, "c": "Food & Dining", "s": "Snacks",
+                           "d": "kaale" if "kaale" in text else None, "m": [] if amounts else ["amount"]})
+    when = {"date": "kaale" if "kaale" in text else None} if variant == "local" else {"datetime": datetime.now(tz=IST).isoformat()}
+    return json.dumps({
+        "valid": bool(amounts),
+        "amount": amounts[0] if amounts else None,
+        "category": "Food & Dining",
+        "subcategory": "Snacks",
+        "description": text,
+        **when,
+        "missing_fields": [] if amounts else ["amount"],
+    })
+
+
+def _configure(args: argparse.Namespace) -> InMemoryMongoClient:
+    # Measure the LLM path itself: no local shortcuts, no hedging
+    settings.fast_path_enabled = False
+    settings.result_cache_enabled = False
+    settings.hedge_enabled = False
+    settings.cascade_enabled = False
+    settings.structured_output_enabled = False
+    settings.category_pruning_enabled = args.pruning
+    client = InMemoryMongoClient(rtt_ms=args.db_rtt_ms)
+    set_mongo_client(client)
+    # Startup: the only create_index traffic the app should issue
+    ensure_indexes(get_database())
+    CategoryService().seed_default_categories()
+    install_fake_llm(
+        args.provider,
+        responder=_responder,
+        latency_ms=args.llm_latency_ms,
+        latency_sigma=args.llm_sigma,
+        seed=args.seed,
+    )
+    clear_chain_cache()
+    clear_result_cache()
+    return client
+
+
+def run_stages(args: argparse.Namespace, timer: StageTimer) -> None:
+    """Time each stage of one extraction in isolation."""
+    db = get_database()
+    repo = ExpensesRepository(db)
+    for i in range(args.iterations):
+        query = QUERIES[i % len(QUERIES)]
+        with timer.stage("index_ensure"):
+            ensure_indexes(db)
+        with timer.stage("chain_build"):
+            build_extraction_chain(args.provider, args.model)
+        with timer.stage("chain_lookup"):
+            get_extraction_chain(args.provider, args.model)
+        if i % 5 == 0:
+            bump_category_generation()
+            with timer.stage("categories_block_cold"):
+                get_categories_snapshot()
+        with timer.stage("categories_block"):
+            _, _, block, _ = get_categories_snapshot()
+        now = datetime.now(tz=IST)
+        with timer.stage("prompt_render"):
+            prompt = EXTRACTION_PROMPTS[prompt_variant()].format(
+                **_chain_inputs(query, {"now": now, "categories_block": block})
+            )
+        llm = get_llm(args.provider, args.model)
+        with timer.stage("llm"):
+            raw_text = llm.invoke(prompt).content
+        with timer.stage("parse"):
+            result = _result_from_raw(expand_output(_loads_model_json(raw_text), query), args.provider, args.model, query, now)
+        log = ExtractionLog(original_query=query, provider=args.provider, model=args.model, extraction=result)
+        with timer.stage("log_insert"):
+            repo.insert_log(log)
+        if result.valid and result.amount is not None:
+            expense = ExpenseCreate(
+                amount=result.amount, category=result.category, subcategory=result.subcategory,
+                description=result.description or query, datetime=result.datetime,
+                provider=args.provider, model=args.model, original_query=query,
+            )
+            with timer.stage("expense_insert"):
+                repo.insert_expense(expense)
+
+
+def run_end_to_end(args: argparse.Namespace, timer: StageTimer) -> Tuple[float, float]:
+    """Run `extract_and_save` sequentially; returns (extractions/s, create_index round trips per request)."""
+    index_calls = get_index_stats()["create_index_calls"]
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        with timer.stage("end_to_end"):
+            extract_and_save(QUERIES[i % len(QUERIES)], args.provider, args.model, {"benchmark": True})
+    elapsed = time.perf_counter() - started
+    per_request = (get_index_stats()["create_index_calls"] - index_calls) / max(1, args.iterations)
+    return (args.iterations / elapsed if elapsed else 0.0), per_request
+
+
+def _run_once(args: argparse.Namespace) -> dict:
+    client = _configure(args)
+    timer = StageTimer()
+    gc.collect()
+    gc.disable()
+    try:
+        run_stages(args, timer)
+        throughput, index_round_trips = run_end_to_end(args, timer)
+    finally:
+        gc.enable()
+        uninstall_fake_llm(args.provider)
+        set_mongo_client(None)
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in _LOCAL_ARGS},
+        "stages": timer.summary(),
+        "throughput": {"end_to_end_per_s": round(throughput, 2)},
+        "round_trips": client["expense_tracker"].round_trips(),
+        "indexes": {**get_index_stats(), "create_index_per_request": index_round_trips},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    # Enough samples for every stage's p99 to be compared (the cold-block
+    # stage runs every 5th iteration), see harness._MIN_SAMPLES
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--provider", default="openai", choices=["openai", "gemini"])
+    parser.add_argument("--model", default=settings.default_ai_model)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="median fake LLM latency")
+    parser.add_argument("--llm-sigma", type=float, default=0.0, help="lognormal spread of fake LLM latency (0 = fixed)")
+    parser.add_argument("--db-rtt-ms", type=float, default=0.0, help="simulated Mongo round-trip time")
+    parser.add_argument("--pruning", action="store_true", help="enable categories block pruning")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--baseline-runs", type=int, default=5, help="runs merged into a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore regressions smaller than this")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    # A baseline is the envelope of several runs; a check is a single run
+    reports = [_run_once(args) for _ in range(args.baseline_runs if args.update_baseline else 1)]
+    report = reports[-1]
+    print(f"{'stage':<24}{'n':>6}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<24}{stats['count']:>6}{stats['p50_ms']:>12.3f}{stats['p95_ms']:>12.3f}{stats['p99_ms']:>12.3f}")
+    print(f"throughput: {report['throughput']['end_to_end_per_s']:.2f} extractions/s")
+    print(f"create_index round trips per request: {report['indexes']['create_index_per_request']:g}")
+    if args.output:
+        save_report(args.output, report)
+
+    if args.update_baseline:
+        save_report(args.baseline, envelope(reports))
+        print(f"baseline written to {args.baseline}")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        # A missing baseline must not read as "no regressions"
+        print(f"ERROR no baseline at {args.baseline}; run with --update-baseline to create one", file=sys.stderr)
+        return 2
+    mismatched = sorted(k for k, v in baseline.get("config", {}).items()
+                        if k not in _CHECK_ARGS and report["config"].get(k) != v)
+    if mismatched:
+        print(f"ERROR baseline at {args.baseline} was measured with different {', '.join(mismatched)}; "
+              "pass the same options or --baseline/--update-baseline", file=sys.stderr)
+        return 2
+    # Fake LLM latency is an input, not something the code under test controls
+    problems = find_regressions(report, baseline, args.tolerance, args.min_delta_ms, exclude=("llm",))
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
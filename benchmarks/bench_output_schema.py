@@ -0,0 +1,154 @@
+"""
+Before/after comparison of the extraction output schemas.
+
+Runs the labeled corpus through `run_extraction` once per prompt variant
+("llm": full JSON with ISO datetime, "local": full JSON with a date hint,
+"compact": one-letter keys without the echoed description) against a fake
+model that answers each item correctly in that variant's shape. Decode time
+is simulated per output token, so the table shows what the smaller answers
+save: input/output tokens, LLM p50/p95 and whether the expanded
+ExtractionResult still matches the labels.
+
+    python -m benchmarks.bench_output_schema --ms-per-output-token 20 --prefill-ms 150
+    python -m benchmarks.eval_matrix --variants llm,compact    # same comparison on real models
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.eval_matrix import CORPUS_PATH, load_corpus, score
+from benchmarks.fake_mongo import InMemoryMongoClient
+from benchmarks.fakes import install_fake_llm, uninstall_fake_llm
+from benchmarks.harness import save_report, summarize
+from src.ai.chains import clear_chain_cache, run_extraction
+from src.ai.prompts import PROMPT_VARIANTS
+from src.ai.tokens import estimate_tokens
+from src.config.settings import settings
+from src.db.mongo import set_mongo_client
+from src.services.category_service import CategoryService
+from src.utils.datetime_utils import IST, resolve_datetime
+
+_INPUT_LINE = re.compile(r"Input: (.*)\Z", re.DOTALL)
+
+
+def _answer(variant: str, text: str, label: dict) -> str:
+    """A correct model answer for `label` in the shape `variant` asks for."""
+    _, date_words = resolve_datetime(text)
+    hint = " ".join(date_words) or None
+    if variant == "compact":
+        return json.dumps({"a": label["amount"], "c": label["category"], "s": label["subcategory"], "d": hint, "m": []},
+                          ensure_ascii=False)
+    answer = {
+        "valid": True,
+        "amount": label["amount"],
+        "category": label["category"],
+        "subcategory": label["subcategory"],
+        "description": text,
+        "missing_fields": [],
+    }
+    if variant == "llm":
+        answer["datetime"] = (datetime.now(tz=IST) + timedelta(days=label.get("day_offset", 0))).isoformat()
+    else:
+        answer["date"] = hint
+    return json.dumps(answer, ensure_ascii=False)
+
+
+def _configure_variant(variant: str) -> None:
+    settings.date_resolution_mode = "llm" if variant == "llm" else "local"
+    settings.compact_output_enabled = variant == "compact"
+    clear_chain_cache()
+
+
+def run_variant(variant: str, corpus: List[dict], args: argparse.Namespace) -> dict:
+    labels: Dict[str, dict] = {item["text"]: item for item in corpus}
+
+    def responder(prompt: str) -> str:
+        match = _INPUT_LINE.search(prompt)
+        text = match.group(1).strip() if match else ""
+        return _answer(variant, text, labels.get(text, {"amount": None, "category": None, "subcategory": None}))
+
+    _configure_variant(variant)
+    install_fake_llm(args.provider, responder=responder, latency_ms=args.prefill_ms,
+                     ms_per_output_token=args.ms_per_output_token, seed=args.seed)
+    rows = []
+    try:
+        for item in corpus:
+            now = datetime.now(tz=IST)
+            result, debug = run_extraction(args.provider, args.model, item["text"], failover=False)
+            rows.append({
+                "scores": score(item, result, now),
+                "description_ok": result.description == item["text"],
+                "input_tokens": (debug.get("categories_pruning") or {}).get("prompt_tokens_sent") or 0,
+                "output_tokens": estimate_tokens(debug.get("prompt_output") or ""),
+                "llm_ms": debug.get("llm_ms") or 0.0,
+            })
+    finally:
+        uninstall_fake_llm(args.provider)
+
+    n = len(rows)
+    latency = summarize(r["llm_ms"] for r in rows)
+    return {
+        "n": n,
+        "input_tokens_mean": round(sum(r["input_tokens"] for r in rows) / n, 1),
+        "output_tokens_mean": round(sum(r["output_tokens"] for r in rows) / n, 1),
+        "llm_p50_ms": latency["p50_ms"],
+        "llm_p95_ms": latency["p95_ms"],
+        "all_fields_acc": round(sum(all(r["scores"].values()) for r in rows) / n, 3),
+        "description_ok": round(sum(r["description_ok"] for r in rows) / n, 3),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    parser.add_argument("--variants", default=",".join(PROMPT_VARIANTS))
+    parser.add_argument("--provider", default="openai", choices=["openai", "gemini"])
+    parser.add_argument("--model", default=settings.default_ai_model)
+    parser.add_argument("--prefill-ms", type=float, default=150.0, help="fixed fake LLM latency per call")
+    parser.add_argument("--ms-per-output-token", type=float, default=20.0, help="simulated decode time per output token")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    # Measure the schema itself: every item goes to the (fake) model as plain text
+    settings.fast_path_enabled = False
+    settings.result_cache_enabled = False
+    settings.hedge_enabled = False
+    settings.structured_output_enabled = False
+    set_mongo_client(InMemoryMongoClient())
+    CategoryService().seed_default_categories()
+
+    corpus = load_corpus(args.corpus)
+    table = {}
+    try:
+        for variant in [v for v in args.variants.split(",") if v in PROMPT_VARIANTS]:
+            table[variant] = run_variant(variant, corpus, args)
+    finally:
+        set_mongo_client(None)
+
+    columns = ["n", "input_tokens_mean", "output_tokens_mean", "llm_p50_ms", "llm_p95_ms", "all_fields_acc", "description_ok"]
+    print(f"{'variant':<10}" + "".join(f"{c:>20}" for c in columns))
+    for variant, stats in table.items():
+        print(f"{variant:<10}" + "".join(f"{str(stats[c]):>20}" for c in columns))
+    if "llm" in table and len(table) > 1:
+        base = table["llm"]
+        for variant, stats in table.items():
+            if variant != "llm":
+                saved = base["output_tokens_mean"] - stats["output_tokens_mean"]
+                print(f"{variant}: {saved:.1f} fewer output tokens/item "
+                      f"({saved / base['output_tokens_mean']:.0%}), p50 {base['llm_p50_ms'] - stats['llm_p50_ms']:+.1f} ms saved")
+    if args.output:
+        save_report(args.output, {"config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+                                  "table": table})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
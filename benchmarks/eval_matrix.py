@@ -0,0 +1,215 @@
+"""
+Accuracy-vs-latency evaluation matrix over a labeled Gujlish corpus.
+
+Runs every configured provider/model (and the local fast path) over
+`benchmarks/data/gujlish_corpus.jsonl` with bounded concurrency and prints,
+per model: field accuracy (amount, category, subcategory, date), parse-failure
+rate, mean input/output tokens and latency percentiles. The suggested default
+is the most accurate model, with ties (within --slack) broken by p95 latency.
+`--variants llm,local,compact` runs every model under each prompt variant
+(date resolution mode and output schema) so output tokens, latency and date
+accuracy can be compared side by side.
+
+    python -m benchmarks.eval_matrix --concurrency 4
+    python -m benchmarks.eval_matrix --models openai:gpt-4o-mini,gemini:gemini-1.5-flash --output eval.json
+    python -m benchmarks.eval_matrix --variants llm,local,compact
+
+Set `cassette_mode = "replay"` to evaluate against recorded responses offline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.fake_mongo import InMemoryMongoClient
+from benchmarks.harness import save_report
+from src.ai.chains import get_categories_snapshot, prompt_variant, run_extraction_async
+from src.ai.fast_path import FAST_PATH_MODEL, FAST_PATH_PROVIDER, extract_fast
+from src.ai.prompts import PROMPT_VARIANTS
+from src.ai.providers import get_available_providers
+from src.ai.tokens import estimate_tokens
+from src.config.settings import settings
+from src.db.mongo import set_mongo_client
+from src.models.expense import ExtractionResult
+from src.services.category_service import CategoryService
+from src.utils.datetime_utils import IST, to_ist
+from src.utils.metrics import percentile
+
+CORPUS_PATH = Path(__file__).parent / "data" / "gujlish_corpus.jsonl"
+FIELDS = ("amount", "category", "subcategory", "date")
+
+
+def load_corpus(path: Path) -> List[dict]:
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def score(item: dict, result: Optional[ExtractionResult], now: datetime) -> Dict[str, bool]:
+    """Field-level correctness of one result against its label."""
+    if result is None:
+        return {field: False for field in FIELDS}
+    expected_date = (now + timedelta(days=item.get("day_offset", 0))).date()
+    return {
+        "amount": result.amount is not None and abs(float(result.amount) - float(item["amount"])) < 0.01,
+        "category": (result.category or "").lower() == item["category"].lower(),
+        "subcategory": (result.subcategory or "").lower() == item["subcategory"].lower(),
+        "date": result.datetime is not None and to_ist(result.datetime).date() == expected_date,
+    }
+
+
+async def eval_llm_target(provider: str, model: str, corpus: List[dict], concurrency: int, now: datetime) -> List[dict]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(item: dict) -> dict:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result, debug = await run_extraction_async(provider, model, item["text"], failover=False)
+                error = None
+            except Exception as e:
+                result, debug, error = None, {}, str(e)
+            wall_ms = (time.perf_counter() - started) * 1000
+        pruning = debug.get("categories_pruning") or {}
+        return {
+            "scores": score(item, result, now),
+            "parse_failure": bool(result is not None and result.error == "Invalid JSON from model"),
+            "retried": bool((debug.get("output_mode") or {}).get("retried")),
+            "error": error,
+            "input_tokens": pruning.get("prompt_tokens_sent"),
+            "output_tokens": estimate_tokens(debug.get("prompt_output") or ""),
+            "latency_ms": debug.get("llm_ms", wall_ms),
+        }
+
+    return list(await asyncio.gather(*(one(item) for item in corpus)))
+
+
+def eval_fast_path(corpus: List[dict], now: datetime) -> List[dict]:
+    generation, categories, _, _ = get_categories_snapshot()
+    rows = []
+    for item in corpus:
+        started = time.perf_counter()
+        result, confidence = extract_fast(item["text"], categories, generation, now=now)
+        hit = result.valid and confidence >= settings.fast_path_min_confidence
+        rows.append({
+            # Below-threshold answers would go to the LLM, so they count as misses
+            "scores": score(item, result if hit else None, now),
+            "parse_failure": False,
+            "retried": False,
+            "error": None,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "coverage": hit,
+        })
+    return rows
+
+
+def aggregate(rows: List[dict]) -> dict:
+    n = len(rows)
+    latencies = [r["latency_ms"] for r in rows if r["error"] is None]
+    input_tokens = [r["input_tokens"] for r in rows if r["input_tokens"] is not None]
+    stats = {
+        "n": n,
+        **{f"{field}_acc": round(sum(r["scores"][field] for r in rows) / n, 3) for field in FIELDS},
+        "all_fields_acc": round(sum(all(r["scores"].values()) for r in rows) / n, 3),
+        "parse_failure_rate": round(sum(r["parse_failure"] for r in rows) / n, 3),
+        "retry_rate": round(sum(r["retried"] for r in rows) / n, 3),
+        "error_rate": round(sum(r["error"] is not None for r in rows) / n, 3),
+        "input_tokens_mean": round(sum(input_tokens) / len(input_tokens), 1) if input_tokens else None,
+        "output_tokens_mean": round(sum(r["output_tokens"] for r in rows) / n, 1),
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 1) if latencies else None,
+    }
+    if rows and "coverage" in rows[0]:
+        stats["coverage"] = round(sum(r["coverage"] for r in rows) / n, 3)
+    return stats
+
+
+def recommend(table: Dict[str, dict], slack: float) -> Optional[str]:
+    """Most accurate LLM target; within `slack` of the best, the lowest p95 wins."""
+    candidates = {k: v for k, v in table.items() if not k.startswith(f"{FAST_PATH_PROVIDER}:") and v["error_rate"] < 1.0}
+    if not candidates:
+        return None
+    best = max(v["all_fields_acc"] for v in candidates.values())
+    close = [k for k, v in candidates.items() if v["all_fields_acc"] >= best - slack]
+    return min(close, key=lambda k: candidates[k]["p95_ms"] if candidates[k]["p95_ms"] is not None else float("inf"))
+
+
+def _targets(spec: Optional[str]) -> List[Tuple[str, str]]:
+    if spec:
+        return [tuple(part.split(":", 1)) for part in spec.split(",") if ":" in part]  # type: ignore[misc]
+    keys = {"openai": settings.openai_api_key, "gemini": settings.google_api_key}
+    replaying = settings.cassette_mode == "replay"
+    return [
+        (provider, model)
+        for provider, models in get_available_providers().items()
+        if keys.get(provider) or replaying
+        for model in models
+    ]
+
+
+def print_table(table: Dict[str, dict]) -> None:
+    columns = ["n", "amount_acc", "category_acc", "subcategory_acc", "date_acc", "all_fields_acc",
+               "parse_failure_rate", "input_tokens_mean", "output_tokens_mean", "p50_ms", "p95_ms", "p99_ms"]
+    print(f"{'target':<32}" + "".join(f"{c:>20}" for c in columns))
+    for target, stats in table.items():
+        print(f"{target:<32}" + "".join(f"{str(stats.get(c)):>20}" for c in columns))
+
+
+async def run(args: argparse.Namespace) -> dict:
+    corpus = load_corpus(args.corpus)
+    now = datetime.now(tz=IST)
+    table: Dict[str, dict] = {}
+    if not args.no_fast_path:
+        table[f"{FAST_PATH_PROVIDER}:{FAST_PATH_MODEL}"] = aggregate(eval_fast_path(corpus, now))
+    variants = [v for v in (args.variants or prompt_variant()).split(",") if v in PROMPT_VARIANTS]
+    for variant in variants:
+        settings.date_resolution_mode = "llm" if variant == "llm" else "local"
+        settings.compact_output_enabled = variant == "compact"
+        for provider, model in _targets(args.models):
+            rows = await eval_llm_target(provider, model, corpus, args.concurrency, now)
+            table[f"{provider}:{model}" + (f"@{variant}" if len(variants) > 1 else "")] = aggregate(rows)
+    return {"corpus": str(args.corpus), "items": len(corpus), "table": table,
+            "recommended": recommend(table, args.slack)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    parser.add_argument("--models", help="comma-separated provider:model list (default: all configured)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-fast-path", action="store_true")
+    parser.add_argument("--variants", help="comma-separated prompt variants to compare (llm,local,compact)")
+    parser.add_argument("--slack", type=float, default=0.02, help="accuracy tie margin for the recommendation")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    # Measure the models, not the cache
+    settings.result_cache_enabled = False
+    if not settings.mongodb_uri:
+        # Evaluate against the default taxonomy without a live cluster
+        set_mongo_client(InMemoryMongoClient())
+        CategoryService().seed_default_categories()
+
+    report = asyncio.run(run(args))
+    print_table(report["table"])
+    if report["recommended"]:
+        target, _, variant = report["recommended"].partition("@")
+        provider, model = target.split(":", 1)
+        print(f"\nSuggested default: default_ai_provider = \"{provider}\", default_ai_model = \"{model}\""
+              + (f" (prompt variant \"{variant}\")" if variant else ""))
+    if args.output:
+        save_report(args.output, report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+In-memory stand-in for the subset of PyMongo the repositories use.
+
+Supports insert/find/update/delete/count, `bulk_write` (InsertOne, UpdateOne,
+DeleteOne), `create_index` and the simple aggregation pipeline used for
+category history. Every call counts as one
+round trip and can sleep `rtt_ms` to emulate network latency to a cluster.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+
+def _get(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if isinstance(value, list):
+            value = [item.get(part) for item in value if isinstance(item, dict)]
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+def _eq(actual: Any, expected: Any, case_insensitive: bool) -> bool:
+    if isinstance(actual, list) and not isinstance(expected, list):
+        return any(_eq(item, expected, case_insensitive) for item in actual)
+    if case_insensitive and isinstance(actual, str) and isinstance(expected, str):
+        return actual.lower() == expected.lower()
+    return actual == expected
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any], case_insensitive: bool = False) -> bool:
+    for field, condition in (query or {}).items():
+        actual = _get(doc, field)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            for op, expected in condition.items():
+                if op == "$in" and not any(_eq(actual, e, case_insensitive) for e in expected):
+                    return False
+                if op == "$ne" and _eq(actual, expected, case_insensitive):
+                    return False
+                if op in ("$gte", "$gt", "$lte", "$lt"):
+                    if actual is None:
+                        return False
+                    if op == "$gte" and not actual >= expected:
+                        return False
+                    if op == "$gt" and not actual > expected:
+                        return False
+                    if op == "$lte" and not actual <= expected:
+                        return False
+                    if op == "$lt" and not actual < expected:
+                        return False
+        elif not _eq(actual, condition, case_insensitive):
+            return False
+    return True
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = [k for k, v in projection.items() if v and k != "_id"]
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+class InMemoryCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self._docs = docs
+
+    def sort(self, key: Any, direction: int = 1) -> "InMemoryCursor":
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: (_get(d, field) is None, _get(d, field)), reverse=order == -1)
+        return self
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        if count:
+            self._docs = self._docs[:count]
+        return self
+
+    def batch_size(self, size: int) -> "InMemoryCursor":
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+
+class InMemoryCollection:
+    def __init__(self, name: str, rtt_ms: float = 0.0):
+        self.name = name
+        self.rtt_ms = rtt_ms
+        self.round_trips = 0
+        self.indexes: List[Any] = []
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        # Re-entrant: bulk_write holds it across the per-operation helpers
+        self._lock = threading.RLock()
+
+    def _trip(self) -> None:
+        self.round_trips += 1
+        if self.rtt_ms:
+            time.sleep(self.rtt_ms / 1000.0)
+
+    def create_index(self, keys: Any, **kwargs: Any) -> str:
+        self._trip()
+        self.indexes.append(keys)
+        return kwargs.get("name") or str(keys)
+
+    def insert_one(self, doc: Dict[str, Any]) -> SimpleNamespace:
+        self._trip()
+        with self._lock:
+            doc = copy.deepcopy(doc)
+            doc.setdefault("_id", ObjectId())
+            self._docs[doc["_id"]] = doc
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    def insert_many(self, docs: Iterable[Dict[str, Any]], ordered: bool = True) -> SimpleNamespace:
+        self._trip()
+        ids = []
+        with self._lock:
+            for doc in docs:
+                doc = copy.deepcopy(doc)
+                doc.setdefault("_id", ObjectId())
+                self._docs[doc["_id"]] = doc
+                ids.append(doc["_id"])
+        return SimpleNamespace(inserted_ids=ids, acknowledged=True)
+
+    def _select(self, query: Optional[Dict[str, Any]], collation: Optional[dict]) -> List[Dict[str, Any]]:
+        case_insensitive = bool(collation and collation.get("strength", 3) <= 2)
+        with self._lock:
+            if query and set(query) == {"_id"} and not isinstance(query["_id"], dict):
+                # Primary-key lookup, like the real _id index
+                doc = self._docs.get(query["_id"])
+                return [doc] if doc is not None else []
+            return [d for d in self._docs.values() if _matches(d, query or {}, case_insensitive)]
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None,
+             collation: Optional[dict] = None, **kwargs: Any) -> InMemoryCursor:
+        self._trip()
+        return InMemoryCursor([_project(d, projection) for d in self._select(query, collation)])
+
+    def find_one(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None,
+                 collation: Optional[dict] = None, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        self._trip()
+        found = self._select(query, collation)
+        return _project(found[0], projection) if found else None
+
+    def count_documents(self, query: Dict[str, Any], **kwargs: Any) -> int:
+        self._trip()
+        return len(self._select(query, None))
+
+    def _apply(self, doc: Dict[str, Any], update: Dict[str, Any]) -> None:
+        for field, value in update.get("$set", {}).items():
+            doc[field] = copy.deepcopy(value)
+        for field, value in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + value
+        for field, value in update.get("$push", {}).items():
+            doc.setdefault(field, []).append(copy.deepcopy(value))
+        for field, condition in update.get("$pull", {}).items():
+            doc[field] = [
+                item for item in doc.get(field, [])
+                if not (_matches(item, condition) if isinstance(condition, dict) else item == condition)
+            ]
+
+    def update_one(self, query: Dict[str, Any], update: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        self._trip()
+        found = self._select(query, kwargs.get("collation"))
+        if not found:
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        with self._lock:
+            self._apply(found[0], update)
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+    def update_many(self, query: Dict[str, Any], update: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        self._trip()
+        found = self._select(query, None)
+        with self._lock:
+            for doc in found:
+                self._apply(doc, update)
+        return SimpleNamespace(matched_count=len(found), modified_count=len(found))
+
+    def delete_one(self, query: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        self._trip()
+        found = self._select(query, None)
+        with self._lock:
+            if found:
+                self._docs.pop(found[0]["_id"], None)
+        return SimpleNamespace(deleted_count=1 if found else 0)
+
+    def delete_many(self, query: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        self._trip()
+        found = self._select(query, None)
+        with self._lock:
+            for doc in found:
+                self._docs.pop(doc["_id"], None)
+        return SimpleNamespace(deleted_count=len(found))
+
+    def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs: Any) -> SimpleNamespace:
+        """Apply PyMongo InsertOne/UpdateOne/DeleteOne requests in one round trip.
+
+        Duplicate `_id` inserts and unsupported operations become write errors;
+        an ordered write stops at the first one, an unordered write continues.
+        """
+        self._trip()
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0}
+        write_errors: List[Dict[str, Any]] = []
+        with self._lock:
+            for index, request in enumerate(requests):
+                kind = type(request).__name__
+                if kind == "InsertOne":
+                    doc = copy.deepcopy(request._doc)
+                    doc.setdefault("_id", ObjectId())
+                    if doc["_id"] in self._docs:
+                        write_errors.append({"index": index, "code": 11000,
+                                             "errmsg": f"E11000 duplicate key error: _id {doc['_id']}"})
+                    else:
+                        self._docs[doc["_id"]] = doc
+                        counts["nInserted"] += 1
+                elif kind == "UpdateOne":
+                    found = self._select(request._filter, None)
+                    if found:
+                        self._apply(found[0], request._doc)
+                        counts["nMatched"] += 1
+                        counts["nModified"] += 1
+                elif kind == "DeleteOne":
+                    found = self._select(request._filter, None)
+                    if found:
+                        self._docs.pop(found[0]["_id"], None)
+                        counts["nRemoved"] += 1
+                else:
+                    write_errors.append({"index": index, "code": 2, "errmsg": f"unsupported operation {kind}"})
+                if write_errors and ordered:
+                    break
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors, "writeConcernErrors": [], "upserted": [],
+                                  "nUpserted": 0, **counts})
+        return SimpleNamespace(inserted_count=counts["nInserted"], matched_count=counts["nMatched"],
+                               modified_count=counts["nModified"], deleted_count=counts["nRemoved"],
+                               upserted_count=0, acknowledged=True)
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs: Any) -> List[Dict[str, Any]]:
+        """Supports $match, $sort, $limit, $project and $group with $push/$sum."""
+        self._trip()
+        docs = self._select({}, None)
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                docs = [d for d in docs if _matches(d, spec)]
+            elif op == "$sort":
+                docs = list(InMemoryCursor(docs).sort(list(spec.items())))
+            elif op == "$limit":
+                docs = docs[:spec]
+            elif op == "$project":
+                docs = [_project(d, spec) for d in docs]
+            elif op == "$group":
+                groups: Dict[Any, Dict[str, Any]] = {}
+                for d in docs:
+                    key = _get(d, spec["_id"][1:]) if isinstance(spec["_id"], str) else spec["_id"]
+                    row = groups.setdefault(key, {"_id": key})
+                    for field, acc in spec.items():
+                        if field == "_id":
+                            continue
+                        (acc_op, expr), = acc.items()
+                        value = _get(d, expr[1:]) if isinstance(expr, str) and expr.startswith("$") else expr
+                        if acc_op == "$push":
+                            row.setdefault(field, []).append(value)
+                        elif acc_op == "$sum":
+                            row[field] = row.get(field, 0) + (value or 0)
+                docs = list(groups.values())
+        return docs
+
+
+class InMemoryDatabase:
+    def __init__(self, name: str, rtt_ms: float = 0.0):
+        self.name = name
+        self.rtt_ms = rtt_ms
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name, self.rtt_ms)
+        return self._collections[name]
+
+    def round_trips(self) -> Dict[str, int]:
+        return {name: coll.round_trips for name, coll in self._collections.items()}
+
+
+class InMemoryMongoClient:
+    """Drop-in for `MongoClient` in benchmarks (`src.db.mongo.set_mongo_client`)."""
+
+    def __init__(self, rtt_ms: float = 0.0):
+        self.rtt_ms = rtt_ms
+        self._databases: Dict[str, InMemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase(name, self.rtt_ms)
+        return self._databases[name]
+
+    def close(self) -> None:
+        self._databases.clear()
@@ -0,0 +1,139 @@
+"""
+Fake chat model for exercising extraction offline (benchmarks and tests).
+
+`FakeChatModel` returns canned responses with configurable latency and injected
+errors (status codes, Retry-After, timeouts) so retries, the circuit breaker,
+failover and hedging can be tested without paid APIs. `install_fake_llm` makes
+`get_llm` return it for a provider.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field, PrivateAttr
+
+from src.ai.providers import ProviderName, set_llm_override
+from src.ai.tokens import estimate_tokens
+
+DEFAULT_RESPONSE = json.dumps({
+    "valid": True,
+    "amount": 20,
+    "category": "Food",
+    "subcategory": "Snacks",
+    "description": "20rs na padika",
+    "datetime": None,
+    "missing_fields": [],
+})
+
+
+class FakeProviderError(Exception):
+    """Provider-style error carrying an HTTP status and optional Retry-After header."""
+
+    def __init__(self, status_code: int, message: str = "", retry_after: Optional[float] = None):
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+        super().__init__(message or f"Fake provider error {status_code}")
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic (seeded) fake chat model with latency and error injection.
+
+    Latency is lognormal around `latency_ms` with spread `latency_sigma` (0 = fixed),
+    plus `ms_per_output_token` for each (estimated) token of the response.
+    The first `fail_first` calls fail, then each call fails with `error_rate`
+    probability. `error_status=0` injects a TimeoutError instead of an HTTP error.
+    """
+
+    responses: List[str] = Field(default_factory=lambda: [DEFAULT_RESPONSE])
+    # Optional prompt -> response function; takes precedence over `responses`
+    responder: Optional[Callable[[str], str]] = None
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.0
+    ms_per_output_token: float = 0.0
+    error_rate: float = 0.0
+    fail_first: int = 0
+    error_status: int = 503
+    retry_after: Optional[float] = None
+    seed: Optional[int] = None
+    model_name: str = "fake"
+
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+    _calls: int = PrivateAttr(default=0)
+    _errors: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def errors(self) -> int:
+        return self._errors
+
+    def _plan(self, messages: List[BaseMessage]) -> tuple:
+        """Pick (delay seconds, error or None, response text) for the next call."""
+        with self._lock:
+            call = self._calls
+            self._calls += 1
+            delay = self.latency_ms / 1000.0
+            if self.latency_sigma > 0 and delay > 0:
+                delay *= self._rng.lognormvariate(0.0, self.latency_sigma)
+            fail = call < self.fail_first or self._rng.random() < self.error_rate
+            if fail:
+                self._errors += 1
+        error: Optional[Exception] = None
+        if fail:
+            error = TimeoutError("Fake provider timeout") if self.error_status == 0 else FakeProviderError(self.error_status, retry_after=self.retry_after)
+        prompt = "\n".join(str(m.content) for m in messages)
+        text = self.responder(prompt) if self.responder else self.responses[call % len(self.responses)]
+        # Output tokens are decoded one by one, so longer answers take longer
+        delay += estimate_tokens(text) * self.ms_per_output_token / 1000.0
+        return delay, error, text
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, error, text = self._plan(messages)
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, error, text = self._plan(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+def install_fake_llm(provider: ProviderName, **kwargs: Any) -> FakeChatModel:
+    """Route `get_llm(provider, ...)` to one shared FakeChatModel and return it."""
+    fake = FakeChatModel(**kwargs)
+    set_llm_override(provider, lambda model: fake)
+    return fake
+
+
+def uninstall_fake_llm(provider: ProviderName) -> None:
+    set_llm_override(provider, None)
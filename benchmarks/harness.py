@@ -0,0 +1,114 @@
+"""
+Shared benchmark helpers: per-stage timers, percentile summaries and baseline checks.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.utils.metrics import percentile
+
+
+class StageTimer:
+    """Collects wall-clock samples (ms) per named stage."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append((time.perf_counter() - started) * 1000)
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self.samples[name].append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: summarize(values) for name, values in self.samples.items()}
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    values = list(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 4),
+        "p50_ms": round(percentile(values, 50), 4),
+        "p95_ms": round(percentile(values, 95), 4),
+        "p99_ms": round(percentile(values, 99), 4),
+    }
+
+
+def load_baseline(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_report(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+# Samples needed before a percentile is worth comparing (below that p95/p99 is
+# just the max). bench_extraction's default iterations clear these thresholds.
+_MIN_SAMPLES = {"p50_ms": 1, "p95_ms": 40, "p99_ms": 200}
+
+
+def envelope(reports: List[dict]) -> dict:
+    """Worst case of several runs: slowest percentile per stage, lowest throughput.
+
+    Stored as the baseline so one quiet run doesn't make normal scheduler noise
+    look like a regression.
+    """
+    merged = json.loads(json.dumps(reports[-1]))
+    for report in reports[:-1]:
+        for stage, stats in report.get("stages", {}).items():
+            target = merged["stages"].setdefault(stage, stats)
+            for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms"):
+                if key in stats:
+                    target[key] = max(target.get(key, 0.0), stats[key])
+        for key, value in report.get("throughput", {}).items():
+            merged["throughput"][key] = min(merged["throughput"].get(key, value), value)
+    return merged
+
+
+def find_regressions(
+    report: dict,
+    baseline: dict,
+    tolerance: float,
+    min_delta_ms: float,
+    exclude: Iterable[str] = (),
+) -> List[str]:
+    """Stage percentiles slower (or throughput lower) than baseline beyond the tolerance.
+
+    Latency regressions must also exceed `min_delta_ms` in absolute terms so
+    sub-millisecond stages don't fail on scheduler noise. Tail percentiles are
+    only compared with enough samples to be more than the single slowest one.
+    """
+    problems: List[str] = []
+    excluded = set(exclude)
+    for stage, base in baseline.get("stages", {}).items():
+        current = report.get("stages", {}).get(stage)
+        if stage in excluded or not current or not current.get("count"):
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if key not in base or min(current["count"], base.get("count", 0)) < _MIN_SAMPLES[key]:
+                continue
+            limit = base[key] * (1 + tolerance)
+            if current[key] > limit and current[key] - base[key] > min_delta_ms:
+                problems.append(f"{stage} {key}: {current[key]:.3f} > {base[key]:.3f} (+{tolerance:.0%})")
+    for key, base_value in baseline.get("throughput", {}).items():
+        current_value = report.get("throughput", {}).get(key)
+        if current_value is not None and current_value < base_value * (1 - tolerance):
+            problems.append(f"throughput {key}: {current_value:.2f}/s < {base_value:.2f}/s (-{tolerance:.0%})")
+    return problems
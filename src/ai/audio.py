@@ -0,0 +1,168 @@
+"""
+Audio preprocessing before speech-to-text.
+
+Decodes PCM WAV, downmixes to mono, resamples to 16 kHz, trims leading and
+trailing silence with a frame-energy VAD and re-encodes as 16-bit mono WAV,
+so Gemini receives (and bills for) a fraction of the raw recording. Formats
+other than PCM WAV, or environments without NumPy, pass through unchanged.
+"""
+
+from __future__ import annotations
+
+import io
+import time
+import wave
+from typing import Optional, Tuple
+
+from pydantic import BaseModel
+
+from src.config.settings import settings
+from src.utils.logger import logger
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+# VAD frame length and the margin above the estimated noise floor that counts as speech
+_FRAME_MS = 30
+_NOISE_MARGIN_DB = 12.0
+
+
+class PreparedAudio(BaseModel):
+    data: bytes
+    mime_type: str
+    applied: bool = False
+    reason: Optional[str] = None
+    original_bytes: int = 0
+    processed_bytes: int = 0
+    original_duration_s: Optional[float] = None
+    processed_duration_s: Optional[float] = None
+    original_format: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    def summary(self) -> dict:
+        return self.model_dump(exclude={"data"})
+
+
+def _is_wav(audio_bytes: bytes, mime_type: str) -> bool:
+    if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
+        return True
+    return mime_type.split(";")[0] in ("audio/wav", "audio/x-wav", "audio/wave")
+
+
+def decode_wav(audio_bytes: bytes) -> Tuple["np.ndarray", int, int]:
+    """Return (float32 samples shaped [frames, channels] in [-1, 1], sample rate, sample width)."""
+    with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        # 24-bit little endian: widen to int32 with sign extension
+        triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+    return samples.reshape(-1, channels), rate, width
+
+
+def to_mono(samples: "np.ndarray") -> "np.ndarray":
+    return samples.mean(axis=1) if samples.ndim == 2 and samples.shape[1] > 1 else samples.reshape(-1)
+
+
+def resample(samples: "np.ndarray", rate: int, target_rate: int) -> "np.ndarray":
+    """Linear-interpolation resampler with a box low-pass when downsampling."""
+    if rate == target_rate or samples.size == 0:
+        return samples
+    if rate > target_rate:
+        width = int(round(rate / target_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode="same")
+    duration = samples.size / rate
+    target_len = max(1, int(round(duration * target_rate)))
+    source_t = np.arange(samples.size, dtype=np.float64) / rate
+    target_t = np.arange(target_len, dtype=np.float64) / target_rate
+    return np.interp(target_t, source_t, samples).astype(np.float32)
+
+
+def trim_silence(samples: "np.ndarray", rate: int, threshold_db: float, padding_ms: float) -> "np.ndarray":
+    """Drop leading/trailing frames whose RMS energy stays below the speech threshold.
+
+    The threshold is the higher of `threshold_db` (dBFS) and the estimated noise
+    floor plus a margin (capped at 30 dB below the loudest frame). Returns the input unchanged when no frame is voiced.
+    """
+    frame = max(1, int(rate * _FRAME_MS / 1000))
+    n_frames = samples.size // frame
+    if n_frames < 2:
+        return samples
+    frames = samples[: n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    energy_db = 20.0 * np.log10(rms + 1e-10)
+    noise_floor = float(np.percentile(energy_db, 10))
+    # Recordings without real silence: never demand more than 30 dB below the peak
+    adaptive = min(noise_floor + _NOISE_MARGIN_DB, float(energy_db.max()) - 30.0)
+    voiced = np.flatnonzero(energy_db > max(threshold_db, adaptive))
+    if voiced.size == 0:
+        return samples
+    pad = int(rate * padding_ms / 1000)
+    start = max(0, int(voiced[0]) * frame - pad)
+    end = min(samples.size, (int(voiced[-1]) + 1) * frame + pad)
+    return samples[start:end]
+
+
+def encode_wav(samples: "np.ndarray", rate: int) -> bytes:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def preprocess_audio(audio_bytes: bytes, mime_type: str) -> PreparedAudio:
+    """Shrink a recording for transcription; falls back to the original bytes on any problem."""
+    started = time.perf_counter()
+    prepared = PreparedAudio(data=audio_bytes, mime_type=mime_type, original_bytes=len(audio_bytes),
+                             processed_bytes=len(audio_bytes))
+    if not settings.audio_preprocess_enabled:
+        prepared.reason = "disabled"
+    elif np is None:
+        prepared.reason = "numpy not installed"
+    elif not _is_wav(audio_bytes, mime_type):
+        prepared.reason = f"unsupported format {mime_type or 'unknown'}"
+    else:
+        try:
+            samples, rate, width = decode_wav(audio_bytes)
+            channels = samples.shape[1]
+            prepared.original_format = f"{rate}Hz/{channels}ch/{width * 8}bit"
+            prepared.original_duration_s = round(samples.shape[0] / rate, 3) if rate else None
+            # Never upsample: it only adds bytes
+            target_rate = min(settings.audio_target_sample_rate, rate)
+            mono = resample(to_mono(samples), rate, target_rate)
+            trimmed = trim_silence(mono, target_rate, settings.audio_silence_threshold_db,
+                                   settings.audio_silence_padding_ms)
+            encoded = encode_wav(trimmed, target_rate)
+            if len(encoded) < len(audio_bytes):
+                prepared.data = encoded
+                prepared.mime_type = "audio/wav"
+                prepared.applied = True
+                prepared.processed_bytes = len(encoded)
+                prepared.processed_duration_s = round(trimmed.size / target_rate, 3)
+            else:
+                prepared.reason = "already compact"
+        except Exception as e:
+            prepared.reason = f"decode failed: {e}"
+    prepared.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    logger.info("Audio preprocessed", prepared.summary())
+    return prepared
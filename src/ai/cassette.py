@@ -0,0 +1,254 @@
+"""
+Record/replay cassettes for LLM and transcription calls.
+
+In "record" mode real provider responses are appended to a gzip'd JSONL store
+keyed by a hash of (kind, provider, model, prompt or audio), with timestamps in
+the prompt masked. In "replay" mode they are served from the store without
+network access, optionally sleeping for the recorded latency so timings stay
+realistic. With `cassette_match = "input"`, replay falls back to matching on
+the user input alone, so a recorded corpus can be replayed through new prompt
+code. Enabled via `settings.cassette_mode` and wired into `get_llm` /
+`transcribe_with_gemini`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.config.settings import settings
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+# Prompts embed "now"; mask timestamps so recordings replay on later days
+_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?")
+# The user-supplied part of extraction prompts follows the last of these markers
+_INPUT_MARKERS = ("Input:", "Lines:")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recording matches the request."""
+
+
+def cassette_mode() -> str:
+    mode = (settings.cassette_mode or "off").lower()
+    return mode if mode in CASSETTE_MODES else "off"
+
+
+def request_key(kind: str, provider: str, model: str, payload: str) -> str:
+    material = "\x1f".join((kind, provider, model, _TIMESTAMP.sub("<ts>", payload)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def input_key(kind: str, provider: str, model: str, payload: str) -> str:
+    """Key on just the user input so recordings survive prompt/template changes."""
+    cut = max(payload.rfind(marker) for marker in _INPUT_MARKERS)
+    return request_key(kind + ":input", provider, model, payload[cut:] if cut >= 0 else payload)
+
+
+def audio_payload(audio_bytes: bytes, mime_type: str, prompt: str) -> str:
+    return f"{mime_type}\x1f{hashlib.sha256(audio_bytes).hexdigest()}\x1f{prompt}"
+
+
+class Cassette:
+    """Append-only response store; the newest recording for a key wins.
+
+    Records are indexed by their exact request key and by their input-only key.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Optional[Dict[str, dict]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self, mode: str):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            entries: Dict[str, dict] = {}
+            if self.path.exists():
+                with self._open("r") as fh:
+                    for line in fh:
+                        line = line.strip()
+                        if line:
+                            record = json.loads(line)
+                            entries[record["key"]] = record
+                            if record.get("input_key"):
+                                entries[record["input_key"]] = record
+            self._entries = entries
+        return self._entries
+
+    def get(self, key: str, fallback_key: Optional[str] = None) -> Optional[dict]:
+        with self._lock:
+            entries = self._load()
+            record = entries.get(key)
+            if record is None and fallback_key:
+                record = entries.get(fallback_key)
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return record
+
+    def put(self, key: str, kind: str, provider: str, model: str, response: str, latency_ms: float,
+            input_key: Optional[str] = None) -> None:
+        record = {
+            "key": key,
+            "input_key": input_key,
+            "kind": kind,
+            "provider": provider,
+            "model": model,
+            "response": response,
+            "latency_ms": round(latency_ms, 1),
+            "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            entries = self._load()
+            entries[key] = record
+            if input_key:
+                entries[input_key] = record
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Appending gzip members keeps the file a valid multi-member gzip stream
+            with self._open("a") as fh:
+                fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len({r["key"] for r in self._entries.values()}) if self._entries is not None else None
+        return {"path": str(self.path), "mode": cassette_mode(), "recordings": size, "hits": self.hits, "misses": self.misses}
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Optional[str] = None) -> Cassette:
+    path = path or settings.cassette_path
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(Path(path))
+        return cassette
+
+
+def _replay_delay(record: dict) -> float:
+    return record.get("latency_ms", 0.0) / 1000.0 if settings.cassette_replay_latency else 0.0
+
+
+def _content_text(content: Any) -> str:
+    return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+
+def _messages_payload(messages: List[BaseMessage]) -> str:
+    return "\n".join(f"{m.type}:{_content_text(m.content)}" for m in messages)
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records `inner`'s responses or replays them from a cassette.
+
+    Only plain text generation is recorded, so structured-output mode falls back
+    to the text path while a cassette is active.
+    """
+
+    provider: str
+    model_name: str
+    inner: Any = None
+    replay: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette-chat-model"
+
+    def _keys(self, messages: List[BaseMessage]) -> tuple:
+        payload = _messages_payload(messages)
+        return (request_key("chat", self.provider, self.model_name, payload),
+                input_key("chat", self.provider, self.model_name, payload))
+
+    def _lookup(self, keys: tuple) -> dict:
+        key, fallback = keys
+        record = get_cassette().get(key, fallback if settings.cassette_match == "input" else None)
+        if record is None:
+            raise CassetteMissError(f"No cassette recording for {self.provider}:{self.model_name} ({key[:12]})")
+        return record
+
+    @staticmethod
+    def _result(text: str) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        keys = self._keys(messages)
+        if self.replay:
+            record = self._lookup(keys)
+            delay = _replay_delay(record)
+            if delay:
+                time.sleep(delay)
+            return self._result(record["response"])
+        started = time.perf_counter()
+        message = self.inner.invoke(messages, stop=stop, **kwargs)
+        text = _content_text(message.content)
+        get_cassette().put(keys[0], "chat", self.provider, self.model_name, text,
+                           (time.perf_counter() - started) * 1000, input_key=keys[1])
+        return self._result(text)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        keys = self._keys(messages)
+        if self.replay:
+            record = self._lookup(keys)
+            delay = _replay_delay(record)
+            if delay:
+                await asyncio.sleep(delay)
+            return self._result(record["response"])
+        started = time.perf_counter()
+        message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        text = _content_text(message.content)
+        get_cassette().put(keys[0], "chat", self.provider, self.model_name, text,
+                           (time.perf_counter() - started) * 1000, input_key=keys[1])
+        return self._result(text)
+
+
+def wrap_llm(llm: Any, provider: str, model: str) -> Any:
+    """Wrap a real client for the active cassette mode (no-op when off)."""
+    mode = cassette_mode()
+    if mode == "off":
+        return llm
+    return CassetteChatModel(provider=provider, model_name=model, inner=llm, replay=mode == "replay")
+
+
+def cassette_transcribe(provider: str, model: str, audio_bytes: bytes, mime_type: str, prompt: str,
+                        call: Callable[[], str]) -> str:
+    """Record or replay a transcription; `call` performs the real request."""
+    mode = cassette_mode()
+    if mode == "off":
+        return call()
+    key = request_key("transcribe", provider, model, audio_payload(audio_bytes, mime_type, prompt))
+    if mode == "replay":
+        record = get_cassette().get(key)
+        if record is None:
+            raise CassetteMissError(f"No cassette recording for transcription ({key[:12]})")
+        delay = _replay_delay(record)
+        if delay:
+            time.sleep(delay)
+        return record["response"]
+    started = time.perf_counter()
+    text = call()
+    get_cassette().put(key, "transcribe", provider, model, text, (time.perf_counter() - started) * 1000)
+    return text
@@ -0,0 +1,135 @@
+"""
+Local category retrieval for prompt pruning.
+
+Scores each category against the input with character trigrams over its name,
+description, subcategories, Gujlish keyword aliases and past expense
+descriptions, so the prompt can carry only the top-k likely categories. When
+the best match is weak the caller sends the full list instead.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from src.ai.fast_path import keyword_index
+from src.models.category import CategoryModel
+
+# Past descriptions are re-read at most this often (seconds)
+_HISTORY_TTL_SECONDS = 3600.0
+
+_history_cache: Dict[str, object] = {"loaded_at": float("-inf"), "descriptions": {}}
+_index_cache: Dict[str, object] = {"key": None, "phrases": {}}
+_lock = threading.Lock()
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f" {' '.join(text.lower().split())} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def history_is_fresh() -> bool:
+    """True when scoring can use cached descriptions without a database read."""
+    with _lock:
+        return time.monotonic() - _history_cache["loaded_at"] < _HISTORY_TTL_SECONDS  # type: ignore[operator]
+
+
+def load_history() -> Dict[str, List[str]]:
+    """Recent expense descriptions per category (best effort, cached).
+
+    A cold cache costs a synchronous Mongo aggregate; async callers should
+    warm it with `asyncio.to_thread(load_history)` first.
+    """
+    with _lock:
+        if time.monotonic() - _history_cache["loaded_at"] < _HISTORY_TTL_SECONDS:  # type: ignore[operator]
+            return _history_cache["descriptions"]  # type: ignore[return-value]
+    try:
+        from src.db.mongo import get_database
+        from src.repositories.expenses_repo import ExpensesRepository
+
+        descriptions = ExpensesRepository(get_database()).recent_descriptions_by_category()
+    except Exception:
+        descriptions = {}
+    with _lock:
+        _history_cache.update(loaded_at=time.monotonic(), descriptions=descriptions)
+    return descriptions
+
+
+def _category_phrases(categories: List[CategoryModel], generation: Optional[int]) -> Dict[str, List[Tuple[FrozenSet[str], bool]]]:
+    """Per category: (trigram set, is_short_phrase) for every phrase describing it."""
+    history = load_history()
+    key = (generation, id(history))
+    with _lock:
+        if generation is not None and _index_cache["key"] == key:
+            return _index_cache["phrases"]  # type: ignore[return-value]
+
+    phrases: Dict[str, List[Tuple[FrozenSet[str], bool]]] = {}
+    for cat in categories:
+        entries: List[Tuple[FrozenSet[str], bool]] = [(_trigrams(cat.name), True)]
+        for sub in cat.subcategories:
+            entries.append((_trigrams(sub.name), True))
+            if sub.description:
+                entries.append((_trigrams(sub.description), False))
+        if cat.description:
+            entries.append((_trigrams(cat.description), False))
+        for description in history.get(cat.name, []):
+            entries.append((_trigrams(description), False))
+        phrases[cat.name] = entries
+    for keyword, (cat_name, _) in keyword_index(categories, generation).items():
+        phrases.setdefault(cat_name, []).append((_trigrams(keyword), True))
+
+    with _lock:
+        _index_cache.update(key=key, phrases=phrases)
+    return phrases
+
+
+def score_categories(text: str, categories: List[CategoryModel], generation: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Return `(category_name, score)` sorted best first, scores in [0, 1].
+
+    Short phrases (names, aliases) score by containment in the input; longer ones
+    (descriptions, past expenses) by Jaccard similarity.
+    """
+    query = _trigrams(text)
+    scores: List[Tuple[str, float]] = []
+    for name, entries in _category_phrases(categories, generation).items():
+        best = 0.0
+        for grams, short in entries:
+            if not grams:
+                continue
+            overlap = len(query & grams)
+            if not overlap:
+                continue
+            score = overlap / len(grams) if short else overlap / len(query | grams)
+            if score > best:
+                best = score
+        scores.append((name, round(best, 4)))
+    scores.sort(key=lambda item: item[1], reverse=True)
+    return scores
+
+
+def select_categories(
+    texts: List[str],
+    categories: List[CategoryModel],
+    generation: Optional[int],
+    top_k: int,
+    min_score: float,
+) -> Tuple[Optional[List[CategoryModel]], dict]:
+    """Pick the likely categories for all `texts`.
+
+    Returns `(selected, info)`; `selected` is None when any text is a weak match
+    and the full list should be sent.
+    """
+    chosen: List[str] = []
+    top_scores: List[float] = []
+    for text in texts:
+        ranked = score_categories(text, categories, generation)
+        if not ranked or ranked[0][1] < min_score:
+            return None, {"pruned": False, "top_score": ranked[0][1] if ranked else 0.0}
+        top_scores.append(ranked[0][1])
+        # Keep close runners-up so the model can still disambiguate
+        for name, score in ranked[:max(1, top_k)]:
+            if score >= ranked[0][1] * 0.5 and name not in chosen:
+                chosen.append(name)
+    selected = [cat for cat in categories if cat.name in chosen]
+    return selected, {"pruned": True, "top_score": min(top_scores) if top_scores else 0.0, "categories_sent": chosen}
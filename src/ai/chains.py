@@ -4,63 +4,1024 @@ LangChain chain assembly for expense extraction.
 
 from __future__ import annotations
 
+import asyncio
 import json
+import math
+import threading
+import time
+import weakref
 from datetime import datetime
-from typing import Tuple, List
+from typing import Any, Dict, Tuple, List, Optional
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableSequence
 
-from src.ai.prompts import EXTRACTION_PROMPT
-from src.ai.providers import get_llm, ProviderName
-from src.models.expense import ExtractionResult
-from src.services.category_service import CategoryService
-from src.utils.datetime_utils import now_ist_iso, parse_to_utc, UTC
+from src.ai.cassette import cassette_mode
+from src.ai.category_retrieval import history_is_fresh, load_history, select_categories
+from src.ai.prompts import (
+    BATCH_EXTRACTION_PROMPTS, COMPACT_KEYS, DATE_MODES, EXTRACTION_PROMPTS, VOICE_EXTRACTION_PROMPTS,
+)
+from src.ai.tokens import estimate_tokens
+from src.ai.providers import (
+    acall_with_retries, call_with_retries, failover_target, generate_from_audio, get_alternate_target,
+    get_cascade_targets, get_llm, settings_fingerprint, ProviderName,
+)
+from src.config.settings import settings
+from src.models.category import CategoryModel
+from src.models.expense import CompactExtractionOutput, ExtractionHintOutput, ExtractionOutput, ExtractionResult
+from src.services.category_service import CategoryService, get_category_generation
+from src.utils.cache import LRUCache
+from src.utils.datetime_utils import IST, parse_iso_datetime, resolve_datetime, to_ist, to_utc
+from src.utils.metrics import llm_latency
+
+# Process-wide registry of built chains keyed by (provider, model, settings fingerprint).
+# Reusing a chain keeps the underlying client (and its HTTP connection pool) warm.
+_CHAIN_CACHE: LRUCache[RunnableSequence] = LRUCache(maxsize=settings.chain_cache_size)
+
+
+def date_resolution_mode() -> str:
+    """"local" (model returns a date hint, resolved by `resolve_datetime`) or "llm" (model returns an ISO datetime)."""
+    mode = (settings.date_resolution_mode or "local").lower()
+    return mode if mode in DATE_MODES else "local"
+
+
+def prompt_variant() -> str:
+    """Prompt/output variant in use: "llm", "local" or "compact" (local dates with short keys)."""
+    mode = date_resolution_mode()
+    return "compact" if mode == "local" and settings.compact_output_enabled else mode
+
+
+_STRUCTURED_SCHEMAS = {"llm": ExtractionOutput, "local": ExtractionHintOutput, "compact": CompactExtractionOutput}
+
+
+def _prompt_inputs(prompt, **values) -> dict:
+    """Pick the values a prompt template actually uses (date-hint prompts have no `now_iso`)."""
+    return {name: values[name] for name in prompt.input_variables}
 
 
 def build_extraction_chain(provider: ProviderName, model: str) -> RunnableSequence:
     llm = get_llm(provider, model)
-    chain = EXTRACTION_PROMPT | llm | StrOutputParser()
+    chain = EXTRACTION_PROMPTS[prompt_variant()] | llm | StrOutputParser()
     return chain
 
 
-def _build_categories_block() -> str:
-    """Build a compact categories/subcategories text block for the prompt."""
+def build_batch_extraction_chain(provider: ProviderName, model: str) -> RunnableSequence:
+    llm = get_llm(provider, model)
+    return BATCH_EXTRACTION_PROMPTS[prompt_variant()] | llm | StrOutputParser()
+
+
+def build_structured_extraction_chain(provider: ProviderName, model: str) -> RunnableSequence:
+    """Extraction chain using the provider's native structured output.
+
+    Returns `{"raw": AIMessage, "parsed": ExtractionOutput | None, "parsing_error": ...}`
+    so parse failures can be counted instead of raised.
+    """
+    llm = get_llm(provider, model)
+    variant = prompt_variant()
+    return EXTRACTION_PROMPTS[variant] | llm.with_structured_output(_STRUCTURED_SCHEMAS[variant], include_raw=True)
+
+
+def get_extraction_chain(provider: ProviderName, model: str) -> Tuple[RunnableSequence, bool]:
+    """Return a cached extraction chain and whether it was a cache hit."""
+    key = ("single", prompt_variant(), provider, model, settings_fingerprint(provider))
+    return _CHAIN_CACHE.get_or_create(key, lambda: build_extraction_chain(provider, model))
+
+
+def get_batch_extraction_chain(provider: ProviderName, model: str) -> Tuple[RunnableSequence, bool]:
+    key = ("batch", prompt_variant(), provider, model, settings_fingerprint(provider))
+    return _CHAIN_CACHE.get_or_create(key, lambda: build_batch_extraction_chain(provider, model))
+
+
+def get_structured_extraction_chain(provider: ProviderName, model: str) -> Tuple[RunnableSequence, bool]:
+    key = ("structured", prompt_variant(), provider, model, settings_fingerprint(provider))
+    return _CHAIN_CACHE.get_or_create(key, lambda: build_structured_extraction_chain(provider, model))
+
+
+def clear_chain_cache() -> None:
+    """Drop all cached chains (e.g. after rotating API keys)."""
+    _CHAIN_CACHE.clear()
+
+
+def get_chain_cache_stats() -> dict:
+    return _CHAIN_CACHE.stats()
+
+
+# Per provider/model output-parsing counters and models found to lack structured output
+_parse_stats: Dict[Tuple[str, str], Dict[str, int]] = {}
+_structured_unsupported: set = set()
+_parse_lock = threading.Lock()
+
+# Error fragments meaning "this model can't do tool calling / JSON schema output"
+_UNSUPPORTED_MARKERS = ("not support", "unsupported", "response_format", "json_schema", "function calling", "tool_choice")
+
+
+def _record_parse(provider: ProviderName, model: str, mode: str, failed: bool = False, retried: bool = False) -> None:
+    with _parse_lock:
+        stats = _parse_stats.setdefault((provider, model), {
+            "calls": 0, "structured_calls": 0, "text_calls": 0, "voice_calls": 0, "parse_failures": 0, "retries": 0,
+        })
+        stats["calls"] += 1
+        stats[f"{mode}_calls"] += 1
+        stats["parse_failures"] += int(failed)
+        stats["retries"] += int(retried)
+
+
+def get_parse_stats() -> Dict[str, dict]:
+    """Per `provider:model` call counts, parse-failure rate and retries for debug panels."""
+    with _parse_lock:
+        items = [(key, dict(stats)) for key, stats in _parse_stats.items()]
+        unsupported = set(_structured_unsupported)
+    out: Dict[str, dict] = {}
+    for (provider, model), stats in items:
+        stats["parse_failure_rate"] = round(stats["parse_failures"] / stats["calls"], 4) if stats["calls"] else 0.0
+        stats["structured_supported"] = (provider, model) not in unsupported
+        out[f"{provider}:{model}"] = stats
+    return out
+
+
+def use_structured_output(provider: ProviderName, model: str) -> bool:
+    if not settings.structured_output_enabled or model in settings.structured_output_unsupported_models:
+        return False
+    if cassette_mode() != "off":
+        # Cassettes only record text generation; their NotImplementedError must not
+        # mark the real model as unsupported or show up as a parse failure
+        return False
+    with _parse_lock:
+        return (provider, model) not in _structured_unsupported
+
+
+def _mark_structured_unsupported(provider: ProviderName, model: str, error: Exception) -> bool:
+    """Remember models whose provider rejected structured output; True if `error` was such a rejection."""
+    message = str(error).lower()
+    if not isinstance(error, NotImplementedError) and not any(marker in message for marker in _UNSUPPORTED_MARKERS):
+        return False
+    with _parse_lock:
+        _structured_unsupported.add((provider, model))
+    return True
+
+
+def _loads_model_json(raw_text: str):
+    """`json.loads` that tolerates code fences and chatter around the JSON payload."""
     try:
-        service = CategoryService()
-        categories = service.get_all_categories()
-        lines: List[str] = []
-        for cat in categories:
-            subs = ", ".join(sub.name for sub in cat.subcategories) if cat.subcategories else "None"
-            lines.append(f"- {cat.name}: {subs}")
-        return "\n".join(lines) if lines else "- Food: Snacks, Breakfast, Lunch, Dinner\n- Transportation: Bus, Taxi, Train\n- Utilities: Electricity, Water, Internet"
+        return json.loads(raw_text)
     except Exception:
-        # Fallback static minimal list if DB unavailable
-        return "- Food: Snacks, Breakfast, Lunch, Dinner\n- Transportation: Bus, Taxi, Train\n- Utilities: Electricity, Water, Internet"
+        pass
+    text = raw_text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+        text = text.rsplit("```", 1)[0]
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON found in model output")
+    start = min(starts)
+    end = max(text.rfind("}"), text.rfind("]"))
+    return json.loads(text[start:end + 1])
+
+
+def expand_output(raw: dict, text: Optional[str] = None) -> dict:
+    """Normalize one model output item to ExtractionResult field names.
+
+    Maps compact keys, fills `description` from the input text when the model
+    didn't echo it and derives `valid`/`missing_fields` when omitted, so every
+    prompt variant yields the same result shape.
+    """
+    out = {COMPACT_KEYS.get(key, key): value for key, value in raw.items()}
+    if not out.get("description") and text:
+        out["description"] = text
+    absent = [name for name in ("amount", "category", "subcategory") if out.get(name) is None]
+    if "missing_fields" not in out:
+        out["missing_fields"] = absent
+    if "valid" not in out:
+        out["valid"] = not absent and not out["missing_fields"]
+    return out
+
+
+def _structured_payload(output: dict) -> Tuple[Optional[dict], str]:
+    """Split a structured-output response into (parsed dict or None, raw text for debugging)."""
+    message = output.get("raw")
+    raw_text = getattr(message, "content", None) or ""
+    tool_calls = getattr(message, "tool_calls", None)
+    if not raw_text and tool_calls:
+        raw_text = json.dumps(tool_calls[0].get("args", {}), ensure_ascii=False, default=str)
+    parsed = output.get("parsed")
+    if parsed is None:
+        return None, raw_text or str(output.get("parsing_error") or "")
+    return parsed.model_dump(), raw_text or parsed.model_dump_json()
 
 
-def run_extraction(provider: ProviderName, model: str, text: str) -> Tuple[ExtractionResult, dict]:
-    chain = build_extraction_chain(provider, model)
-    categories_block = _build_categories_block()
-    raw_text = chain.invoke({"text": text, "now_iso": now_ist_iso(), "categories_block": categories_block})
-    raw: dict
+_DEFAULT_CATEGORIES_BLOCK = "- Food: Snacks, Breakfast, Lunch, Dinner\n- Transportation: Bus, Taxi, Train\n- Utilities: Electricity, Water, Internet"
+
+# Rendered categories block, tagged with the taxonomy generation it was built from.
+_categories_snapshot: dict = {"generation": None, "built_at": 0.0, "categories": [], "block": _DEFAULT_CATEGORIES_BLOCK}
+_categories_lock = threading.Lock()
+
+
+def _render_categories_block(categories: List[CategoryModel]) -> str:
+    lines: List[str] = []
+    for cat in categories:
+        subs = ", ".join(sub.name for sub in cat.subcategories) if cat.subcategories else "None"
+        lines.append(f"- {cat.name}: {subs}")
+    return "\n".join(lines) if lines else _DEFAULT_CATEGORIES_BLOCK
+
+
+def get_categories_snapshot() -> Tuple[int, List[CategoryModel], str, bool]:
+    """Return `(generation, categories, block, cached)` for the active taxonomy.
+
+    The snapshot is rebuilt only when the category generation changes (any
+    CategoryService mutation in this process) or the TTL expires, which covers
+    edits made by other app instances.
+    """
+    generation = get_category_generation()
+    with _categories_lock:
+        snap = _categories_snapshot
+        fresh = (time.monotonic() - snap["built_at"]) < settings.categories_cache_ttl_seconds
+        if snap["generation"] == generation and fresh:
+            return generation, snap["categories"], snap["block"], True
     try:
-        raw = json.loads(raw_text)
+        categories = CategoryService().get_all_categories()
     except Exception:
-        raw = {"valid": False, "missing_fields": ["amount"], "error": "Invalid JSON from model", "raw": raw_text}
+        # DB unavailable: use the static fallback without caching it
+        return generation, [], _DEFAULT_CATEGORIES_BLOCK, False
+    block = _render_categories_block(categories)
+    with _categories_lock:
+        _categories_snapshot.update(
+            generation=generation, built_at=time.monotonic(), categories=categories, block=block
+        )
+    return generation, categories, block, False
+
+
+def _build_categories_block() -> str:
+    """Build a compact categories/subcategories text block for the prompt."""
+    return get_categories_snapshot()[2]
+
+
+# Exact-match extraction results keyed by normalized text, provider/model,
+# taxonomy generation and IST date (relative dates depend on "today").
+_RESULT_CACHE: LRUCache[dict] = LRUCache(
+    maxsize=settings.result_cache_size, ttl_seconds=settings.result_cache_ttl_seconds
+)
+# Results whose datetime is within this window of "now" are re-anchored on a hit
+_NOW_ANCHOR_SECONDS = 120
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and collapse whitespace for cache keys."""
+    return " ".join(text.lower().split())
+
+
+def _result_cache_key(provider: ProviderName, model: str, text: str, generation: int, now: datetime) -> tuple:
+    # The variant decides how the date is resolved, so a switch must not serve stale results
+    return (normalize_query(text), provider, model, generation, prompt_variant(), now.date().isoformat())
+
+
+def get_result_cache_stats() -> dict:
+    return _RESULT_CACHE.stats()
+
+
+def clear_result_cache() -> None:
+    _RESULT_CACHE.clear()
+
+
+def _resolve_when(raw: dict, text: Optional[str], now: Optional[datetime]) -> Tuple[datetime, str]:
+    """Expense time from the model's ISO datetime, else its date hint, else the input text.
 
-    result = ExtractionResult(
+    Returns `(UTC datetime, source)`; an unparseable model datetime or hint
+    falls through to the text instead of becoming "now". A null hint means the
+    model found no date, so the text is not re-read ("1/2 kg" is not a day).
+    """
+    when = parse_iso_datetime(raw.get("datetime"))
+    if when is not None:
+        return when, "model"
+    hint = raw.get("date")
+    if isinstance(hint, str) and hint.strip():
+        resolved, matched = resolve_datetime(hint, now, date_hint=True)
+        if matched:
+            return to_utc(resolved), "hint"
+    elif any(key in raw and raw[key] is None for key in ("date", "datetime")):
+        return to_utc(to_ist(now) if now is not None else datetime.now(tz=IST)), "now"
+    resolved, matched = resolve_datetime(text or raw.get("description") or "", now)
+    return to_utc(resolved), ("text" if matched else "now")
+
+
+def _result_from_raw(raw: dict, provider: ProviderName, model: str, text: Optional[str] = None,
+                     now: Optional[datetime] = None) -> ExtractionResult:
+    when, _ = _resolve_when(raw, text, now)
+    return ExtractionResult(
         valid=bool(raw.get("valid", True)),
         amount=raw.get("amount"),
         category=raw.get("category"),
         subcategory=raw.get("subcategory"),
         description=raw.get("description"),
-        datetime=parse_to_utc(raw.get("datetime")) if raw.get("datetime") else datetime.now(tz=UTC),
+        datetime=when,
         missing_fields=list(raw.get("missing_fields", [])),
         provider=provider,
         model=model,
         raw_response=raw,
         error=raw.get("error"),
     )
-    return result, {"prompt_output": raw_text, "parsed": raw}
 
+
+def _store_result(key: tuple, result: ExtractionResult, now: datetime, latency_ms: float) -> None:
+    if not result.valid or result.error or result.amount is None or result.datetime is None:
+        return
+    _RESULT_CACHE.set(key, {
+        "amount": result.amount,
+        "category": result.category,
+        "subcategory": result.subcategory,
+        "datetime": result.datetime,
+        "now_anchored": abs((result.datetime - now).total_seconds()) <= _NOW_ANCHOR_SECONDS,
+        "raw": result.raw_response,
+        "latency_ms": latency_ms,
+    })
+
+
+def _result_from_cache(entry: dict, text: str, provider: ProviderName, model: str, now: datetime) -> ExtractionResult:
+    # Same IST date is guaranteed by the key; only "now"-anchored times move forward
+    when = to_utc(now) if entry["now_anchored"] else entry["datetime"]
+    return ExtractionResult(
+        valid=True,
+        amount=entry["amount"],
+        category=entry["category"],
+        subcategory=entry["subcategory"],
+        description=text,
+        datetime=when,
+        missing_fields=[],
+        provider=provider,
+        model=model,
+        raw_response=entry["raw"],
+    )
+
+
+def _pruned_categories_block(
+    texts: List[str],
+    categories: List[CategoryModel],
+    generation: int,
+    full_block: str,
+    render_prompt,
+) -> Tuple[str, dict]:
+    """Return the categories block to send plus prompt-token counts before/after pruning."""
+    info: dict = {"pruned": False}
+    block = full_block
+    if settings.category_pruning_enabled and categories:
+        selected, info = select_categories(
+            texts, categories, generation, settings.category_prune_top_k, settings.category_prune_min_score
+        )
+        if selected:
+            block = _render_categories_block(selected)
+    info["prompt_tokens_full"] = estimate_tokens(render_prompt(full_block))
+    info["prompt_tokens_sent"] = info["prompt_tokens_full"] if block == full_block else estimate_tokens(render_prompt(block))
+    return block, info
+
+
+def _prepare_extraction(provider: ProviderName, model: str, text: str, snapshot: Optional[tuple] = None,
+                        now: Optional[datetime] = None) -> dict:
+    """Resolve "now", the categories block and the result-cache lookup for one extraction."""
+    now = to_ist(now) if now is not None else datetime.now(tz=IST)
+    generation, categories, categories_block, block_cached = snapshot or get_categories_snapshot()
+    ctx = {
+        "text": text,
+        "now": now,
+        "generation": generation,
+        "categories_block": categories_block,
+        "block_cached": block_cached,
+        "cache_key": _result_cache_key(provider, model, text, generation, now),
+        "cached": None,
+        "resilience": {},
+    }
+    if settings.result_cache_enabled:
+        entry = _RESULT_CACHE.get(ctx["cache_key"])
+        if entry is not None:
+            result = _result_from_cache(entry, text, provider, model, now)
+            ctx["cached"] = (result, {
+                "result_cache": {"hit": True, "saved_ms": entry["latency_ms"], **get_result_cache_stats()},
+                "categories_block": {"generation": generation, "cached": block_cached},
+            })
+            return ctx
+
+    ctx["categories_block"], ctx["pruning"] = _pruned_categories_block(
+        [text], categories, generation, categories_block,
+        lambda block: _render_prompt(EXTRACTION_PROMPTS[prompt_variant()], text=text, now=now, categories_block=block),
+    )
+    return ctx
+
+
+def _render_prompt(prompt, now: datetime, **values) -> str:
+    return prompt.format(**_prompt_inputs(prompt, now_iso=now.isoformat(), **values))
+
+
+def _chain_inputs(text: str, ctx: dict) -> dict:
+    return _prompt_inputs(EXTRACTION_PROMPTS[prompt_variant()], text=text, now_iso=ctx["now"].isoformat(),
+                          categories_block=ctx["categories_block"])
+
+
+def _complete_extraction(provider: ProviderName, model: str, raw_text: str, ctx: dict,
+                         latency_ms: float, chain_cache_hit: bool, raw: Optional[dict] = None,
+                         mode: str = "text", retried: bool = False) -> Tuple[ExtractionResult, dict]:
+    """Parse model output into an ExtractionResult, cache it and build the debug payload.
+
+    `raw` is the already-parsed payload in structured-output mode.
+    """
+    failed = False
+    if raw is None:
+        try:
+            raw = _loads_model_json(raw_text)
+            if not isinstance(raw, dict):
+                raise ValueError("Expected a JSON object")
+        except Exception:
+            raw = {"valid": False, "missing_fields": ["amount"], "error": "Invalid JSON from model", "raw": raw_text}
+            failed = True
+    _record_parse(provider, model, mode, failed=failed, retried=retried)
+    if not failed:
+        raw = expand_output(raw, ctx.get("text"))
+
+    result = _result_from_raw(raw, provider, model, ctx.get("text"), ctx["now"])
+    if settings.result_cache_enabled:
+        _store_result(ctx["cache_key"], result, ctx["now"], latency_ms)
+    debug = {
+        "prompt_output": raw_text,
+        "parsed": raw,
+        "llm_ms": latency_ms,
+        "chain_cache": {"hit": chain_cache_hit, **get_chain_cache_stats()},
+        "categories_block": {"generation": ctx["generation"], "cached": ctx["block_cached"]},
+        "categories_pruning": ctx.get("pruning"),
+        "result_cache": {"hit": False, **get_result_cache_stats()},
+        "output_mode": {"mode": mode, "retried": retried},
+        "resilience": ctx["resilience"],
+    }
+    return result, debug
+
+
+def _structured_failed(provider: ProviderName, model: str, error: Exception) -> None:
+    """Handle a structured-output error: unsupported models fall back to text, others re-raise."""
+    if not _mark_structured_unsupported(provider, model, error):
+        raise error
+
+
+def _extract_once(provider: ProviderName, model: str, text: str,
+                  now: Optional[datetime] = None) -> Tuple[ExtractionResult, dict]:
+    ctx = _prepare_extraction(provider, model, text, now=now)
+    if ctx["cached"] is not None:
+        return ctx["cached"]
+
+    retried = False
+    if use_structured_output(provider, model):
+        try:
+            chain, chain_cache_hit = get_structured_extraction_chain(provider, model)
+            started = time.perf_counter()
+            output = call_with_retries(provider, lambda: chain.invoke(_chain_inputs(text, ctx)), ctx["resilience"])
+            latency_ms = round((time.perf_counter() - started) * 1000, 3)
+            raw, raw_text = _structured_payload(output)
+            if raw is not None:
+                return _complete_extraction(provider, model, raw_text, ctx, latency_ms, chain_cache_hit,
+                                            raw=raw, mode="structured")
+            # Schema validation failed: count it and retry once on the text path
+            _record_parse(provider, model, "structured", failed=True)
+            retried = True
+        except Exception as e:
+            _structured_failed(provider, model, e)
+
+    chain, chain_cache_hit = get_extraction_chain(provider, model)
+    started = time.perf_counter()
+    raw_text = call_with_retries(provider, lambda: chain.invoke(_chain_inputs(text, ctx)), ctx["resilience"])
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    return _complete_extraction(provider, model, raw_text, ctx, latency_ms, chain_cache_hit, retried=retried)
+
+
+def _with_failover_debug(debug: dict, provider: ProviderName, model: str,
+                         target: Tuple[ProviderName, str], error: Exception) -> dict:
+    debug["resilience"] = {**(debug.get("resilience") or {}), "failover": {
+        "from": f"{provider}:{model}", "to": f"{target[0]}:{target[1]}", "reason": str(error)[:300],
+    }}
+    return debug
+
+
+def run_extraction(provider: ProviderName, model: str, text: str, failover: bool = True,
+                   now: Optional[datetime] = None) -> Tuple[ExtractionResult, dict]:
+    """Extract one expense. Provider calls are retried with backoff; when they still
+    fail (or the provider's circuit is open) the alternate provider is tried once.
+    The returned result's provider/model name the target that actually answered.
+    `now` anchors relative dates; defaults to the current time.
+    """
+    try:
+        return _extract_once(provider, model, text, now)
+    except Exception as e:
+        target = failover_target(provider, model, e) if failover else None
+        if target is None:
+            raise
+        result, debug = _extract_once(target[0], target[1], text, now)
+        return result, _with_failover_debug(debug, provider, model, target, e)
+
+
+def run_voice_extraction(audio_bytes: bytes, mime_type: str, model: str) -> Tuple[str, ExtractionResult, dict]:
+    """Transcribe and extract a spoken expense with one multimodal Gemini call.
+
+    Returns `(transcript, result, debug)`. The transcript is empty when the
+    reply could not be parsed; callers should then fall back to
+    `transcribe_with_gemini` + `run_extraction`.
+    """
+    provider: ProviderName = "gemini"
+    now = datetime.now(tz=IST)
+    generation, _, categories_block, block_cached = get_categories_snapshot()
+    prompt = _render_prompt(VOICE_EXTRACTION_PROMPTS[prompt_variant()], now=now, categories_block=categories_block)
+    started = time.perf_counter()
+    raw_text = generate_from_audio(audio_bytes, mime_type, model, prompt)
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    try:
+        raw = _loads_model_json(raw_text)
+        raw = expand_output(raw) if isinstance(raw, dict) else None
+        transcript = str(raw.pop("transcript", "") or "").strip() if raw is not None else ""
+    except Exception:
+        raw, transcript = None, ""
+    if not transcript:
+        _record_parse(provider, model, "voice", failed=True)
+        result = ExtractionResult(valid=False, missing_fields=["amount"], provider=provider, model=model,
+                                  error="Invalid JSON from model", raw_response={"raw": raw_text})
+        return "", result, {"prompt_output": raw_text, "llm_ms": latency_ms}
+
+    raw.setdefault("description", transcript)
+    ctx = {
+        "text": transcript,
+        "now": now,
+        "generation": generation,
+        "categories_block": categories_block,
+        "block_cached": block_cached,
+        # Lets a later typed/transcribed entry of the same words hit the result cache
+        "cache_key": _result_cache_key(provider, model, transcript, generation, now),
+        "pruning": {"prompt_tokens_sent": estimate_tokens(prompt)},
+        "resilience": {},
+    }
+    result, debug = _complete_extraction(provider, model, raw_text, ctx, latency_ms, False, raw=raw, mode="voice")
+    debug.pop("chain_cache", None)
+    return transcript, result, debug
+
+
+# Per-event-loop semaphores bounding in-flight provider calls
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _provider_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(max(1, settings.max_concurrent_extractions))
+    return semaphore
+
+
+async def _extract_once_async(provider: ProviderName, model: str, text: str) -> Tuple[ExtractionResult, dict]:
+    snapshot = await asyncio.to_thread(get_categories_snapshot)
+    if settings.category_pruning_enabled and not history_is_fresh():
+        # Pruning reads past descriptions with a sync aggregate; keep it off the loop
+        await asyncio.to_thread(load_history)
+    ctx = _prepare_extraction(provider, model, text, snapshot)
+    if ctx["cached"] is not None:
+        return ctx["cached"]
+
+    retried = False
+    if use_structured_output(provider, model):
+        try:
+            chain, chain_cache_hit = get_structured_extraction_chain(provider, model)
+            async with _provider_semaphore():
+                started = time.perf_counter()
+                output = await acall_with_retries(provider, lambda: chain.ainvoke(_chain_inputs(text, ctx)), ctx["resilience"])
+                latency_ms = round((time.perf_counter() - started) * 1000, 3)
+            raw, raw_text = _structured_payload(output)
+            if raw is not None:
+                return _complete_extraction(provider, model, raw_text, ctx, latency_ms, chain_cache_hit,
+                                            raw=raw, mode="structured")
+            _record_parse(provider, model, "structured", failed=True)
+            retried = True
+        except Exception as e:
+            _structured_failed(provider, model, e)
+
+    chain, chain_cache_hit = get_extraction_chain(provider, model)
+    async with _provider_semaphore():
+        started = time.perf_counter()
+        raw_text = await acall_with_retries(provider, lambda: chain.ainvoke(_chain_inputs(text, ctx)), ctx["resilience"])
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    return _complete_extraction(provider, model, raw_text, ctx, latency_ms, chain_cache_hit, retried=retried)
+
+
+async def run_extraction_async(provider: ProviderName, model: str, text: str,
+                               failover: bool = True) -> Tuple[ExtractionResult, dict]:
+    """Async `run_extraction` using `chain.ainvoke`.
+
+    At most `settings.max_concurrent_extractions` provider calls are in flight per
+    event loop; the (possibly DB-backed) categories snapshot is loaded off-loop.
+    """
+    try:
+        return await _extract_once_async(provider, model, text)
+    except Exception as e:
+        target = failover_target(provider, model, e) if failover else None
+        if target is None:
+            raise
+        result, debug = await _extract_once_async(target[0], target[1], text)
+        return result, _with_failover_debug(debug, provider, model, target, e)
+
+
+def is_conforming(result: ExtractionResult) -> bool:
+    """True if a result is complete enough to save without another attempt."""
+    return bool(
+        result.valid and not result.error and result.amount is not None
+        and result.category and result.subcategory
+    )
+
+
+def hedge_delay_seconds(provider: ProviderName, model: str) -> float:
+    """Delay before hedging: the primary's latency percentile once enough samples exist."""
+    key = (provider, model)
+    if settings.hedge_delay_percentile > 0 and llm_latency.count(key) >= settings.hedge_min_samples:
+        observed = llm_latency.percentile(key, settings.hedge_delay_percentile)
+        if observed is not None:
+            return observed / 1000.0
+    return settings.hedge_delay_ms / 1000.0
+
+
+async def _timed_attempt(provider: ProviderName, model: str, text: str, role: str, t0: float) -> dict:
+    attempt = {"role": role, "provider": provider, "model": model,
+               "started_ms": round((time.perf_counter() - t0) * 1000, 3)}
+    started = time.perf_counter()
+    try:
+        # Hedging already races the alternate; don't fail over inside an attempt
+        result, debug = await run_extraction_async(provider, model, text, failover=False)
+        attempt.update(result=result, debug=debug, error=None, exception=None,
+                       cached=bool((debug.get("result_cache") or {}).get("hit")))
+    except Exception as e:
+        attempt.update(result=None, debug={}, error=str(e), exception=e, cached=False)
+    attempt["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return attempt
+
+
+async def run_extraction_hedged_async(
+    provider: ProviderName,
+    model: str,
+    text: str,
+    hedge_target: Optional[Tuple[ProviderName, str]] = None,
+    delay_s: Optional[float] = None,
+) -> Tuple[ExtractionResult, dict]:
+    """Race the primary model against an alternate started after a delay.
+
+    The first schema-conforming result wins and the other attempt is cancelled.
+    `debug["hedge"]["attempts"]` describes every attempt (role, target, outcome,
+    its own latency) so callers can log both. With no conforming answer the
+    primary's result is returned, else the hedge's, else the primary's error.
+    """
+    hedge_target = hedge_target or get_alternate_target(provider, model)
+    delay = hedge_delay_seconds(provider, model) if delay_s is None else delay_s
+    t0 = time.perf_counter()
+    tasks: Dict[asyncio.Task, str] = {
+        asyncio.create_task(_timed_attempt(provider, model, text, "primary", t0)): "primary"
+    }
+    started_at: Dict[str, float] = {"primary": t0}
+    finished: List[dict] = []
+    winner: Optional[dict] = None
+    hedged = False
+
+    pending = set(tasks)
+    done, pending = await asyncio.wait(pending, timeout=delay)
+    while True:
+        for task in done:
+            attempt = task.result()
+            finished.append(attempt)
+            if winner is None and attempt["result"] is not None and is_conforming(attempt["result"]):
+                winner = attempt
+        if winner is not None:
+            break
+        if not hedged and hedge_target is not None:
+            # Primary is slow or returned something unusable: start the hedge
+            hedged = True
+            started_at["hedge"] = time.perf_counter()
+            hedge_task = asyncio.create_task(_timed_attempt(hedge_target[0], hedge_target[1], text, "hedge", t0))
+            tasks[hedge_task] = "hedge"
+            pending.add(hedge_task)
+        if not pending:
+            break
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+    cancelled: List[dict] = []
+    for task in pending:
+        task.cancel()
+        role = tasks[task]
+        target = (provider, model) if role == "primary" else hedge_target
+        # Elapsed time of the attempt itself: a lower bound on its latency
+        cancelled.append({"role": role, "provider": target[0], "model": target[1], "outcome": "cancelled",
+                          "started_ms": round((started_at[role] - t0) * 1000, 3),
+                          "latency_ms": round((time.perf_counter() - started_at[role]) * 1000, 3),
+                          "cached": False})
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if winner is None:
+        # Nothing conforming: surface the primary's answer, else the hedge's, else the primary's error
+        ordered = sorted(finished, key=lambda a: a["role"] != "primary")
+        winner = next((a for a in ordered if a["result"] is not None), None)
+        if winner is None:
+            raise ordered[0]["exception"]
+
+    attempts = []
+    for attempt in finished:
+        outcome = "won" if attempt is winner else ("error" if attempt["error"] else "invalid")
+        attempts.append({k: attempt[k] for k in ("role", "provider", "model", "started_ms", "latency_ms", "cached")}
+                        | {"outcome": outcome, "error": attempt["error"],
+                           "result": attempt["result"].model_dump() if attempt["result"] is not None else None})
+    attempts.extend(cancelled)
+
+    debug = dict(winner["debug"])
+    debug["hedge"] = {
+        "delay_ms": round(delay * 1000, 1),
+        "hedged": hedged,
+        "winner": winner["role"],
+        "attempts": attempts,
+    }
+    return winner["result"], debug
+
+
+# Long-lived loop for sync callers of the async paths. Cached chains keep their
+# async HTTP clients bound to the loop they first ran on, so a fresh
+# `asyncio.run()` loop per call would leave them on a closed loop.
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="extraction-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def _run_on_background_loop(coro: Any) -> Any:
+    """Run `coro` on the shared background loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+
+def run_extraction_hedged(provider: ProviderName, model: str, text: str,
+                          hedge_target: Optional[Tuple[ProviderName, str]] = None,
+                          delay_s: Optional[float] = None) -> Tuple[ExtractionResult, dict]:
+    """Sync wrapper around `run_extraction_hedged_async` for the Streamlit script thread."""
+    return _run_on_background_loop(run_extraction_hedged_async(provider, model, text, hedge_target, delay_s))
+
+
+def validate_result(result: ExtractionResult, categories: List[CategoryModel]) -> List[str]:
+    """Local checks a cascade tier's answer must pass; returns the names of the failed ones.
+
+    Checks: model-reported validity and missing fields, a positive finite amount,
+    category/subcategory present in the taxonomy (when one is loaded) and a
+    datetime or date hint that actually parses.
+    """
+    problems: List[str] = []
+    if not result.valid or result.error or result.missing_fields:
+        problems.append("missing_fields")
+    try:
+        amount = float(result.amount) if result.amount is not None else None
+    except (TypeError, ValueError):
+        amount = None
+    if amount is None or not math.isfinite(amount) or amount <= 0:
+        problems.append("amount")
+    taxonomy = {c.name.lower(): {s.name.lower() for s in c.subcategories} for c in categories}
+    subcategories = taxonomy.get((result.category or "").lower()) if taxonomy else set()
+    if not result.category or subcategories is None:
+        problems.append("category")
+    elif not result.subcategory or (taxonomy and result.subcategory.lower() not in subcategories):
+        problems.append("subcategory")
+    raw = result.raw_response or {}
+    hint = raw.get("date")
+    if (result.datetime is None
+            or (raw.get("datetime") and parse_iso_datetime(raw["datetime"]) is None)
+            or (isinstance(hint, str) and hint.strip() and not resolve_datetime(hint, date_hint=True)[1])):
+        problems.append("date")
+    return problems
+
+
+# Per provider/model cascade tier counters
+_cascade_stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+_cascade_lock = threading.Lock()
+
+_CASCADE_OUTCOME_COUNTERS = {"accepted": "accepted", "escalated": "escalated", "exhausted": "exhausted", "error": "errors"}
+
+
+def _record_cascade(attempt: dict) -> None:
+    with _cascade_lock:
+        stats = _cascade_stats.setdefault((attempt["provider"], attempt["model"]), {
+            "calls": 0, "accepted": 0, "escalated": 0, "exhausted": 0, "errors": 0, "total_ms": 0.0,
+        })
+        stats["calls"] += 1
+        stats[_CASCADE_OUTCOME_COUNTERS[attempt["outcome"]]] += 1
+        stats["total_ms"] += attempt["latency_ms"]
+
+
+def get_cascade_stats() -> Dict[str, dict]:
+    """Per `provider:model` cascade tier hit rate (answers accepted without escalation) and mean latency."""
+    with _cascade_lock:
+        items = [(key, dict(stats)) for key, stats in _cascade_stats.items()]
+    out: Dict[str, dict] = {}
+    for (provider, model), stats in items:
+        stats["hit_rate"] = round(stats["accepted"] / stats["calls"], 4) if stats["calls"] else 0.0
+        stats["mean_ms"] = round(stats.pop("total_ms") / stats["calls"], 1) if stats["calls"] else None
+        out[f"{provider}:{model}"] = stats
+    return out
+
+
+def _cascade_attempt(tier: int, target: Tuple[ProviderName, str], started: float, categories: List[CategoryModel],
+                     result: Optional[ExtractionResult] = None, debug: Optional[dict] = None,
+                     error: Optional[Exception] = None) -> dict:
+    return {
+        "tier": tier,
+        "provider": target[0],
+        "model": target[1],
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+        "problems": validate_result(result, categories) if result is not None else [],
+        "result": result,
+        "debug": debug or {},
+        "exception": error,
+    }
+
+
+def _finish_cascade(tiers: List[Tuple[ProviderName, str]], attempts: List[dict]) -> Tuple[ExtractionResult, dict]:
+    """Return the first tier that passed validation (else the strongest answer) with `debug["cascade"]`."""
+    answered = [a for a in attempts if a["result"] is not None]
+    if not answered:
+        raise attempts[-1]["exception"]
+    accepted = next((a for a in answered if not a["problems"]), None)
+    chosen = accepted or answered[-1]
+
+    summary = []
+    for attempt in attempts:
+        if attempt["result"] is None:
+            attempt["outcome"] = "error"
+        elif attempt is accepted:
+            attempt["outcome"] = "accepted"
+        elif attempt is chosen:
+            # Every tier failed validation: keep the strongest model's answer
+            attempt["outcome"] = "exhausted"
+        else:
+            attempt["outcome"] = "escalated"
+        _record_cascade(attempt)
+        error = attempt["exception"]
+        summary.append({k: attempt[k] for k in ("tier", "provider", "model", "latency_ms", "outcome", "problems")}
+                       | {"error": str(error)[:300] if error is not None else None,
+                          "result": attempt["result"].model_dump() if attempt["result"] is not None else None})
+
+    debug = dict(chosen["debug"])
+    debug["cascade"] = {
+        "tiers": [f"{p}:{m}" for p, m in tiers],
+        "accepted_tier": accepted["tier"] if accepted is not None else None,
+        "chosen_tier": chosen["tier"],
+        "attempts": summary,
+    }
+    return chosen["result"], debug
+
+
+def run_extraction_cascade(provider: ProviderName, model: str, text: str) -> Tuple[ExtractionResult, dict]:
+    """Cheap-first extraction: try `get_cascade_targets` in order and escalate to the
+    next tier only when an answer fails `validate_result` (or the call errors).
+
+    The selected (provider, model) is the last tier. `debug["cascade"]["attempts"]`
+    lists every tier tried with its latency, outcome and failed checks.
+    """
+    _, categories, _, _ = get_categories_snapshot()
+    tiers = get_cascade_targets(provider, model)
+    attempts: List[dict] = []
+    for tier, target in enumerate(tiers):
+        started = time.perf_counter()
+        try:
+            # The cascade is its own fallback chain; don't fail over inside a tier
+            result, debug = run_extraction(target[0], target[1], text, failover=False)
+            attempts.append(_cascade_attempt(tier, target, started, categories, result, debug))
+        except Exception as e:
+            attempts.append(_cascade_attempt(tier, target, started, categories, error=e))
+        if attempts[-1]["result"] is not None and not attempts[-1]["problems"]:
+            break
+    return _finish_cascade(tiers, attempts)
+
+
+async def run_extraction_cascade_async(provider: ProviderName, model: str, text: str) -> Tuple[ExtractionResult, dict]:
+    """Async `run_extraction_cascade` using `run_extraction_async` for each tier."""
+    _, categories, _, _ = await asyncio.to_thread(get_categories_snapshot)
+    tiers = get_cascade_targets(provider, model)
+    attempts: List[dict] = []
+    for tier, target in enumerate(tiers):
+        started = time.perf_counter()
+        try:
+            result, debug = await run_extraction_async(target[0], target[1], text, failover=False)
+            attempts.append(_cascade_attempt(tier, target, started, categories, result, debug))
+        except Exception as e:
+            attempts.append(_cascade_attempt(tier, target, started, categories, error=e))
+        if attempts[-1]["result"] is not None and not attempts[-1]["problems"]:
+            break
+    return _finish_cascade(tiers, attempts)
+
+
+def _parse_batch_output(raw_text: str, count: int) -> Dict[int, dict]:
+    """Map 0-based item positions to raw item dicts from a batch response."""
+    try:
+        parsed = _loads_model_json(raw_text)
+    except Exception:
+        return {}
+    if isinstance(parsed, dict):
+        parsed = parsed.get("items") or parsed.get("expenses") or []
+    if not isinstance(parsed, list):
+        return {}
+    items: Dict[int, dict] = {}
+    for position, item in enumerate(parsed):
+        if not isinstance(item, dict):
+            continue
+        item = expand_output(item)
+        try:
+            index = int(item.get("index", position + 1)) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < count and index not in items:
+            items[index] = item
+    return items
+
+
+def run_extraction_batch(provider: ProviderName, model: str, texts: List[str],
+                         now: Optional[datetime] = None) -> Tuple[List[ExtractionResult], dict]:
+    """Extract many expense lines with one LLM call.
+
+    Cached results are served locally; remaining lines share one prompt (and one
+    categories block). Lines missing from, or malformed in, the model's JSON array
+    fall back to a single `run_extraction` call each; a line whose fallback also
+    fails comes back invalid with the error instead of failing the batch. `now`
+    anchors relative dates (e.g. the timestamp of imported messages); defaults to
+    the current time.
+    """
+    now = to_ist(now) if now is not None else datetime.now(tz=IST)
+    generation, categories, categories_block, block_cached = get_categories_snapshot()
+    results: List[Optional[ExtractionResult]] = [None] * len(texts)
+    cache_hits: List[int] = []
+    pending: List[int] = []
+    for i, text in enumerate(texts):
+        entry = _RESULT_CACHE.get(_result_cache_key(provider, model, text, generation, now)) if settings.result_cache_enabled else None
+        if entry is not None:
+            results[i] = _result_from_cache(entry, text, provider, model, now)
+            cache_hits.append(i)
+        else:
+            pending.append(i)
+
+    debug: dict = {
+        "items": len(texts),
+        "result_cache_hits": cache_hits,
+        "categories_block": {"generation": generation, "cached": block_cached},
+    }
+    fallbacks: List[int] = []
+    if pending:
+        chain, chain_cache_hit = get_batch_extraction_chain(provider, model)
+        # Newlines inside an item would break the numbered list
+        items_block = "\n".join(f"{n}. {' '.join(texts[i].split())}" for n, i in enumerate(pending, start=1))
+        batch_prompt = BATCH_EXTRACTION_PROMPTS[prompt_variant()]
+        sent_block, pruning = _pruned_categories_block(
+            [texts[i] for i in pending], categories, generation, categories_block,
+            lambda block: _render_prompt(batch_prompt, items=items_block, now=now, categories_block=block),
+        )
+        debug["categories_pruning"] = pruning
+        resilience: dict = {}
+        started = time.perf_counter()
+        try:
+            raw_text = call_with_retries(
+                provider,
+                lambda: chain.invoke(_prompt_inputs(batch_prompt, items=items_block, now_iso=now.isoformat(),
+                                                    categories_block=sent_block)),
+                resilience,
+            )
+        except Exception as e:
+            # Every line falls back to single extraction (which can fail over)
+            resilience["error"] = str(e)[:300]
+            raw_text = ""
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        debug["resilience"] = resilience
+        parsed = _parse_batch_output(raw_text, len(pending))
+        per_item_ms = latency_ms / len(pending)
+
+        for n, i in enumerate(pending):
+            raw = parsed.get(n)
+            result: Optional[ExtractionResult] = None
+            if raw is not None:
+                try:
+                    raw.setdefault("description", texts[i])
+                    result = _result_from_raw(raw, provider, model, texts[i], now)
+                except Exception:
+                    result = None
+            if result is None:
+                fallbacks.append(i)
+                try:
+                    result, _ = run_extraction(provider, model, texts[i], now=now)
+                except Exception as e:
+                    result = ExtractionResult(valid=False, missing_fields=["amount"], description=texts[i],
+                                              provider=provider, model=model, error=str(e)[:300])
+            elif settings.result_cache_enabled:
+                _store_result(_result_cache_key(provider, model, texts[i], generation, now), result, now, per_item_ms)
+            results[i] = result
+
+        debug.update({
+            "prompt_output": raw_text,
+            "llm_ms": latency_ms,
+            "llm_items": len(pending),
+            "chain_cache": {"hit": chain_cache_hit, **get_chain_cache_stats()},
+        })
+    debug["fallbacks"] = fallbacks
+    return [r for r in results if r is not None], debug
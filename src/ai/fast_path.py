@@ -0,0 +1,187 @@
+"""
+Deterministic Gujlish fast-path extractor.
+
+Handles short, well-formed inputs like "20rs na padika" or "kaale bus ma 15 rupiya"
+with a regex/lexicon engine so they can be saved without an LLM round trip.
+Returns an ExtractionResult plus a confidence score; callers fall back to the
+LLM when the score is below `settings.fast_path_min_confidence`.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.models.category import CategoryModel
+from src.models.expense import ExtractionResult
+from src.utils.datetime_utils import IST, resolve_datetime, to_ist, to_utc
+
+FAST_PATH_PROVIDER = "local"
+FAST_PATH_MODEL = "fast-path"
+
+_NUMBER = r"\d+(?:,\d{2,3})*(?:\.\d{1,2})?"
+
+# Amounts with an explicit currency marker: ₹20, rs 20, 20rs, 20 rupiya, 20/-, "20 na"
+_CURRENCY_AMOUNT = re.compile(
+    rf"(?:₹|\brs\.?|\binr)\s*(?P<pre>{_NUMBER})"
+    rf"|(?P<post>{_NUMBER})\s*(?:₹|/-|rs\b\.?|inr\b|rupiya\b|rupiyaa\b|rupees?\b|rupaye\b|na\b|ni\b|no\b|nu\b)",
+    re.IGNORECASE,
+)
+# Bare numbers not glued to letters, times (9:30) or dates (12/03)
+_BARE_AMOUNT = re.compile(rf"(?<![\w:/.,]){_NUMBER}(?![\w:/])")
+_WORD = re.compile(r"[a-z]+")
+
+# Gujlish/English aliases -> subcategory names in the default taxonomy.
+# Subcategory names from the live taxonomy are matched directly as well.
+KEYWORD_SUBCATEGORIES: Dict[str, str] = {
+    "padika": "Snacks", "padikaa": "Snacks", "nashto": "Snacks", "nasto": "Snacks",
+    "farsan": "Snacks", "farshan": "Snacks", "fafda": "Snacks", "gathiya": "Snacks",
+    "chai": "Snacks", "cha": "Snacks", "coffee": "Snacks", "samosa": "Snacks",
+    "vadapav": "Snacks", "pani puri": "Snacks", "panipuri": "Snacks", "icecream": "Snacks",
+    "breakfast": "Breakfast", "lunch": "Lunch", "bapor": "Lunch", "dinner": "Dinner", "jaman": "Dinner",
+    "zomato": "Delivery", "swiggy": "Delivery", "restaurant": "Restaurant",
+    "bus": "Bus", "rickshaw": "Taxi", "riksha": "Taxi", "auto": "Taxi", "uber": "Taxi",
+    "ola": "Taxi", "cab": "Taxi", "taxi": "Taxi", "train": "Train", "metro": "Train",
+    "petrol": "Fuel", "diesel": "Fuel", "cng": "Fuel", "parking": "Parking",
+    "movie": "Movies", "picture": "Movies", "film": "Movies", "netflix": "Streaming",
+    "light bill": "Electricity", "bijli": "Electricity", "electricity": "Electricity",
+    "wifi": "Internet", "recharge": "Phone", "cylinder": "Gas",
+    "doctor": "Doctor", "dava": "Medicine", "dawa": "Medicine", "medicine": "Medicine",
+    "tablet": "Medicine", "hospital": "Hospital",
+}
+
+# Filler words that carry no extraction signal but should not count as "unknown"
+_FILLER_WORDS: Set[str] = {
+    "ma", "mate", "na", "ni", "nu", "no", "ne", "ka", "ki", "ke", "ek", "for", "on", "in", "at",
+    "to", "of", "the", "a", "paid", "spent", "kharcho", "kharch", "lidhu", "lidha", "aapya",
+    "rs", "inr", "rupiya", "rupiyaa", "rupees", "rupee", "rupaye",
+}
+
+# Generic subcategory names that must not match on their own
+_GENERIC_SUBCATEGORIES: Set[str] = {"other", "others", "misc", "miscellaneous"}
+
+_index_cache: Dict[str, object] = {"key": None, "index": {}}
+_index_lock = threading.Lock()
+
+
+def _build_keyword_index(categories: List[CategoryModel]) -> Dict[str, Tuple[str, str]]:
+    """Map lowercase keywords to (category, subcategory) pairs present in the live taxonomy."""
+    by_subcategory: Dict[str, Tuple[str, str]] = {}
+    for cat in categories:
+        for sub in cat.subcategories:
+            if sub.name.lower() in _GENERIC_SUBCATEGORIES:
+                continue
+            by_subcategory.setdefault(sub.name.lower(), (cat.name, sub.name))
+
+    index: Dict[str, Tuple[str, str]] = dict(by_subcategory)
+    for keyword, sub_name in KEYWORD_SUBCATEGORIES.items():
+        target = by_subcategory.get(sub_name.lower())
+        if target:
+            index.setdefault(keyword, target)
+    return index
+
+
+def keyword_index(categories: List[CategoryModel], generation: Optional[int]) -> Dict[str, Tuple[str, str]]:
+    """Keyword -> (category, subcategory) index, cached per taxonomy generation."""
+    if generation is None:
+        return _build_keyword_index(categories)
+    with _index_lock:
+        if _index_cache["key"] != generation:
+            _index_cache["index"] = _build_keyword_index(categories)
+            _index_cache["key"] = generation
+        return _index_cache["index"]  # type: ignore[return-value]
+
+
+def _to_number(raw: str) -> float:
+    return float(raw.replace(",", ""))
+
+
+def find_amounts(text: str) -> Tuple[List[float], bool]:
+    """Return distinct candidate amounts and whether they carried a currency marker."""
+    marked = [_to_number(m.group("pre") or m.group("post")) for m in _CURRENCY_AMOUNT.finditer(text)]
+    if marked:
+        return list(dict.fromkeys(marked)), True
+    bare = [_to_number(m.group(0)) for m in _BARE_AMOUNT.finditer(text)]
+    return list(dict.fromkeys(bare)), False
+
+
+def has_amount(text: str) -> bool:
+    """Cheap check for anything that looks like an amount."""
+    return bool(find_amounts(text)[0])
+
+
+def extract_fast(
+    text: str,
+    categories: List[CategoryModel],
+    generation: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> Tuple[ExtractionResult, float]:
+    """Extract an expense locally. Returns `(result, confidence)` with confidence in [0, 1]."""
+    now = to_ist(now) if now is not None else datetime.now(tz=IST)
+    lowered = text.lower()
+    words = _WORD.findall(lowered)
+
+    # When: relative days, weekdays, explicit dates and times of day
+    when, date_words = resolve_datetime(text, now)
+    day_offset = (when.date() - now.date()).days
+
+    # Amount (bare numbers that belong to a date/time like "3 divas pehla" don't count)
+    amounts, marked = find_amounts(text)
+    if not marked and len(amounts) > 1:
+        date_numbers = {_to_number(w) for w in date_words if w.isdigit()}
+        amounts = [a for a in amounts if a not in date_numbers] or amounts
+    amount: Optional[float] = amounts[0] if len(amounts) == 1 else None
+    amount_score = (0.5 if marked else 0.35) if amount is not None else 0.0
+
+    # Category/subcategory via keywords (multi-word aliases match as phrases)
+    index = keyword_index(categories, generation)
+    matches: List[Tuple[str, str]] = []
+    recognized: Set[str] = set()
+    for keyword, target in index.items():
+        if " " in keyword:
+            if keyword in lowered:
+                matches.append(target)
+                recognized.update(keyword.split())
+        elif keyword in words:
+            matches.append(target)
+            recognized.add(keyword)
+    distinct = list(dict.fromkeys(matches))
+    category = subcategory = None
+    if distinct:
+        category, subcategory = distinct[0]
+    category_score = 0.4 if len(distinct) == 1 else (0.1 if distinct else 0.0)
+
+    recognized.update(w for w in date_words if w.isalpha())
+
+    known = sum(1 for w in words if w in recognized or w in _FILLER_WORDS)
+    coverage = known / len(words) if words else 1.0
+    confidence = round(amount_score + category_score + 0.1 * coverage, 3)
+
+    missing = [
+        name for name, value in (("amount", amount), ("category", category), ("subcategory", subcategory))
+        if value is None
+    ]
+    result = ExtractionResult(
+        valid=not missing,
+        amount=amount,
+        category=category,
+        subcategory=subcategory,
+        description=text,
+        datetime=to_utc(when),
+        missing_fields=missing,
+        provider=FAST_PATH_PROVIDER,
+        model=FAST_PATH_MODEL,
+        raw_response={
+            "fast_path": {
+                "confidence": confidence,
+                "amount_candidates": amounts,
+                "currency_marked": marked,
+                "matches": [list(m) for m in distinct],
+                "day_offset": day_offset,
+                "coverage": round(coverage, 3),
+            }
+        },
+    )
+    return result, confidence
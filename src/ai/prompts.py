@@ -1,28 +1,97 @@
 """
 Prompt templates for expense extraction.
+
+Each prompt comes in three variants: "llm" asks the model to resolve relative
+dates into a full ISO datetime against the current time, "local" asks only for
+the words that say when (a short date hint) and resolves them in
+`src.utils.datetime_utils.resolve_datetime`, and "compact" is "local" with
+one-letter keys, no description echo and no `valid` flag (see
+`COMPACT_KEYS`; the caller fills those in from the input).
 """
 
 from __future__ import annotations
 
+from typing import Dict
+
 from langchain_core.prompts import PromptTemplate
 
 
+DATE_MODES = ("local", "llm")
+PROMPT_VARIANTS = ("llm", "local", "compact")
+
+# Compact output key -> ExtractionResult field
+COMPACT_KEYS = {"a": "amount", "c": "category", "s": "subcategory", "d": "date", "m": "missing_fields",
+                "i": "index", "tr": "transcript"}
+
+_CATEGORIES = (
+    "Allowed categories and subcategories (choose only from these; pick the closest match):\n"
+    "{categories_block}\n\n"
+)
+
+# Shared instructions for single and batch extraction
+_PREAMBLE = (
+    "Current time (IST, ISO8601 with timezone): {now_iso}. Use this to resolve relative words like 'today/yesterday/tomorrow' and Gujarati words like 'aaje' (today) and 'kaale' (yesterday or tomorrow based on context). If ambiguous, assume 'kaale' means the most recent past unless the text clearly indicates future.\n\n"
+    + _CATEGORIES
+)
+
+_AMOUNT_PATTERNS = "numeric value only. Recognize 'rs', 'rupiya', 'rupees', '₹', and patterns like '20rs', '20 rs', '₹20', '20 rupiya', '20 na'.\n"
+_SNACK_RULE = "- Gujarati snack terms map to subcategory 'Snacks' under 'Food' when appropriate (e.g., 'padika/padikaa/padika', 'nashto', 'farsan/farshan', 'fafda', 'gathiya').\n"
+_DATE_HINT_WORDS = "copy the words that say when the expense happened, exactly as written (e.g. 'kaale', 'parmdivase', 'last monday', 'somvare', '12/03', 'sanje 7 vage'); null if the text doesn't say. Do not compute dates.\n"
+
+_AMOUNT_RULES = (
+    "Extraction rules:\n"
+    "- amount: " + _AMOUNT_PATTERNS
+    + _SNACK_RULE
+    + "- description: ORIGINAL TEXT EXACTLY AS WRITTEN (no translation).\n"
+)
+
+_DATETIME_RULE = "- datetime: Return ISO8601 string with timezone if present in text; if not specified, use current IST time. If text includes relative time, resolve using the provided current time.\n"
+
+_DATE_HINT_RULE = "- date: " + _DATE_HINT_WORDS
+
+_TAIL_RULES = (
+    "- category/subcategory: choose exactly one each from the allowed lists. If none fits, set null and add the field name to missing_fields.\n"
+    "- Only return JSON. No extra text, no code fences.\n\n"
+)
+
+_RULES = _AMOUNT_RULES + _DATETIME_RULE + _TAIL_RULES
+_HINT_RULES = _AMOUNT_RULES + _DATE_HINT_RULE + _TAIL_RULES
+
+_COMPACT_RULES = (
+    "Extraction rules (one-letter keys):\n"
+    "- a (amount): " + _AMOUNT_PATTERNS
+    + _SNACK_RULE
+    + "- d (date): " + _DATE_HINT_WORDS
+    + "- c/s (category/subcategory): choose exactly one each from the allowed lists. If none fits, set null.\n"
+    "- m: names of the fields you could not extract ('amount', 'category', 'subcategory'); [] when complete.\n"
+    "- Do not repeat the input text. Only return JSON. No extra text, no code fences.\n\n"
+)
+
+_ITEM_SCHEMA = "\"valid\": boolean, \"amount\": number|null, \"category\": string|null, \"subcategory\": string|null, \"description\": string, \"datetime\": string, \"missing_fields\": []"
+_HINT_ITEM_SCHEMA = "\"valid\": boolean, \"amount\": number|null, \"category\": string|null, \"subcategory\": string|null, \"description\": string, \"date\": string|null, \"missing_fields\": []"
+_COMPACT_ITEM_SCHEMA = "\"a\": number|null, \"c\": string|null, \"s\": string|null, \"d\": string|null, \"m\": []"
+
+_SINGLE_INTRO = "You are a careful information extractor. Extract expense info from Gujlish (Gujarati+English, incl. WhatsApp-style slang). Keep description exactly as written.\n\n"
+_BATCH_INTRO = "You are a careful information extractor. Each numbered line below is a separate expense written in Gujlish (Gujarati+English, incl. WhatsApp-style slang). Extract every line independently. Keep each description exactly as written.\n\n"
+_BATCH_OUTPUT = "Output: a JSON array with exactly one object per input line, in input order. Each object has the line number as \"index\" plus the single-expense fields:\n"
+_VOICE_INTRO = (
+    "You are a careful speech-to-text assistant and information extractor. The attached audio is a spoken expense in Gujlish (Gujarati+English mixed speech). "
+    "First transcribe it to plain text, preserving numerals and currency values, then extract the expense from your transcript.\n\n"
+)
+
+
+def _spoken(rules: str) -> str:
+    return rules.replace("ORIGINAL TEXT EXACTLY AS WRITTEN", "THE TRANSCRIPT EXACTLY AS SPOKEN")
+
+
 EXTRACTION_PROMPT = PromptTemplate(
     input_variables=["text", "now_iso", "categories_block"],
     template=(
-        "You are a careful information extractor. Extract expense info from Gujlish (Gujarati+English, incl. WhatsApp-style slang). Keep description exactly as written.\n\n"
-        "Current time (IST, ISO8601 with timezone): {now_iso}. Use this to resolve relative words like 'today/yesterday/tomorrow' and Gujarati words like 'aaje' (today) and 'kaale' (yesterday or tomorrow based on context). If ambiguous, assume 'kaale' means the most recent past unless the text clearly indicates future.\n\n"
-        "Allowed categories and subcategories (choose only from these; pick the closest match):\n"
-        "{categories_block}\n\n"
-        "Extraction rules:\n"
-        "- amount: numeric value only. Recognize 'rs', 'rupiya', 'rupees', '₹', and patterns like '20rs', '20 rs', '₹20', '20 rupiya', '20 na'.\n"
-        "- Gujarati snack terms map to subcategory 'Snacks' under 'Food' when appropriate (e.g., 'padika/padikaa/padika', 'nashto', 'farsan/farshan', 'fafda', 'gathiya').\n"
-        "- description: ORIGINAL TEXT EXACTLY AS WRITTEN (no translation).\n"
-        "- datetime: Return ISO8601 string with timezone if present in text; if not specified, use current IST time. If text includes relative time, resolve using the provided current time.\n"
-        "- category/subcategory: choose exactly one each from the allowed lists. If none fits, set null and add the field name to missing_fields.\n"
-        "- Only return JSON. No extra text, no code fences.\n\n"
-        "Output JSON schema:\n"
-        "{{\"valid\": boolean, \"amount\": number|null, \"category\": string|null, \"subcategory\": string|null, \"description\": string, \"datetime\": string, \"missing_fields\": []}}\n\n"
+        _SINGLE_INTRO
+        + _PREAMBLE
+        + _RULES
+        + "Output JSON schema:\n"
+        "{{" + _ITEM_SCHEMA + "}}\n\n"
         "Examples:\n"
         "Input: '20rs na padika' -> {{\"valid\": true, \"amount\": 20, \"category\": \"Food\", \"subcategory\": \"Snacks\", \"description\": \"20rs na padika\", \"datetime\": \"{now_iso}\", \"missing_fields\": []}}\n"
         "Input: 'kaale bus ma 15 rupiya' -> amount 15, category 'Transportation', subcategory 'Bus', datetime resolved to yesterday based on current time.\n\n"
@@ -30,3 +99,141 @@ EXTRACTION_PROMPT = PromptTemplate(
     ),
 )
 
+
+BATCH_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["items", "now_iso", "categories_block"],
+    template=(
+        _BATCH_INTRO
+        + _PREAMBLE
+        + _RULES
+        + _BATCH_OUTPUT
+        + "[{{\"index\": number, " + _ITEM_SCHEMA + "}}]\n\n"
+        "Example:\n"
+        "Lines:\n1. 20rs na padika\n2. kaale bus ma 15 rupiya\n"
+        "-> [{{\"index\": 1, \"valid\": true, \"amount\": 20, \"category\": \"Food\", \"subcategory\": \"Snacks\", \"description\": \"20rs na padika\", \"datetime\": \"{now_iso}\", \"missing_fields\": []}}, "
+        "{{\"index\": 2, \"valid\": true, \"amount\": 15, \"category\": \"Transportation\", \"subcategory\": \"Bus\", \"description\": \"kaale bus ma 15 rupiya\", \"datetime\": \"<yesterday, ISO8601>\", \"missing_fields\": []}}]\n\n"
+        "Lines:\n{items}"
+    ),
+)
+
+
+# Multimodal: the audio part is sent alongside this text, so there is no {text} input
+VOICE_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["now_iso", "categories_block"],
+    template=(
+        _VOICE_INTRO
+        + _PREAMBLE
+        + _spoken(_RULES)
+        + "Output JSON schema (the transcript plus the single-expense fields):\n"
+        "{{\"transcript\": string, " + _ITEM_SCHEMA + "}}\n\n"
+        "Example:\n"
+        "Audio saying 'vees rupiya na padika' -> {{\"transcript\": \"20 rupiya na padika\", \"valid\": true, \"amount\": 20, \"category\": \"Food\", \"subcategory\": \"Snacks\", \"description\": \"20 rupiya na padika\", \"datetime\": \"{now_iso}\", \"missing_fields\": []}}"
+    ),
+)
+
+
+# Date-hint variants: no current time in the prompt, dates resolved locally
+HINT_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["text", "categories_block"],
+    template=(
+        _SINGLE_INTRO
+        + _CATEGORIES
+        + _HINT_RULES
+        + "Output JSON schema:\n"
+        "{{" + _HINT_ITEM_SCHEMA + "}}\n\n"
+        "Examples:\n"
+        "Input: '20rs na padika' -> {{\"valid\": true, \"amount\": 20, \"category\": \"Food\", \"subcategory\": \"Snacks\", \"description\": \"20rs na padika\", \"date\": null, \"missing_fields\": []}}\n"
+        "Input: 'kaale bus ma 15 rupiya' -> {{\"valid\": true, \"amount\": 15, \"category\": \"Transportation\", \"subcategory\": \"Bus\", \"description\": \"kaale bus ma 15 rupiya\", \"date\": \"kaale\", \"missing_fields\": []}}\n\n"
+        "Input: {text}"
+    ),
+)
+
+
+HINT_BATCH_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["items", "categories_block"],
+    template=(
+        _BATCH_INTRO
+        + _CATEGORIES
+        + _HINT_RULES
+        + _BATCH_OUTPUT
+        + "[{{\"index\": number, " + _HINT_ITEM_SCHEMA + "}}]\n\n"
+        "Example:\n"
+        "Lines:\n1. 20rs na padika\n2. kaale bus ma 15 rupiya\n"
+        "-> [{{\"index\": 1, \"valid\": true, \"amount\": 20, \"category\": \"Food\", \"subcategory\": \"Snacks\", \"description\": \"20rs na padika\", \"date\": null, \"missing_fields\": []}}, "
+        "{{\"index\": 2, \"valid\": true, \"amount\": 15, \"category\": \"Transportation\", \"subcategory\": \"Bus\", \"description\": \"kaale bus ma 15 rupiya\", \"date\": \"kaale\", \"missing_fields\": []}}]\n\n"
+        "Lines:\n{items}"
+    ),
+)
+
+
+HINT_VOICE_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["categories_block"],
+    template=(
+        _VOICE_INTRO
+        + _CATEGORIES
+        + _spoken(_HINT_RULES)
+        + "Output JSON schema (the transcript plus the single-expense fields):\n"
+        "{{\"transcript\": string, " + _HINT_ITEM_SCHEMA + "}}\n\n"
+        "Example:\n"
+        "Audio saying 'kaale vees rupiya na padika' -> {{\"transcript\": \"kaale 20 rupiya na padika\", \"valid\": true, \"amount\": 20, \"category\": \"Food\", \"subcategory\": \"Snacks\", \"description\": \"kaale 20 rupiya na padika\", \"date\": \"kaale\", \"missing_fields\": []}}"
+    ),
+)
+
+
+# Compact variants: short keys, nothing the caller already knows (description, valid)
+COMPACT_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["text", "categories_block"],
+    template=(
+        _SINGLE_INTRO.replace(" Keep description exactly as written.", "")
+        + _CATEGORIES
+        + _COMPACT_RULES
+        + "Output JSON schema:\n"
+        "{{" + _COMPACT_ITEM_SCHEMA + "}}\n\n"
+        "Examples:\n"
+        "Input: '20rs na padika' -> {{\"a\": 20, \"c\": \"Food\", \"s\": \"Snacks\", \"d\": null, \"m\": []}}\n"
+        "Input: 'kaale bus ma 15 rupiya' -> {{\"a\": 15, \"c\": \"Transportation\", \"s\": \"Bus\", \"d\": \"kaale\", \"m\": []}}\n\n"
+        "Input: {text}"
+    ),
+)
+
+
+COMPACT_BATCH_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["items", "categories_block"],
+    template=(
+        _BATCH_INTRO.replace(" Keep each description exactly as written.", "")
+        + _CATEGORIES
+        + _COMPACT_RULES
+        + "Output: a JSON array with exactly one object per input line, in input order. Each object has the line number as \"i\" plus the single-expense keys:\n"
+        "[{{\"i\": number, " + _COMPACT_ITEM_SCHEMA + "}}]\n\n"
+        "Example:\n"
+        "Lines:\n1. 20rs na padika\n2. kaale bus ma 15 rupiya\n"
+        "-> [{{\"i\": 1, \"a\": 20, \"c\": \"Food\", \"s\": \"Snacks\", \"d\": null, \"m\": []}}, "
+        "{{\"i\": 2, \"a\": 15, \"c\": \"Transportation\", \"s\": \"Bus\", \"d\": \"kaale\", \"m\": []}}]\n\n"
+        "Lines:\n{items}"
+    ),
+)
+
+
+COMPACT_VOICE_EXTRACTION_PROMPT = PromptTemplate(
+    input_variables=["categories_block"],
+    template=(
+        _VOICE_INTRO
+        + _CATEGORIES
+        + _COMPACT_RULES.replace("Do not repeat the input text.", "Put the transcript in tr.")
+        + "Output JSON schema (tr is the transcript):\n"
+        "{{\"tr\": string, " + _COMPACT_ITEM_SCHEMA + "}}\n\n"
+        "Example:\n"
+        "Audio saying 'kaale vees rupiya na padika' -> {{\"tr\": \"kaale 20 rupiya na padika\", \"a\": 20, \"c\": \"Food\", \"s\": \"Snacks\", \"d\": \"kaale\", \"m\": []}}"
+    ),
+)
+
+
+EXTRACTION_PROMPTS: Dict[str, PromptTemplate] = {
+    "llm": EXTRACTION_PROMPT, "local": HINT_EXTRACTION_PROMPT, "compact": COMPACT_EXTRACTION_PROMPT,
+}
+BATCH_EXTRACTION_PROMPTS: Dict[str, PromptTemplate] = {
+    "llm": BATCH_EXTRACTION_PROMPT, "local": HINT_BATCH_EXTRACTION_PROMPT, "compact": COMPACT_BATCH_EXTRACTION_PROMPT,
+}
+VOICE_EXTRACTION_PROMPTS: Dict[str, PromptTemplate] = {
+    "llm": VOICE_EXTRACTION_PROMPT, "local": HINT_VOICE_EXTRACTION_PROMPT, "compact": COMPACT_VOICE_EXTRACTION_PROMPT,
+}
@@ -4,8 +4,15 @@ Providers: OpenAI and Gemini client factories using LangChain with LangSmith tra
 
 from __future__ import annotations
 
+import asyncio
+import builtins
+import hashlib
 import os
-from typing import Literal, Dict, List, Optional
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Literal, Dict, List, Optional, Tuple
 
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -16,7 +23,10 @@ try:
 except Exception:  # pragma: no cover
     genai = None  # type: ignore
 
+from src.ai.cassette import cassette_mode, cassette_transcribe, wrap_llm
 from src.config.settings import settings
+from src.utils.cache import LRUCache
+from src.utils.exceptions import ProviderUnavailableError
 
 
 def _setup_langsmith():
@@ -37,31 +47,86 @@ def _setup_langsmith():
 
 ProviderName = Literal["openai", "gemini"]
 
+# Test/benchmark hooks: provider -> factory(model) returning a chat model (see benchmarks/fakes.py)
+_LLM_OVERRIDES: Dict[str, Callable[[str], Any]] = {}
+
+
+def set_llm_override(provider: ProviderName, factory: Optional[Callable[[str], Any]]) -> None:
+    """Make `get_llm(provider, ...)` return `factory(model)` instead of a real client (None removes it)."""
+    if factory is None:
+        _LLM_OVERRIDES.pop(provider, None)
+    else:
+        _LLM_OVERRIDES[provider] = factory
+
+
+def _has_credentials(provider: str) -> bool:
+    if provider in _LLM_OVERRIDES:
+        return True
+    return bool(settings.openai_api_key if provider == "openai" else settings.google_api_key)
+
+
+def provider_deadline_seconds(provider: ProviderName) -> float:
+    return settings.openai_timeout_seconds if provider == "openai" else settings.gemini_timeout_seconds
+
+
+def settings_fingerprint(provider: ProviderName) -> str:
+    """Short hash of the settings a built client depends on (API key, tracing config).
+
+    Used as part of cache keys so cached clients/chains are invalidated when keys
+    or tracing settings change.
+    """
+    key = settings.openai_api_key if provider == "openai" else settings.google_api_key
+    material = "|".join(str(v) for v in (
+        provider,
+        key,
+        settings.langsmith_api_key,
+        settings.langsmith_project,
+        settings.langsmith_endpoint,
+        settings.langsmith_tracing,
+        provider_deadline_seconds(provider),
+        id(_LLM_OVERRIDES.get(provider)),
+        settings.cassette_mode,
+        settings.cassette_path,
+    ))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
 
 def get_llm(provider: ProviderName, model: str):
     # Setup LangSmith tracing if configured
     langsmith_enabled = _setup_langsmith()
 
+    # Replay never touches the network (or needs API keys)
+    if cassette_mode() == "replay":
+        return wrap_llm(None, provider, model)
+
+    override = _LLM_OVERRIDES.get(provider)
+    if override is not None:
+        return wrap_llm(override(model), provider, model)
+
+    # Retries are handled by `call_with_retries`; the client only enforces the deadline
+    timeout = provider_deadline_seconds(provider)
     if provider == "openai":
         if not settings.openai_api_key:
             raise RuntimeError("OPENAI_API_KEY not configured.")
         # Fallback to first supported model if provided model is not in allowed list
         chosen_model = model if model in settings.openai_models else (settings.openai_models[0] if settings.openai_models else model)
-        llm = ChatOpenAI(api_key=settings.openai_api_key, model=chosen_model, temperature=0)
+        llm = ChatOpenAI(api_key=settings.openai_api_key, model=chosen_model, temperature=0,
+                         timeout=timeout, max_retries=0)
         if langsmith_enabled:
             # Enable tracing for this specific instance
             llm.callbacks = []  # LangSmith will automatically attach callbacks
-        return llm
+        return wrap_llm(llm, provider, model)
 
     if provider == "gemini":
         if not settings.google_api_key:
             raise RuntimeError("GOOGLE_API_KEY not configured.")
         chosen_model = model if model in settings.gemini_models else (settings.gemini_models[0] if settings.gemini_models else model)
-        llm = ChatGoogleGenerativeAI(google_api_key=settings.google_api_key, model=chosen_model, temperature=0)
+        llm = ChatGoogleGenerativeAI(google_api_key=settings.google_api_key, model=chosen_model, temperature=0,
+                                     timeout=timeout, max_retries=0)
         if langsmith_enabled:
             # Enable tracing for this specific instance
             llm.callbacks = []  # LangSmith will automatically attach callbacks
-        return llm
+        return wrap_llm(llm, provider, model)
 
     raise ValueError(f"Unsupported provider: {provider}")
 
@@ -74,42 +139,328 @@ def get_available_providers() -> Dict[str, List[str]]:
     }
 
 
-def transcribe_with_gemini(audio_bytes: bytes,
-                           mime_type: str,
-                           model: Optional[str] = None,
-                           prompt: Optional[str] = None) -> str:
-    """Transcribe speech audio using Gemini. Optimized for low-cost STT and "Gujlish".
+def get_alternate_target(provider: ProviderName, model: str) -> Optional[Tuple[ProviderName, str]]:
+    """Return the configured alternate (provider, model) used for hedging/failover.
 
-    Args:
-        audio_bytes: Raw audio bytes from st.audio_input()
-        mime_type: e.g., "audio/wav", "audio/webm"
-        model: Gemini model to use; defaults to a cost-effective STT-capable model
-        prompt: Optional system prompt for transcription behavior
+    Defaults to the other provider's first configured model. Returns None when
+    the alternate has no API key or would be the same target.
+    """
+    alt_provider = settings.alternate_provider or ("gemini" if provider == "openai" else "openai")
+    if alt_provider not in ("openai", "gemini"):
+        return None
+    if not _has_credentials(alt_provider):
+        return None
+    models = settings.openai_models if alt_provider == "openai" else settings.gemini_models
+    alt_model = settings.alternate_model or (models[0] if models else None)
+    if not alt_model or (alt_provider, alt_model) == (provider, model):
+        return None
+    return alt_provider, alt_model  # type: ignore[return-value]
 
-    Returns:
-        Transcript string.
+
+def get_cascade_targets(provider: ProviderName, model: str) -> List[Tuple[ProviderName, str]]:
+    """Cascade tiers, cheapest first: `settings.cascade_models` entries whose provider
+    has an API key, then the selected (provider, model) as the strongest tier.
+    """
+    tiers: List[Tuple[ProviderName, str]] = []
+    for spec in settings.cascade_models:
+        tier_provider, _, tier_model = spec.strip().partition(":")
+        if tier_provider not in ("openai", "gemini") or not tier_model or not _has_credentials(tier_provider):
+            continue
+        target = (tier_provider, tier_model.strip())
+        if target not in tiers and target != (provider, model):
+            tiers.append(target)  # type: ignore[arg-type]
+    tiers.append((provider, model))
+    return tiers
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open probe -> closed)."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = float(reset_seconds)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._trips = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (no probe slot available)."""
+        with self._lock:
+            state = self._state()
+            return state == "open" or (state == "half_open" and self._probing)
+
+    def allow(self) -> bool:
+        """Whether a call may proceed; in half-open state only one probe is let through."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Free the half-open probe slot without changing the state (the probe proved nothing)."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    self._trips += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self._state(), "consecutive_failures": self._failures, "trips": self._trips}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: ProviderName) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_seconds)
+        return breaker
+
+
+def get_resilience_stats() -> Dict[str, dict]:
+    """Circuit breaker state per provider for debug panels."""
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return {provider: breaker.stats() for provider, breaker in items}
+
+
+_RETRYABLE_STATUS = {408, 409, 425, 429}
+_RETRYABLE_NAMES = ("Timeout", "RateLimit", "Connection", "ServiceUnavailable", "ResourceExhausted",
+                    "DeadlineExceeded", "InternalServerError", "ServerError", "Unavailable")
+# "Please retry in 37.1s" / "retry_delay { seconds: 37 }" (Gemini), "try again in 820ms" (OpenAI)
+_RETRY_IN = re.compile(r"(?:retry(?:_delay)?|try again in)\D{0,20}?(\d+(?:\.\d+)?)\s*(ms)?", re.IGNORECASE)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int):
+                return int(value)
+    return None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Timeouts, connection errors, rate limits and 5xx responses are worth retrying."""
+    if isinstance(error, (builtins.TimeoutError, asyncio.TimeoutError, builtins.ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None and (status in _RETRYABLE_STATUS or status >= 500):
+        return True
+    return any(name in type(error).__name__ for name in _RETRYABLE_NAMES)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-requested wait from Retry-After(-ms) headers or the error message, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None and hasattr(headers, "get"):
+        for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            value = headers.get(name)
+            if value:
+                try:
+                    return float(value) * scale
+                except ValueError:
+                    pass  # HTTP-date form: fall through to backoff
+    match = _RETRY_IN.search(str(error))
+    if not match:
+        return None
+    return float(match.group(1)) * (0.001 if match.group(2) else 1.0)
+
+
+def retry_delay_seconds(attempt: int, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a server-requested Retry-After."""
+    cap = settings.retry_max_delay_ms / 1000.0
+    delay = random.uniform(0, min(cap, settings.retry_base_delay_ms / 1000.0 * (2 ** attempt)))
+    requested = retry_after_seconds(error) if error is not None else None
+    return max(delay, requested) if requested is not None else delay
+
+
+def _give_up(provider: ProviderName, error: BaseException, attempt: int, deadline: float, delay: float) -> bool:
+    """Update the breaker for a failed attempt and decide whether to stop retrying."""
+    breaker = get_circuit_breaker(provider)
+    if not is_retryable_error(error):
+        # The request itself was bad: says nothing about provider health, so leave
+        # the breaker as it is (a half-open probe just gives its slot back)
+        breaker.release_probe()
+        return True
+    breaker.record_failure()
+    return (
+        attempt >= settings.provider_max_retries
+        or time.monotonic() + delay >= deadline
+        or breaker.is_open()
+    )
+
+
+def call_with_retries(provider: ProviderName, fn: Callable[[], Any], info: Optional[dict] = None) -> Any:
+    """Run a provider call with the circuit breaker, jittered retries and an overall deadline.
+
+    Raises ProviderUnavailableError when the provider's circuit is open. `info`
+    (if given) receives the attempt count and the errors that were retried.
     """
+    breaker = get_circuit_breaker(provider)
+    if not breaker.allow():
+        raise ProviderUnavailableError(provider, breaker.retry_in())
+    info = info if info is not None else {}
+    info.setdefault("attempts", 0)
+    info.setdefault("errors", [])
+    deadline = time.monotonic() + provider_deadline_seconds(provider)
+    attempt = 0
+    while True:
+        info["attempts"] += 1
+        try:
+            result = fn()
+        except Exception as e:
+            delay = retry_delay_seconds(attempt, e)
+            info["errors"].append(f"{type(e).__name__}: {e}"[:300])
+            if _give_up(provider, e, attempt, deadline, delay):
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result
+
+
+async def acall_with_retries(provider: ProviderName, fn: Callable[[], Awaitable[Any]], info: Optional[dict] = None) -> Any:
+    """Async `call_with_retries`; each attempt is also cut off at the remaining deadline."""
+    breaker = get_circuit_breaker(provider)
+    if not breaker.allow():
+        raise ProviderUnavailableError(provider, breaker.retry_in())
+    info = info if info is not None else {}
+    info.setdefault("attempts", 0)
+    info.setdefault("errors", [])
+    deadline = time.monotonic() + provider_deadline_seconds(provider)
+    attempt = 0
+    while True:
+        info["attempts"] += 1
+        try:
+            result = await asyncio.wait_for(fn(), timeout=max(0.001, deadline - time.monotonic()))
+        except Exception as e:
+            delay = retry_delay_seconds(attempt, e)
+            info["errors"].append(f"{type(e).__name__}: {e}"[:300])
+            if _give_up(provider, e, attempt, deadline, delay):
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result
+
+
+def failover_target(provider: ProviderName, model: str, error: BaseException) -> Optional[Tuple[ProviderName, str]]:
+    """Alternate target to retry on after `error`, or None if failover does not apply."""
+    if not settings.failover_enabled:
+        return None
+    if not isinstance(error, ProviderUnavailableError) and not is_retryable_error(error):
+        return None
+    target = get_alternate_target(provider, model)
+    if target is None or get_circuit_breaker(target[0]).is_open():
+        return None
+    return target
+
+
+_DEFAULT_STT_PROMPT = (
+    "You are a speech-to-text assistant. Transcribe the following audio to plain text. "
+    "Preserve numerals and currency values. Support Gujarati-English mixed speech (Gujlish). "
+    "Return only the transcription without any extra commentary."
+)
+
+
+# Configured GenerativeModel per (model, credentials) and transcripts by audio content hash
+_STT_MODELS: LRUCache[Any] = LRUCache(maxsize=settings.stt_model_cache_size)
+_TRANSCRIPT_CACHE: LRUCache[str] = LRUCache(
+    maxsize=settings.transcript_cache_size, ttl_seconds=settings.transcript_cache_ttl_seconds
+)
+_genai_lock = threading.Lock()
+_genai_configured_key: Optional[str] = None
+
+
+def _get_stt_model(chosen_model: str) -> Any:
+    """Return a warm `GenerativeModel`, configuring the SDK only when the API key changes."""
+
+    def build() -> Any:
+        global _genai_configured_key
+        with _genai_lock:
+            if _genai_configured_key != settings.google_api_key:
+                genai.configure(api_key=settings.google_api_key)
+                _genai_configured_key = settings.google_api_key
+        return genai.GenerativeModel(chosen_model)
+
+    gmodel, _ = _STT_MODELS.get_or_create((chosen_model, settings_fingerprint("gemini")), build)
+    return gmodel
+
+
+def _transcript_cache_key(audio_bytes: bytes, mime_type: str, chosen_model: str, stt_prompt: str) -> str:
+    material = "\x1f".join((hashlib.sha256(audio_bytes).hexdigest(), mime_type, chosen_model, stt_prompt))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def get_transcription_cache_stats() -> Dict[str, dict]:
+    return {"transcripts": _TRANSCRIPT_CACHE.stats(), "models": _STT_MODELS.stats()}
+
+
+def clear_transcription_cache() -> None:
+    _TRANSCRIPT_CACHE.clear()
+    _STT_MODELS.clear()
+
+
+def _transcribe_live(audio_bytes: bytes, mime_type: str, chosen_model: str, stt_prompt: str) -> str:
     if genai is None:
         raise RuntimeError("google-generativeai SDK not available. Please install/configure.")
     if not settings.google_api_key:
         raise RuntimeError("GOOGLE_API_KEY not configured.")
 
-    genai.configure(api_key=settings.google_api_key)
-    chosen_model = model or "gemini-1.5-flash"
-    stt_prompt = prompt or (
-        "You are a speech-to-text assistant. Transcribe the following audio to plain text. "
-        "Preserve numerals and currency values. Support Gujarati-English mixed speech (Gujlish). "
-        "Return only the transcription without any extra commentary."
-    )
-
-    gmodel = genai.GenerativeModel(chosen_model)
+    gmodel = _get_stt_model(chosen_model)
 
     # The SDK accepts audio parts as dicts with mime_type and raw bytes
     parts = [
         {"mime_type": mime_type, "data": audio_bytes},
         stt_prompt,
     ]
-    resp = gmodel.generate_content(parts)
+    resp = call_with_retries(
+        "gemini",
+        lambda: gmodel.generate_content(parts, request_options={"timeout": provider_deadline_seconds("gemini")}),
+    )
     # Handle response variations
     text = getattr(resp, "text", None)
     if text:
@@ -125,3 +476,39 @@ def transcribe_with_gemini(audio_bytes: bytes,
                         return t.strip()
     return ""
 
+
+def generate_from_audio(audio_bytes: bytes, mime_type: str, model: str, prompt: str) -> str:
+    """Send audio plus a text prompt to a multimodal Gemini model and return the text reply (uncached)."""
+    return cassette_transcribe(
+        "gemini", model, audio_bytes, mime_type, prompt,
+        lambda: _transcribe_live(audio_bytes, mime_type, model, prompt),
+    )
+
+
+def transcribe_with_gemini(audio_bytes: bytes,
+                           mime_type: str,
+                           model: Optional[str] = None,
+                           prompt: Optional[str] = None) -> str:
+    """Transcribe speech audio using Gemini. Optimized for low-cost STT and "Gujlish".
+
+    Args:
+        audio_bytes: Raw audio bytes from st.audio_input()
+        mime_type: e.g., "audio/wav", "audio/webm"
+        model: Gemini model to use; defaults to a cost-effective STT-capable model
+        prompt: Optional system prompt for transcription behavior
+
+    Returns:
+        Transcript string.
+    """
+    chosen_model = model or "gemini-1.5-flash"
+    stt_prompt = prompt or _DEFAULT_STT_PROMPT
+    # Pressing "Transcribe" again on the same recording shouldn't cost another call
+    cache_key = _transcript_cache_key(audio_bytes, mime_type, chosen_model, stt_prompt)
+    if settings.transcript_cache_enabled:
+        cached = _TRANSCRIPT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+    text = generate_from_audio(audio_bytes, mime_type, chosen_model, stt_prompt)
+    if settings.transcript_cache_enabled and text:
+        _TRANSCRIPT_CACHE.set(cache_key, text)
+    return text
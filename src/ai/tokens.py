@@ -0,0 +1,34 @@
+"""
+Token counting helpers for prompt-size metrics.
+Uses tiktoken when installed, otherwise a character-based estimate.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+try:
+    import tiktoken  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    tiktoken = None  # type: ignore
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # pragma: no cover - encoding files unavailable offline
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text` (exact for OpenAI cl100k models when tiktoken is available)."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # ~4 characters per token for English/Gujlish Latin text
+    return max(1, (len(text) + 3) // 4)
@@ -23,6 +23,17 @@ class AppSettings(BaseModel):
     openai_api_key: Optional[str] = Field(default=None)
     google_api_key: Optional[str] = Field(default=None)
     mongodb_uri: Optional[str] = Field(default=None)
+    # MongoClient pool, timeouts (ms, 0 = driver default), wire compression and retryable operations
+    mongo_max_pool_size: int = Field(default=50)
+    mongo_min_pool_size: int = Field(default=0)
+    mongo_max_idle_time_ms: int = Field(default=60000)
+    mongo_wait_queue_timeout_ms: int = Field(default=5000)
+    mongo_server_selection_timeout_ms: int = Field(default=5000)
+    mongo_connect_timeout_ms: int = Field(default=5000)
+    mongo_socket_timeout_ms: int = Field(default=20000)
+    mongo_compressors: List[str] = Field(default_factory=lambda: ["zstd", "snappy", "zlib"])
+    mongo_retry_reads: bool = Field(default=True)
+    mongo_retry_writes: bool = Field(default=True)
     langsmith_api_key: Optional[str] = Field(default=None)
     langsmith_endpoint: Optional[str] = Field(default=None)
     langsmith_project: Optional[str] = Field(default=None)
@@ -31,6 +42,100 @@ class AppSettings(BaseModel):
     default_ai_provider: str = Field(default="openai")
     default_ai_model: str = Field(default="gpt-5-mini")
 
+    # Shared LLM chain registry (LRU size)
+    chain_cache_size: int = Field(default=8)
+    # Safety TTL for the cached prompt categories block (edits from other instances)
+    categories_cache_ttl_seconds: float = Field(default=300.0)
+
+    # Alternate provider/model for hedging and failover (defaults to the other provider)
+    alternate_provider: Optional[str] = Field(default=None)
+    alternate_model: Optional[str] = Field(default=None)
+
+    # Hedged requests: race the alternate if the primary is slow
+    hedge_enabled: bool = Field(default=False)
+    hedge_delay_ms: float = Field(default=2000.0)
+    # Use this latency percentile of the primary model as the delay once enough samples exist (0 = fixed delay)
+    hedge_delay_percentile: float = Field(default=95.0)
+    hedge_min_samples: int = Field(default=20)
+
+    # Cheap-first cascade: try these "provider:model" tiers in order, escalating when an answer
+    # fails local validation; the selected model is always the last (strongest) tier
+    cascade_enabled: bool = Field(default=False)
+    cascade_models: List[str] = Field(default_factory=lambda: ["gemini:gemini-1.5-flash", "openai:gpt-4o-mini"])
+
+    # Provider resilience: per-call deadline, jittered retries and circuit breaker
+    openai_timeout_seconds: float = Field(default=30.0)
+    gemini_timeout_seconds: float = Field(default=30.0)
+    provider_max_retries: int = Field(default=2)
+    retry_base_delay_ms: float = Field(default=250.0)
+    retry_max_delay_ms: float = Field(default=4000.0)
+    circuit_failure_threshold: int = Field(default=5)
+    circuit_reset_seconds: float = Field(default=30.0)
+    # Route to the alternate provider when the primary fails or its circuit is open
+    failover_enabled: bool = Field(default=True)
+
+    # Max in-flight provider calls per event loop for async extraction
+    max_concurrent_extractions: int = Field(default=8)
+
+    # Operations per bulk_write round trip for bulk expense/log writes
+    bulk_write_chunk_size: int = Field(default=1000)
+    # Documents per cursor batch (getMore round trip) and per written chunk for exports
+    export_batch_size: int = Field(default=2000)
+
+    # Streaming file import: rows per chunk (checkpoint granularity), lines per batched
+    # LLM call, concurrent LLM calls and where resume checkpoints are kept
+    import_chunk_size: int = Field(default=500)
+    import_llm_batch_size: int = Field(default=20)
+    import_max_concurrency: int = Field(default=4)
+    import_checkpoint_dir: str = Field(default=".import_checkpoints")
+
+    # Exact-match extraction result cache
+    result_cache_enabled: bool = Field(default=True)
+    result_cache_size: int = Field(default=512)
+    result_cache_ttl_seconds: float = Field(default=6 * 3600.0)
+
+    # Relevance-pruned categories block (send only likely categories)
+    category_pruning_enabled: bool = Field(default=True)
+    category_prune_top_k: int = Field(default=3)
+    category_prune_min_score: float = Field(default=0.7)
+
+    # "local": model returns a short date hint resolved by datetime_utils; "llm": model returns the ISO datetime
+    date_resolution_mode: str = Field(default="local")
+    # With "local" dates: one-letter output keys, no description echo (filled in from the input)
+    compact_output_enabled: bool = Field(default=True)
+
+    # Local Gujlish fast path (skips the LLM for simple inputs)
+    fast_path_enabled: bool = Field(default=True)
+    fast_path_min_confidence: float = Field(default=0.85)
+
+    # Provider-native structured output (JSON schema / tool calling) instead of free-text JSON
+    structured_output_enabled: bool = Field(default=True)
+    # Models that should always use the text path (unsupported ones are also detected at runtime)
+    structured_output_unsupported_models: List[str] = Field(default_factory=list)
+
+    # Voice preprocessing before transcription (mono, resample, silence trim)
+    audio_preprocess_enabled: bool = Field(default=True)
+    audio_target_sample_rate: int = Field(default=16000)
+    audio_silence_threshold_db: float = Field(default=-45.0)
+    audio_silence_padding_ms: float = Field(default=200.0)
+
+    # Transcript cache (audio content hash + model + prompt) and warm Gemini models
+    transcript_cache_enabled: bool = Field(default=True)
+    transcript_cache_size: int = Field(default=128)
+    transcript_cache_ttl_seconds: float = Field(default=3600.0)
+    stt_model_cache_size: int = Field(default=4)
+    # One multimodal call for voice entry (transcript + extraction) instead of two
+    voice_single_call_enabled: bool = Field(default=True)
+    voice_extraction_model: str = Field(default="gemini-1.5-flash")
+
+    # Record/replay cassette for LLM and transcription calls: "off", "record" or "replay"
+    cassette_mode: str = Field(default="off")
+    cassette_path: str = Field(default=".cassettes/llm.jsonl.gz")
+    # Sleep for the recorded latency when replaying
+    cassette_replay_latency: bool = Field(default=False)
+    # "exact" matches the whole prompt; "input" falls back to the user input only (survives prompt edits)
+    cassette_match: str = Field(default="exact")
+
     # Configurable model lists
     openai_models: List[str] = Field(default_factory=lambda: ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o", "gpt-4o-mini", "gpt-5-mini"])
     gemini_models: List[str] = Field(default_factory=lambda: ["gemini-pro", "gemini-pro-vision", "gemini-1.5-flash", "gemini-1.5-pro"])
@@ -140,6 +245,32 @@ class AppSettings(BaseModel):
             return False
         return default
 
+    @classmethod
+    def _read_number_variants(cls, names: Sequence[str], nested_paths: Sequence[Sequence[str]] | None = None, default: Any = None, cast: Any = int) -> Any:
+        """Read a numeric value (TOML number or numeric string) and cast it, falling back to default."""
+        nested_paths = nested_paths or []
+        for p in nested_paths:
+            val = cls._get_from_secrets(p)
+            if isinstance(val, (int, float)) and not isinstance(val, bool):
+                return cast(val)
+        if st is not None:
+            try:
+                for n in names:
+                    for key in (n.lower(), n):
+                        if key in st.secrets:  # type: ignore[operator]
+                            v = st.secrets[key]  # type: ignore[index]
+                            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                                return cast(v)
+            except Exception as e:  # pragma: no cover
+                print(f"Error accessing st.secrets number for names {names}: {e}")
+        val = cls._read_secret_variants(names, nested_paths)
+        if val is None:
+            return default
+        try:
+            return cast(val)
+        except (TypeError, ValueError):
+            return default
+
     @staticmethod
     def _read_secret_list(name: str) -> Optional[List[str]]:
         # Prefer Streamlit secrets if available
@@ -177,6 +308,56 @@ class AppSettings(BaseModel):
                 ["MONGODB_URI", "mongodb_uri"],
                 [("MONGODB", "URI"), ("mongodb", "uri"), ("DATABASE", "URI"), ("database", "uri")],
             ),
+            mongo_max_pool_size=cls._read_number_variants(
+                ["MONGO_MAX_POOL_SIZE", "mongo_max_pool_size"],
+                [("MONGODB", "MAX_POOL_SIZE"), ("mongodb", "max_pool_size")],
+                default=50,
+            ),
+            mongo_min_pool_size=cls._read_number_variants(
+                ["MONGO_MIN_POOL_SIZE", "mongo_min_pool_size"],
+                [("MONGODB", "MIN_POOL_SIZE"), ("mongodb", "min_pool_size")],
+                default=0,
+            ),
+            mongo_max_idle_time_ms=cls._read_number_variants(
+                ["MONGO_MAX_IDLE_TIME_MS", "mongo_max_idle_time_ms"],
+                [("MONGODB", "MAX_IDLE_TIME_MS"), ("mongodb", "max_idle_time_ms")],
+                default=60000,
+            ),
+            mongo_wait_queue_timeout_ms=cls._read_number_variants(
+                ["MONGO_WAIT_QUEUE_TIMEOUT_MS", "mongo_wait_queue_timeout_ms"],
+                [("MONGODB", "WAIT_QUEUE_TIMEOUT_MS"), ("mongodb", "wait_queue_timeout_ms")],
+                default=5000,
+            ),
+            mongo_server_selection_timeout_ms=cls._read_number_variants(
+                ["MONGO_SERVER_SELECTION_TIMEOUT_MS", "mongo_server_selection_timeout_ms"],
+                [("MONGODB", "SERVER_SELECTION_TIMEOUT_MS"), ("mongodb", "server_selection_timeout_ms")],
+                default=5000,
+            ),
+            mongo_connect_timeout_ms=cls._read_number_variants(
+                ["MONGO_CONNECT_TIMEOUT_MS", "mongo_connect_timeout_ms"],
+                [("MONGODB", "CONNECT_TIMEOUT_MS"), ("mongodb", "connect_timeout_ms")],
+                default=5000,
+            ),
+            mongo_socket_timeout_ms=cls._read_number_variants(
+                ["MONGO_SOCKET_TIMEOUT_MS", "mongo_socket_timeout_ms"],
+                [("MONGODB", "SOCKET_TIMEOUT_MS"), ("mongodb", "socket_timeout_ms")],
+                default=20000,
+            ),
+            mongo_compressors=cls._read_secret_list_variants(
+                ["MONGO_COMPRESSORS", "mongo_compressors"],
+                [("MONGODB", "COMPRESSORS"), ("mongodb", "compressors")],
+            )
+            or ["zstd", "snappy", "zlib"],
+            mongo_retry_reads=cls._read_bool_variants(
+                ["MONGO_RETRY_READS", "mongo_retry_reads"],
+                [("MONGODB", "RETRY_READS"), ("mongodb", "retry_reads")],
+                default=True,
+            ),
+            mongo_retry_writes=cls._read_bool_variants(
+                ["MONGO_RETRY_WRITES", "mongo_retry_writes"],
+                [("MONGODB", "RETRY_WRITES"), ("mongodb", "retry_writes")],
+                default=True,
+            ),
             langsmith_api_key=cls._read_secret_variants(
                 ["LANGSMITH_API_KEY", "LANGCHAIN_API_KEY", "langsmith_api_key"],
                 [("LANGSMITH", "API_KEY"), ("langsmith", "api_key"), ("LANGCHAIN", "API_KEY"), ("langchain", "api_key")],
@@ -204,6 +385,271 @@ class AppSettings(BaseModel):
                 [("LLM", "MODEL"), ("llm", "model")],
             )
             or "gpt-5-mini",
+            chain_cache_size=cls._read_number_variants(
+                ["CHAIN_CACHE_SIZE", "chain_cache_size"],
+                [("LLM", "CHAIN_CACHE_SIZE"), ("llm", "chain_cache_size")],
+                default=8,
+            ),
+            categories_cache_ttl_seconds=cls._read_number_variants(
+                ["CATEGORIES_CACHE_TTL_SECONDS", "categories_cache_ttl_seconds"],
+                [("LLM", "CATEGORIES_CACHE_TTL_SECONDS"), ("llm", "categories_cache_ttl_seconds")],
+                default=300.0,
+                cast=float,
+            ),
+            alternate_provider=cls._read_secret_variants(
+                ["ALTERNATE_AI_PROVIDER", "alternate_provider"],
+                [("LLM", "ALTERNATE_PROVIDER"), ("llm", "alternate_provider")],
+            ),
+            alternate_model=cls._read_secret_variants(
+                ["ALTERNATE_AI_MODEL", "alternate_model"],
+                [("LLM", "ALTERNATE_MODEL"), ("llm", "alternate_model")],
+            ),
+            hedge_enabled=cls._read_bool_variants(
+                ["HEDGE_ENABLED", "hedge_enabled"],
+                [("LLM", "HEDGE_ENABLED"), ("llm", "hedge_enabled")],
+                default=False,
+            ),
+            hedge_delay_ms=cls._read_number_variants(
+                ["HEDGE_DELAY_MS", "hedge_delay_ms"],
+                [("LLM", "HEDGE_DELAY_MS"), ("llm", "hedge_delay_ms")],
+                default=2000.0,
+                cast=float,
+            ),
+            hedge_delay_percentile=cls._read_number_variants(
+                ["HEDGE_DELAY_PERCENTILE", "hedge_delay_percentile"],
+                [("LLM", "HEDGE_DELAY_PERCENTILE"), ("llm", "hedge_delay_percentile")],
+                default=95.0,
+                cast=float,
+            ),
+            hedge_min_samples=cls._read_number_variants(
+                ["HEDGE_MIN_SAMPLES", "hedge_min_samples"],
+                [("LLM", "HEDGE_MIN_SAMPLES"), ("llm", "hedge_min_samples")],
+                default=20,
+            ),
+            cascade_enabled=cls._read_bool_variants(
+                ["CASCADE_ENABLED", "cascade_enabled"],
+                [("LLM", "CASCADE_ENABLED"), ("llm", "cascade_enabled")],
+                default=False,
+            ),
+            cascade_models=cls._read_secret_list_variants(
+                ["CASCADE_MODELS", "cascade_models"],
+                [("LLM", "CASCADE_MODELS"), ("llm", "cascade_models")],
+            )
+            or ["gemini:gemini-1.5-flash", "openai:gpt-4o-mini"],
+            openai_timeout_seconds=cls._read_number_variants(
+                ["OPENAI_TIMEOUT_SECONDS", "openai_timeout_seconds"],
+                [("LLM", "OPENAI_TIMEOUT_SECONDS"), ("llm", "openai_timeout_seconds")],
+                default=30.0,
+                cast=float,
+            ),
+            gemini_timeout_seconds=cls._read_number_variants(
+                ["GEMINI_TIMEOUT_SECONDS", "gemini_timeout_seconds"],
+                [("LLM", "GEMINI_TIMEOUT_SECONDS"), ("llm", "gemini_timeout_seconds")],
+                default=30.0,
+                cast=float,
+            ),
+            provider_max_retries=cls._read_number_variants(
+                ["PROVIDER_MAX_RETRIES", "provider_max_retries"],
+                [("LLM", "PROVIDER_MAX_RETRIES"), ("llm", "provider_max_retries")],
+                default=2,
+            ),
+            retry_base_delay_ms=cls._read_number_variants(
+                ["RETRY_BASE_DELAY_MS", "retry_base_delay_ms"],
+                [("LLM", "RETRY_BASE_DELAY_MS"), ("llm", "retry_base_delay_ms")],
+                default=250.0,
+                cast=float,
+            ),
+            retry_max_delay_ms=cls._read_number_variants(
+                ["RETRY_MAX_DELAY_MS", "retry_max_delay_ms"],
+                [("LLM", "RETRY_MAX_DELAY_MS"), ("llm", "retry_max_delay_ms")],
+                default=4000.0,
+                cast=float,
+            ),
+            circuit_failure_threshold=cls._read_number_variants(
+                ["CIRCUIT_FAILURE_THRESHOLD", "circuit_failure_threshold"],
+                [("LLM", "CIRCUIT_FAILURE_THRESHOLD"), ("llm", "circuit_failure_threshold")],
+                default=5,
+            ),
+            circuit_reset_seconds=cls._read_number_variants(
+                ["CIRCUIT_RESET_SECONDS", "circuit_reset_seconds"],
+                [("LLM", "CIRCUIT_RESET_SECONDS"), ("llm", "circuit_reset_seconds")],
+                default=30.0,
+                cast=float,
+            ),
+            failover_enabled=cls._read_bool_variants(
+                ["FAILOVER_ENABLED", "failover_enabled"],
+                [("LLM", "FAILOVER_ENABLED"), ("llm", "failover_enabled")],
+                default=True,
+            ),
+            max_concurrent_extractions=cls._read_number_variants(
+                ["MAX_CONCURRENT_EXTRACTIONS", "max_concurrent_extractions"],
+                [("LLM", "MAX_CONCURRENT_EXTRACTIONS"), ("llm", "max_concurrent_extractions")],
+                default=8,
+            ),
+            bulk_write_chunk_size=cls._read_number_variants(
+                ["BULK_WRITE_CHUNK_SIZE", "bulk_write_chunk_size"],
+                [("MONGODB", "BULK_WRITE_CHUNK_SIZE"), ("mongodb", "bulk_write_chunk_size")],
+                default=1000,
+            ),
+            export_batch_size=cls._read_number_variants(
+                ["EXPORT_BATCH_SIZE", "export_batch_size"],
+                [("MONGODB", "EXPORT_BATCH_SIZE"), ("mongodb", "export_batch_size")],
+                default=2000,
+            ),
+            import_chunk_size=cls._read_number_variants(
+                ["IMPORT_CHUNK_SIZE", "import_chunk_size"],
+                [("IMPORT", "CHUNK_SIZE"), ("import", "chunk_size")],
+                default=500,
+            ),
+            import_llm_batch_size=cls._read_number_variants(
+                ["IMPORT_LLM_BATCH_SIZE", "import_llm_batch_size"],
+                [("IMPORT", "LLM_BATCH_SIZE"), ("import", "llm_batch_size")],
+                default=20,
+            ),
+            import_max_concurrency=cls._read_number_variants(
+                ["IMPORT_MAX_CONCURRENCY", "import_max_concurrency"],
+                [("IMPORT", "MAX_CONCURRENCY"), ("import", "max_concurrency")],
+                default=4,
+            ),
+            import_checkpoint_dir=cls._read_secret_variants(
+                ["IMPORT_CHECKPOINT_DIR", "import_checkpoint_dir"],
+                [("IMPORT", "CHECKPOINT_DIR"), ("import", "checkpoint_dir")],
+            )
+            or ".import_checkpoints",
+            result_cache_enabled=cls._read_bool_variants(
+                ["RESULT_CACHE_ENABLED", "result_cache_enabled"],
+                [("LLM", "RESULT_CACHE_ENABLED"), ("llm", "result_cache_enabled")],
+                default=True,
+            ),
+            result_cache_size=cls._read_number_variants(
+                ["RESULT_CACHE_SIZE", "result_cache_size"],
+                [("LLM", "RESULT_CACHE_SIZE"), ("llm", "result_cache_size")],
+                default=512,
+            ),
+            result_cache_ttl_seconds=cls._read_number_variants(
+                ["RESULT_CACHE_TTL_SECONDS", "result_cache_ttl_seconds"],
+                [("LLM", "RESULT_CACHE_TTL_SECONDS"), ("llm", "result_cache_ttl_seconds")],
+                default=6 * 3600.0,
+                cast=float,
+            ),
+            category_pruning_enabled=cls._read_bool_variants(
+                ["CATEGORY_PRUNING_ENABLED", "category_pruning_enabled"],
+                [("LLM", "CATEGORY_PRUNING_ENABLED"), ("llm", "category_pruning_enabled")],
+                default=True,
+            ),
+            category_prune_top_k=cls._read_number_variants(
+                ["CATEGORY_PRUNE_TOP_K", "category_prune_top_k"],
+                [("LLM", "CATEGORY_PRUNE_TOP_K"), ("llm", "category_prune_top_k")],
+                default=3,
+            ),
+            category_prune_min_score=cls._read_number_variants(
+                ["CATEGORY_PRUNE_MIN_SCORE", "category_prune_min_score"],
+                [("LLM", "CATEGORY_PRUNE_MIN_SCORE"), ("llm", "category_prune_min_score")],
+                default=0.7,
+                cast=float,
+            ),
+            date_resolution_mode=cls._read_secret_variants(
+                ["DATE_RESOLUTION_MODE", "date_resolution_mode"],
+                [("LLM", "DATE_RESOLUTION_MODE"), ("llm", "date_resolution_mode")],
+            ) or "local",
+            compact_output_enabled=cls._read_bool_variants(
+                ["COMPACT_OUTPUT_ENABLED", "compact_output_enabled"],
+                [("LLM", "COMPACT_OUTPUT_ENABLED"), ("llm", "compact_output_enabled")],
+                default=True,
+            ),
+            fast_path_enabled=cls._read_bool_variants(
+                ["FAST_PATH_ENABLED", "fast_path_enabled"],
+                [("LLM", "FAST_PATH_ENABLED"), ("llm", "fast_path_enabled")],
+                default=True,
+            ),
+            fast_path_min_confidence=cls._read_number_variants(
+                ["FAST_PATH_MIN_CONFIDENCE", "fast_path_min_confidence"],
+                [("LLM", "FAST_PATH_MIN_CONFIDENCE"), ("llm", "fast_path_min_confidence")],
+                default=0.85,
+                cast=float,
+            ),
+            structured_output_enabled=cls._read_bool_variants(
+                ["STRUCTURED_OUTPUT_ENABLED", "structured_output_enabled"],
+                [("LLM", "STRUCTURED_OUTPUT_ENABLED"), ("llm", "structured_output_enabled")],
+                default=True,
+            ),
+            structured_output_unsupported_models=cls._read_secret_list_variants(
+                ["STRUCTURED_OUTPUT_UNSUPPORTED_MODELS", "structured_output_unsupported_models"],
+                [("LLM", "STRUCTURED_OUTPUT_UNSUPPORTED_MODELS"), ("llm", "structured_output_unsupported_models")],
+            )
+            or [],
+            audio_preprocess_enabled=cls._read_bool_variants(
+                ["AUDIO_PREPROCESS_ENABLED", "audio_preprocess_enabled"],
+                [("AUDIO", "PREPROCESS_ENABLED"), ("audio", "preprocess_enabled")],
+                default=True,
+            ),
+            audio_target_sample_rate=cls._read_number_variants(
+                ["AUDIO_TARGET_SAMPLE_RATE", "audio_target_sample_rate"],
+                [("AUDIO", "TARGET_SAMPLE_RATE"), ("audio", "target_sample_rate")],
+                default=16000,
+            ),
+            audio_silence_threshold_db=cls._read_number_variants(
+                ["AUDIO_SILENCE_THRESHOLD_DB", "audio_silence_threshold_db"],
+                [("AUDIO", "SILENCE_THRESHOLD_DB"), ("audio", "silence_threshold_db")],
+                default=-45.0,
+                cast=float,
+            ),
+            audio_silence_padding_ms=cls._read_number_variants(
+                ["AUDIO_SILENCE_PADDING_MS", "audio_silence_padding_ms"],
+                [("AUDIO", "SILENCE_PADDING_MS"), ("audio", "silence_padding_ms")],
+                default=200.0,
+                cast=float,
+            ),
+            transcript_cache_enabled=cls._read_bool_variants(
+                ["TRANSCRIPT_CACHE_ENABLED", "transcript_cache_enabled"],
+                [("AUDIO", "TRANSCRIPT_CACHE_ENABLED"), ("audio", "transcript_cache_enabled")],
+                default=True,
+            ),
+            transcript_cache_size=cls._read_number_variants(
+                ["TRANSCRIPT_CACHE_SIZE", "transcript_cache_size"],
+                [("AUDIO", "TRANSCRIPT_CACHE_SIZE"), ("audio", "transcript_cache_size")],
+                default=128,
+            ),
+            transcript_cache_ttl_seconds=cls._read_number_variants(
+                ["TRANSCRIPT_CACHE_TTL_SECONDS", "transcript_cache_ttl_seconds"],
+                [("AUDIO", "TRANSCRIPT_CACHE_TTL_SECONDS"), ("audio", "transcript_cache_ttl_seconds")],
+                default=3600.0,
+                cast=float,
+            ),
+            stt_model_cache_size=cls._read_number_variants(
+                ["STT_MODEL_CACHE_SIZE", "stt_model_cache_size"],
+                [("AUDIO", "STT_MODEL_CACHE_SIZE"), ("audio", "stt_model_cache_size")],
+                default=4,
+            ),
+            voice_single_call_enabled=cls._read_bool_variants(
+                ["VOICE_SINGLE_CALL_ENABLED", "voice_single_call_enabled"],
+                [("AUDIO", "VOICE_SINGLE_CALL_ENABLED"), ("audio", "voice_single_call_enabled")],
+                default=True,
+            ),
+            voice_extraction_model=cls._read_secret_variants(
+                ["VOICE_EXTRACTION_MODEL", "voice_extraction_model"],
+                [("AUDIO", "VOICE_EXTRACTION_MODEL"), ("audio", "voice_extraction_model")],
+            ) or "gemini-1.5-flash",
+            cassette_mode=cls._read_secret_variants(
+                ["CASSETTE_MODE", "cassette_mode"],
+                [("LLM", "CASSETTE_MODE"), ("llm", "cassette_mode")],
+            )
+            or "off",
+            cassette_path=cls._read_secret_variants(
+                ["CASSETTE_PATH", "cassette_path"],
+                [("LLM", "CASSETTE_PATH"), ("llm", "cassette_path")],
+            )
+            or ".cassettes/llm.jsonl.gz",
+            cassette_replay_latency=cls._read_bool_variants(
+                ["CASSETTE_REPLAY_LATENCY", "cassette_replay_latency"],
+                [("LLM", "CASSETTE_REPLAY_LATENCY"), ("llm", "cassette_replay_latency")],
+                default=False,
+            ),
+            cassette_match=cls._read_secret_variants(
+                ["CASSETTE_MATCH", "cassette_match"],
+                [("LLM", "CASSETTE_MATCH"), ("llm", "cassette_match")],
+            )
+            or "exact",
             openai_models=cls._read_secret_list_variants(
                 ["OPENAI_MODELS", "openai_models"],
                 [("LLM", "OPENAI_MODELS"), ("llm", "openai_models")],
@@ -1,23 +1,109 @@
 """
 MongoDB index creation helpers.
+
+Indexes are ensured once per process: a thread-safe registry keyed by
+(database, collection) remembers which collections are done, so repeated
+`ensure_indexes` calls (every Streamlit rerun, every repository) cost no
+round trips. Call `ensure_indexes` at startup.
 """
 
 from __future__ import annotations
 
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
 from pymongo.database import Database
 
+from src.utils.logger import logger
+
+# (keys, create_index options) per collection
+EXPENSES_INDEXES: List[Tuple[Any, Dict[str, Any]]] = [
+    ("created_at", {}),
+    ("datetime", {}),
+    ([("category", 1), ("subcategory", 1)], {}),
+    ("provider", {}),
+    ("model", {}),
+]
+EXTRACTION_LOGS_INDEXES: List[Tuple[Any, Dict[str, Any]]] = [
+    ("created_at", {}),
+    ("provider", {}),
+    ("model", {}),
+]
+CATEGORIES_INDEXES: List[Tuple[Any, Dict[str, Any]]] = [
+    # Unique, case-insensitive category name
+    ([("name", 1)], {"unique": True, "collation": {"locale": "en", "strength": 2}}),
+    ("subcategories.name", {}),
+    ("is_active", {}),
+    ("sort_order", {}),
+    ("created_at", {}),
+]
+
+_ensured: set = set()
+# Keys whose indexes another thread is creating right now, with an event set when it finishes
+_in_progress: Dict[Tuple[str, str], threading.Event] = {}
+_lock = threading.Lock()
+_stats = {"ensure_calls": 0, "skipped": 0, "create_index_calls": 0}
+
+
+def ensure_collection_indexes(db: Database, collection: str, specs: Sequence[Tuple[Any, Dict[str, Any]]]) -> bool:
+    """Create `specs` on `db[collection]` unless this process already did; True if indexes were created.
+
+    The first caller claims the (database, collection) key under the lock and
+    issues the `create_index` round trips outside it, so other collections are
+    never blocked. Concurrent callers for the same key wait for that claim
+    instead of issuing duplicate calls. A failure releases the claim without
+    registering the collection, so the next call retries.
+    """
+    key = (db.name, collection)
+    with _lock:
+        _stats["ensure_calls"] += 1
+    while True:
+        with _lock:
+            if key in _ensured:
+                _stats["skipped"] += 1
+                return False
+            pending = _in_progress.get(key)
+            if pending is None:
+                claim = _in_progress[key] = threading.Event()
+                break
+        pending.wait()
+
+    try:
+        coll = db[collection]
+        for keys, options in specs:
+            with _lock:
+                _stats["create_index_calls"] += 1
+            coll.create_index(keys, **options)
+    except BaseException:
+        with _lock:
+            del _in_progress[key]
+        claim.set()
+        raise
+    with _lock:
+        _ensured.add(key)
+        del _in_progress[key]
+    claim.set()
+    logger.info("Indexes ensured", {"database": db.name, "collection": collection, "count": len(specs)})
+    return True
+
 
 def ensure_indexes(db: Database) -> None:
-    expenses = db["expenses"]
-    expenses.create_index("created_at")
-    expenses.create_index("datetime")
-    expenses.create_index([("category", 1), ("subcategory", 1)])
-    expenses.create_index("provider")
-    expenses.create_index("model")
-
-    logs = db["extraction_logs"]
-    logs.create_index("created_at")
-    logs.create_index("provider")
-    logs.create_index("model")
+    ensure_collection_indexes(db, "expenses", EXPENSES_INDEXES)
+    ensure_collection_indexes(db, "extraction_logs", EXTRACTION_LOGS_INDEXES)
+    ensure_collection_indexes(db, "categories", CATEGORIES_INDEXES)
+
+
+def get_index_stats() -> dict:
+    """Registry counters: ensured collections and how many `create_index` round trips were issued."""
+    with _lock:
+        return {"ensured": sorted(f"{db}.{coll}" for db, coll in _ensured), **_stats}
+
+
+def reset_index_registry() -> None:
+    """Forget ensured collections and counters (e.g. after switching Mongo clients)."""
+    with _lock:
+        _ensured.clear()
+        for name in _stats:
+            _stats[name] = 0
 
 # Index creation helpers
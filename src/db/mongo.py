@@ -4,14 +4,69 @@ MongoDB client and connection management.
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import importlib.util
+import weakref
+from typing import Any, Dict, List, Optional
 
 from pymongo import MongoClient
 from pymongo.database import Database
 
+try:
+    from pymongo import AsyncMongoClient  # type: ignore  # PyMongo >= 4.10
+except Exception:  # pragma: no cover
+    AsyncMongoClient = None  # type: ignore
+
 from src.config.settings import settings
+from src.db.indexes import reset_index_registry
+from src.db.monitoring import pool_monitor
+from src.utils.logger import logger
 
 _mongo_client: Optional[MongoClient] = None
+# Async clients are bound to the event loop they were created on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+# Optional compression libraries PyMongo needs for each wire compressor (zlib ships with Python)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+
+def available_compressors(requested: List[str]) -> List[str]:
+    """`requested` compressors (in preference order) whose library is importable."""
+    available = []
+    for name in (c.strip().lower() for c in requested):
+        if name not in _COMPRESSOR_MODULES or name in available:
+            continue
+        module = _COMPRESSOR_MODULES[name]
+        if module is None or importlib.util.find_spec(module) is not None:
+            available.append(name)
+    return available
+
+
+def client_options() -> Dict[str, Any]:
+    """MongoClient keyword options from settings: bounded pool, timeouts, compression, retries."""
+    options: Dict[str, Any] = {
+        "appname": "py_expense_tracker",
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "retryReads": settings.mongo_retry_reads,
+        "retryWrites": settings.mongo_retry_writes,
+        "event_listeners": [pool_monitor],
+    }
+    # Non-positive values keep the driver default for that timeout
+    for option, value in (
+        ("maxIdleTimeMS", settings.mongo_max_idle_time_ms),
+        ("waitQueueTimeoutMS", settings.mongo_wait_queue_timeout_ms),
+        ("serverSelectionTimeoutMS", settings.mongo_server_selection_timeout_ms),
+        ("connectTimeoutMS", settings.mongo_connect_timeout_ms),
+        ("socketTimeoutMS", settings.mongo_socket_timeout_ms),
+    ):
+        if value and value > 0:
+            options[option] = value
+    compressors = available_compressors(settings.mongo_compressors)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
 
 
 def get_mongo_client() -> MongoClient:
@@ -22,12 +77,41 @@ def get_mongo_client() -> MongoClient:
     if not settings.mongodb_uri:
         raise RuntimeError("MONGODB_URI is not configured in secrets or environment.")
 
-    _mongo_client = MongoClient(settings.mongodb_uri, appname="py_expense_tracker")
+    options = client_options()
+    _mongo_client = MongoClient(settings.mongodb_uri, **options)
+    logger.info("MongoClient created", {k: v for k, v in options.items() if k != "event_listeners"})
     return _mongo_client
 
 
+def set_mongo_client(client: Optional[Any]) -> None:
+    """Replace the process-wide client (e.g. with an in-memory stand-in for benchmarks); None resets it."""
+    global _mongo_client
+    _mongo_client = client
+    # Indexes ensured through the old client say nothing about the new one
+    reset_index_registry()
+
+
 def get_database(db_name: str = "expense_tracker") -> Database:
     client = get_mongo_client()
     return client[db_name]
 
+
+def get_async_mongo_client() -> Optional[Any]:
+    """Return the AsyncMongoClient for the running event loop, or None if unsupported."""
+    if AsyncMongoClient is None:
+        return None
+    if not settings.mongodb_uri:
+        raise RuntimeError("MONGODB_URI is not configured in secrets or environment.")
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncMongoClient(settings.mongodb_uri, **client_options())
+    return client
+
+
+def get_async_database(db_name: str = "expense_tracker") -> Optional[Any]:
+    """Async database handle for the running loop; None when PyMongo has no async API."""
+    client = get_async_mongo_client()
+    return client[db_name] if client is not None else None
+
 # Mongo client, connection mgmt
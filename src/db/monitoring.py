@@ -0,0 +1,124 @@
+"""
+Connection pool monitoring for the Mongo clients.
+
+`pool_monitor` is registered as an event listener on every client built by
+`src.db.mongo`; it counts connections per server address and times how long
+operations wait to check a connection out of the pool, so the debug panel can
+show pool pressure (checked out now / peak, wait p50/p95, checkout failures).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict
+
+from pymongo import monitoring
+
+from src.utils.metrics import LatencyTracker
+
+
+def _address(event: Any) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Thread-safe per-address pool counters plus a rolling window of checkout wait times."""
+
+    def __init__(self, window: int = 500):
+        self.wait = LatencyTracker(window=window)
+        self._pools: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Fallback start times for drivers whose checkout events carry no `duration`
+        self._local = threading.local()
+
+    def _pool(self, address: str) -> Dict[str, Any]:
+        pool = self._pools.get(address)
+        if pool is None:
+            pool = self._pools[address] = {
+                "open": 0, "created": 0, "closed": 0, "checked_out": 0, "peak_checked_out": 0,
+                "checkouts": 0, "checkout_failures": 0, "cleared": 0, "last_failure": None,
+            }
+        return pool
+
+    def _wait_ms(self, event: Any) -> float:
+        duration = getattr(event, "duration", None)  # seconds, PyMongo >= 4.7
+        if duration is not None:
+            return duration * 1000.0
+        started = getattr(self._local, "started", None)
+        return (time.perf_counter() - started) * 1000.0 if started is not None else 0.0
+
+    def pool_created(self, event: Any) -> None:
+        with self._lock:
+            self._pool(_address(event))
+
+    def pool_ready(self, event: Any) -> None:
+        pass
+
+    def pool_cleared(self, event: Any) -> None:
+        with self._lock:
+            self._pool(_address(event))["cleared"] += 1
+
+    def pool_closed(self, event: Any) -> None:
+        pass
+
+    def connection_created(self, event: Any) -> None:
+        with self._lock:
+            pool = self._pool(_address(event))
+            pool["created"] += 1
+            pool["open"] += 1
+
+    def connection_ready(self, event: Any) -> None:
+        pass
+
+    def connection_closed(self, event: Any) -> None:
+        with self._lock:
+            pool = self._pool(_address(event))
+            pool["closed"] += 1
+            pool["open"] = max(0, pool["open"] - 1)
+
+    def connection_check_out_started(self, event: Any) -> None:
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event: Any) -> None:
+        address = _address(event)
+        self.wait.record(address, self._wait_ms(event))
+        with self._lock:
+            pool = self._pool(address)
+            pool["checkout_failures"] += 1
+            pool["last_failure"] = str(getattr(event, "reason", "")) or None
+
+    def connection_checked_out(self, event: Any) -> None:
+        address = _address(event)
+        self.wait.record(address, self._wait_ms(event))
+        with self._lock:
+            pool = self._pool(address)
+            pool["checkouts"] += 1
+            pool["checked_out"] += 1
+            pool["peak_checked_out"] = max(pool["peak_checked_out"], pool["checked_out"])
+
+    def connection_checked_in(self, event: Any) -> None:
+        with self._lock:
+            pool = self._pool(_address(event))
+            pool["checked_out"] = max(0, pool["checked_out"] - 1)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per server address: pool counters and checkout wait mean/p50/p95 (ms)."""
+        with self._lock:
+            pools = {address: dict(pool) for address, pool in self._pools.items()}
+        waits = self.wait.summary()
+        for address, pool in pools.items():
+            wait = waits.get(address) or {}
+            pool["wait_mean_ms"] = wait.get("mean_ms")
+            pool["wait_p50_ms"] = round(wait["p50_ms"], 3) if wait.get("p50_ms") is not None else None
+            pool["wait_p95_ms"] = round(wait["p95_ms"], 3) if wait.get("p95_ms") is not None else None
+        return pools
+
+
+# Shared listener attached to the sync and async clients
+pool_monitor = PoolStatsListener()
+
+
+def get_pool_stats() -> Dict[str, dict]:
+    return pool_monitor.stats()
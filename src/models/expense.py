@@ -24,6 +24,37 @@ class ExtractionResult(BaseModel):
     error: Optional[str] = None
 
 
+class ExtractionOutput(BaseModel):
+    """Schema the model fills in structured-output mode (the LLM-produced subset of ExtractionResult)."""
+    valid: bool = Field(description="True when amount, category and subcategory were all found")
+    amount: Optional[float] = Field(default=None, description="Numeric amount in rupees")
+    category: Optional[str] = Field(default=None, description="One of the allowed categories")
+    subcategory: Optional[str] = Field(default=None, description="One of the allowed subcategories of the category")
+    description: str = Field(description="Original text exactly as written")
+    datetime: Optional[str] = Field(default=None, description="ISO8601 timestamp with timezone")
+    missing_fields: List[str] = Field(default_factory=list, description="Names of fields that could not be extracted")
+
+
+class ExtractionHintOutput(BaseModel):
+    """Structured-output schema for the "local" date mode: a date hint instead of a resolved datetime."""
+    valid: bool = Field(description="True when amount, category and subcategory were all found")
+    amount: Optional[float] = Field(default=None, description="Numeric amount in rupees")
+    category: Optional[str] = Field(default=None, description="One of the allowed categories")
+    subcategory: Optional[str] = Field(default=None, description="One of the allowed subcategories of the category")
+    description: str = Field(description="Original text exactly as written")
+    date: Optional[str] = Field(default=None, description="Words from the text saying when, e.g. 'kaale' or 'last monday'; null if none")
+    missing_fields: List[str] = Field(default_factory=list, description="Names of fields that could not be extracted")
+
+
+class CompactExtractionOutput(BaseModel):
+    """Structured-output schema for the "compact" prompt variant (see `src.ai.prompts.COMPACT_KEYS`)."""
+    a: Optional[float] = Field(default=None, description="Amount in rupees")
+    c: Optional[str] = Field(default=None, description="Category, one of the allowed categories")
+    s: Optional[str] = Field(default=None, description="Subcategory of that category")
+    d: Optional[str] = Field(default=None, description="Words from the text saying when; null if none")
+    m: List[str] = Field(default_factory=list, description="Fields that could not be extracted")
+
+
 class ExpenseCreate(BaseModel):
     amount: float
     category: str
@@ -43,6 +74,9 @@ class ExtractionLog(BaseModel):
     created_at: DateTime = Field(default_factory=DateTime.utcnow)
     settings_snapshot: dict = Field(default_factory=dict)
     extraction: ExtractionResult
+    latency_ms: Optional[float] = None
+    # Per-attempt performance counters (fast path, caches, ...)
+    metrics: dict = Field(default_factory=dict)
 
 
 class ExpenseUpdate(BaseModel):
@@ -56,4 +90,35 @@ class ExpenseUpdate(BaseModel):
     model: Optional[str] = None
     original_query: Optional[str] = None
 
+
+class BulkItemError(BaseModel):
+    """One rejected operation of a bulk write."""
+    index: int  # position in the caller's input list
+    code: Optional[int] = None
+    message: str = ""
+
+
+class BulkResult(BaseModel):
+    """Outcome of a chunked, unordered bulk write.
+
+    `ids` follows input order for inserts ("" where the insert failed); a failed
+    item never stops the rest of its chunk.
+    """
+    requested: int = 0
+    inserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+    ids: List[str] = Field(default_factory=list)
+    errors: List[BulkItemError] = Field(default_factory=list)
+    chunks: int = 0
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def failed_indexes(self) -> List[int]:
+        return sorted(error.index for error in self.errors)
+
 # Pydantic models for expenses
@@ -13,6 +13,7 @@ from pymongo.database import Database
 from pymongo.errors import DuplicateKeyError as MongoDuplicateKeyError
 from bson import ObjectId
 
+from src.db.indexes import CATEGORIES_INDEXES, ensure_collection_indexes
 from src.models.category import (
     CategoryModel, CategoryCreate, CategoryUpdate,
     SubcategoryCreate, SubcategoryUpdate, SubcategoryModel
@@ -49,23 +50,9 @@ class CategoriesRepository:
             raise ValueError(f"Invalid ObjectId: {category_id}")
 
     def _ensure_indexes(self):
-        """Create necessary indexes for optimal query performance."""
+        """Create necessary indexes once per process (see `src.db.indexes`)."""
         try:
-            # Unique index on category name (case-insensitive)
-            self._categories.create_index(
-                [("name", 1)],
-                unique=True,
-                collation={"locale": "en", "strength": 2}  # Case-insensitive
-            )
-            # Ensure subcategories array index for efficient operations
-            self._categories.create_index("subcategories.name")
-            # Index on is_active for filtering
-            self._categories.create_index("is_active")
-            # Index on sort_order for ordering
-            self._categories.create_index("sort_order")
-            # Index on created_at for sorting
-            self._categories.create_index("created_at")
-            logger.info("Categories indexes ensured")
+            ensure_collection_indexes(self._db, "categories", CATEGORIES_INDEXES)
         except Exception as e:
             logger.error("Failed to create categories indexes", {"error": str(e)})
             raise
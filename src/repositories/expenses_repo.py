@@ -4,14 +4,116 @@ MongoDB CRUD for expenses and extraction logs.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError
 
-from src.models.expense import ExpenseCreate, ExpenseUpdate, ExtractionLog
+from src.config.settings import settings
+from src.models.expense import BulkItemError, BulkResult, ExpenseCreate, ExpenseUpdate, ExtractionLog
 from src.utils.validation import redact_sensitive_data
 
 
+def _log_payload(log: ExtractionLog) -> Dict[str, Any]:
+    payload: Dict[str, Any] = log.model_dump()
+    # Redact sensitive fields from settings_snapshot if present
+    snapshot = payload.get("settings_snapshot")
+    if isinstance(snapshot, dict):
+        payload["settings_snapshot"] = redact_sensitive_data(snapshot)
+    if "extraction" in payload and isinstance(payload["extraction"], dict):
+        payload["extraction"]["datetime"] = payload["extraction"].get("datetime")
+    return payload
+
+
+def _id_filter(expense_id: Any) -> Any:
+    """Stored `_id` for an id given as a string or ObjectId."""
+    if isinstance(expense_id, str) and ObjectId.is_valid(expense_id):
+        return ObjectId(expense_id)
+    return expense_id
+
+
+def _expense_query(category: Optional[str], subcategory: Optional[str], start_end_utc: Optional[Tuple]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if category:
+        query["category"] = category
+    if subcategory:
+        query["subcategory"] = subcategory
+    if start_end_utc and len(start_end_utc) == 2:
+        start, end = start_end_utc
+        query["datetime"] = {"$gte": start, "$lte": end}
+    return query
+
+
+def _insert_ops(docs: List[Dict[str, Any]], ids: Optional[List[Any]] = None) -> Tuple[List[InsertOne], List[str]]:
+    """InsertOne ops with client-side ids, so ids stay known even when some inserts fail.
+
+    `ids` supplies explicit `_id`s (e.g. deterministic keys that make re-imports
+    fail as duplicates instead of inserting twice).
+    """
+    inserted_ids = []
+    for position, doc in enumerate(docs):
+        if ids is not None:
+            doc["_id"] = ids[position]
+        doc.setdefault("_id", ObjectId())
+        inserted_ids.append(str(doc["_id"]))
+    return [InsertOne(doc) for doc in docs], inserted_ids
+
+
+def _update_ops(updates: Iterable[Tuple[Any, ExpenseUpdate]]) -> Tuple[List[UpdateOne], List[int]]:
+    """UpdateOne ops plus the input position of each (empty updates are skipped)."""
+    ops: List[UpdateOne] = []
+    positions: List[int] = []
+    now = datetime.utcnow()
+    for position, (expense_id, update) in enumerate(updates):
+        fields = update.model_dump(exclude_unset=True)
+        if fields:
+            ops.append(UpdateOne({"_id": _id_filter(expense_id)}, {"$set": {**fields, "updated_at": now}}))
+            positions.append(position)
+    return ops, positions
+
+
+def _chunks(ops: List[Any], chunk_size: Optional[int]):
+    size = max(1, int(chunk_size or settings.bulk_write_chunk_size))
+    for start in range(0, len(ops), size):
+        yield start, ops[start:start + size]
+
+
+def _record_chunk(result: BulkResult, start: int, positions: Optional[List[int]],
+                  outcome: Any = None, error: Optional[BulkWriteError] = None) -> None:
+    """Fold one chunk's BulkWriteResult (or BulkWriteError details) into `result`."""
+    result.chunks += 1
+    if error is not None:
+        details = error.details or {}
+        result.inserted += details.get("nInserted", 0)
+        result.matched += details.get("nMatched", 0)
+        result.modified += details.get("nModified", 0)
+        result.deleted += details.get("nRemoved", 0)
+        for item in details.get("writeErrors", []):
+            op_index = start + item.get("index", 0)
+            result.errors.append(BulkItemError(
+                index=positions[op_index] if positions is not None else op_index,
+                code=item.get("code"),
+                message=str(item.get("errmsg", ""))[:500],
+            ))
+        return
+    result.inserted += outcome.inserted_count
+    result.matched += outcome.matched_count
+    result.modified += outcome.modified_count
+    result.deleted += outcome.deleted_count
+
+
+def _finish(result: BulkResult, started: float, ids: Optional[List[str]] = None) -> BulkResult:
+    if ids is not None:
+        failed = set(result.failed_indexes())
+        result.ids = ["" if i in failed else _id for i, _id in enumerate(ids)]
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
 class ExpensesRepository:
     def __init__(self, db: Database):
         self._db = db
@@ -22,17 +124,43 @@ class ExpensesRepository:
         result = self._expenses.insert_one(data.model_dump())
         return str(result.inserted_id)
 
+    def _bulk_write(self, collection: Any, ops: List[Any], positions: Optional[List[int]],
+                    requested: int, chunk_size: Optional[int], ids: Optional[List[str]] = None) -> BulkResult:
+        """Unordered `bulk_write` in chunks; per-item failures are collected, not raised."""
+        started = time.perf_counter()
+        result = BulkResult(requested=requested)
+        for start, chunk in _chunks(ops, chunk_size):
+            try:
+                _record_chunk(result, start, positions, outcome=collection.bulk_write(chunk, ordered=False))
+            except BulkWriteError as e:
+                _record_chunk(result, start, positions, error=e)
+        return _finish(result, started, ids)
+
+    def insert_many_expenses(self, items: List[ExpenseCreate], chunk_size: Optional[int] = None,
+                             ids: Optional[List[Any]] = None) -> BulkResult:
+        """Insert expenses with unordered bulk writes. `result.ids` follows input order."""
+        ops, ids = _insert_ops([item.model_dump() for item in items], ids)
+        return self._bulk_write(self._expenses, ops, None, len(items), chunk_size, ids)
+
+    def bulk_update_expenses(self, updates: List[Tuple[Any, ExpenseUpdate]],
+                             chunk_size: Optional[int] = None) -> BulkResult:
+        """Apply `(expense_id, ExpenseUpdate)` pairs; error indexes refer to positions in `updates`."""
+        ops, positions = _update_ops(updates)
+        return self._bulk_write(self._expenses, ops, positions, len(updates), chunk_size)
+
+    def bulk_delete_expenses(self, expense_ids: List[Any], chunk_size: Optional[int] = None) -> BulkResult:
+        ops = [DeleteOne({"_id": _id_filter(expense_id)}) for expense_id in expense_ids]
+        return self._bulk_write(self._expenses, ops, None, len(expense_ids), chunk_size)
+
     def insert_log(self, log: ExtractionLog) -> str:
-        payload: Dict[str, Any] = log.model_dump()
-        # Redact sensitive fields from settings_snapshot if present
-        snapshot = payload.get("settings_snapshot")
-        if isinstance(snapshot, dict):
-            payload["settings_snapshot"] = redact_sensitive_data(snapshot)
-        if "extraction" in payload and isinstance(payload["extraction"], dict):
-            payload["extraction"]["datetime"] = payload["extraction"].get("datetime")
-        result = self._logs.insert_one(payload)
+        result = self._logs.insert_one(_log_payload(log))
         return str(result.inserted_id)
 
+    def insert_logs_many(self, logs: List[ExtractionLog], chunk_size: Optional[int] = None) -> BulkResult:
+        """Insert extraction logs with unordered bulk writes. `result.ids` follows input order."""
+        ops, ids = _insert_ops([_log_payload(log) for log in logs])
+        return self._bulk_write(self._logs, ops, None, len(logs), chunk_size, ids)
+
     # NEW: query helpers
     def list_recent(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Return most recent expenses sorted by created_at desc."""
@@ -47,17 +175,48 @@ class ExpensesRepository:
         limit: int = 100,
     ) -> List[Dict[str, Any]]:
         """Generic list with optional filters."""
-        query: Dict[str, Any] = {}
-        if category:
-            query["category"] = category
-        if subcategory:
-            query["subcategory"] = subcategory
-        if start_end_utc and len(start_end_utc) == 2:
-            start, end = start_end_utc
-            query["datetime"] = {"$gte": start, "$lte": end}
+        query = _expense_query(category, subcategory, start_end_utc)
         cursor = self._expenses.find(query).sort("datetime", -1).limit(int(limit))
         return list(cursor)
 
+    def iter_expenses(
+        self,
+        category: Optional[str] = None,
+        subcategory: Optional[str] = None,
+        start_end_utc: Optional[Tuple] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream matching expenses oldest first without materializing them.
+
+        Only `fields` are fetched (all when None); the cursor pulls
+        `batch_size` documents per round trip (settings.export_batch_size).
+        """
+        query = _expense_query(category, subcategory, start_end_utc)
+        projection = {field: 1 for field in fields} if fields else None
+        cursor = self._expenses.find(query, projection).sort("datetime", 1)
+        cursor = cursor.batch_size(int(batch_size or settings.export_batch_size))
+        try:
+            yield from cursor
+        finally:
+            close = getattr(cursor, "close", None)
+            if close:
+                close()
+
+    def recent_descriptions_by_category(self, scan_limit: int = 2000, per_category: int = 50) -> Dict[str, List[str]]:
+        """Return recent expense descriptions grouped by category (newest first)."""
+        pipeline = [
+            {"$sort": {"created_at": -1}},
+            {"$limit": int(scan_limit)},
+            {"$project": {"_id": 0, "category": 1, "description": 1}},
+            {"$group": {"_id": "$category", "descriptions": {"$push": "$description"}}},
+        ]
+        grouped: Dict[str, List[str]] = {}
+        for row in self._expenses.aggregate(pipeline):
+            if row.get("_id"):
+                grouped[row["_id"]] = [d for d in row.get("descriptions", []) if d][: int(per_category)]
+        return grouped
+
     def delete_expense(self, expense_id: str) -> bool:
         """Delete an expense by ID. Returns True if deleted, False if not found."""
         result = self._expenses.delete_one({"_id": expense_id})
@@ -71,7 +230,6 @@ class ExpensesRepository:
             return None
 
         # Add updated_at timestamp
-        from datetime import datetime
         update_dict["updated_at"] = datetime.utcnow()
 
         result = self._expenses.update_one(
@@ -89,3 +247,49 @@ class ExpensesRepository:
         """Get a single expense by ID."""
         return self._expenses.find_one({"_id": expense_id})
 
+
+
+class AsyncExpensesRepository:
+    """Write side of `ExpensesRepository` on PyMongo's AsyncMongoClient."""
+
+    def __init__(self, db: Any):
+        self._db = db
+        self._expenses = db["expenses"]
+        self._logs = db["extraction_logs"]
+
+    async def insert_expense(self, data: ExpenseCreate) -> str:
+        result = await self._expenses.insert_one(data.model_dump())
+        return str(result.inserted_id)
+
+    async def insert_log(self, log: ExtractionLog) -> str:
+        result = await self._logs.insert_one(_log_payload(log))
+        return str(result.inserted_id)
+
+    async def _bulk_write(self, collection: Any, ops: List[Any], positions: Optional[List[int]],
+                          requested: int, chunk_size: Optional[int], ids: Optional[List[str]] = None) -> BulkResult:
+        started = time.perf_counter()
+        result = BulkResult(requested=requested)
+        for start, chunk in _chunks(ops, chunk_size):
+            try:
+                _record_chunk(result, start, positions, outcome=await collection.bulk_write(chunk, ordered=False))
+            except BulkWriteError as e:
+                _record_chunk(result, start, positions, error=e)
+        return _finish(result, started, ids)
+
+    async def insert_many_expenses(self, items: List[ExpenseCreate], chunk_size: Optional[int] = None,
+                                   ids: Optional[List[Any]] = None) -> BulkResult:
+        ops, ids = _insert_ops([item.model_dump() for item in items], ids)
+        return await self._bulk_write(self._expenses, ops, None, len(items), chunk_size, ids)
+
+    async def bulk_update_expenses(self, updates: List[Tuple[Any, ExpenseUpdate]],
+                                   chunk_size: Optional[int] = None) -> BulkResult:
+        ops, positions = _update_ops(updates)
+        return await self._bulk_write(self._expenses, ops, positions, len(updates), chunk_size)
+
+    async def bulk_delete_expenses(self, expense_ids: List[Any], chunk_size: Optional[int] = None) -> BulkResult:
+        ops = [DeleteOne({"_id": _id_filter(expense_id)}) for expense_id in expense_ids]
+        return await self._bulk_write(self._expenses, ops, None, len(expense_ids), chunk_size)
+
+    async def insert_logs_many(self, logs: List[ExtractionLog], chunk_size: Optional[int] = None) -> BulkResult:
+        ops, ids = _insert_ops([_log_payload(log) for log in logs])
+        return await self._bulk_write(self._logs, ops, None, len(logs), chunk_size, ids)
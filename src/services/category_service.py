@@ -5,6 +5,7 @@ Provides high-level operations with validation, conflict resolution, and error h
 
 from __future__ import annotations
 
+import threading
 from typing import List, Optional
 
 from src.db.mongo import get_database
@@ -20,6 +21,25 @@ from src.utils.exceptions import (
 )
 from src.utils.logger import logger, log_execution_time
 
+# Process-wide taxonomy generation. Bumped after every successful mutation so
+# caches derived from the category list (e.g. the prompt categories block)
+# know when they must be rebuilt.
+_category_generation = 0
+_generation_lock = threading.Lock()
+
+
+def get_category_generation() -> int:
+    """Return the current taxonomy generation number for this process."""
+    return _category_generation
+
+
+def bump_category_generation() -> int:
+    """Invalidate taxonomy-derived caches and return the new generation."""
+    global _category_generation
+    with _generation_lock:
+        _category_generation += 1
+        return _category_generation
+
 
 class CategoryService:
     """
@@ -150,6 +170,7 @@ class CategoryService:
 
             # Create the category
             category = self._repo.create(category_data)
+            bump_category_generation()
 
             logger.info("Category created successfully", {
                 "category_id": str(category.id),
@@ -200,6 +221,7 @@ class CategoryService:
 
             # Update the category
             updated_category = self._repo.update(category_id, update_data)
+            bump_category_generation()
 
             logger.info("Category updated successfully", {
                 "category_id": category_id,
@@ -248,12 +270,14 @@ class CategoryService:
             # Perform deletion
             if hard_delete:
                 success = self._repo.hard_delete(category_id)
+                bump_category_generation()
                 logger.warning("Category hard deleted", {
                     "category_id": category_id,
                     "name": category.name
                 })
             else:
                 success = self._repo.delete(category_id)
+                bump_category_generation()
                 logger.info("Category soft deleted", {
                     "category_id": category_id,
                     "name": category.name
@@ -302,6 +326,7 @@ class CategoryService:
 
             # Add subcategory
             updated_category = self._repo.add_subcategory(category_id, subcategory_data)
+            bump_category_generation()
 
             logger.info("Subcategory added successfully", {
                 "category_id": category_id,
@@ -360,6 +385,7 @@ class CategoryService:
 
             # Update subcategory
             updated_category = self._repo.update_subcategory(category_id, old_name, update_data)
+            bump_category_generation()
 
             logger.info("Subcategory updated successfully", {
                 "category_id": category_id,
@@ -406,6 +432,7 @@ class CategoryService:
 
             # Remove subcategory
             success = self._repo.remove_subcategory(category_id, subcategory_name)
+            bump_category_generation()
 
             if success:
                 logger.info("Subcategory removed successfully", {
@@ -438,6 +465,7 @@ class CategoryService:
             created_categories = self._repo.seed_defaults()
 
             if created_categories:
+                bump_category_generation()
                 logger.info("Default categories seeded successfully", {
                     "count": len(created_categories)
                 })
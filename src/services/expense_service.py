@@ -4,59 +4,413 @@ Business logic for running extraction and saving results to MongoDB.
 
 from __future__ import annotations
 
+import asyncio
+import time
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from src.ai.chains import run_extraction
-from src.ai.providers import ProviderName
-from src.db.indexes import ensure_indexes
-from src.db.mongo import get_database
+from src.ai.chains import (
+    get_categories_snapshot, run_extraction, run_extraction_async, run_extraction_batch, run_extraction_cascade,
+    run_extraction_cascade_async, run_extraction_hedged, run_extraction_hedged_async, run_voice_extraction,
+)
+from src.ai.fast_path import FAST_PATH_MODEL, FAST_PATH_PROVIDER, extract_fast
+from src.ai.providers import ProviderName, transcribe_with_gemini
+from src.config.settings import settings
+from src.db.mongo import get_async_database, get_database
 from src.models.expense import ExpenseCreate, ExpenseUpdate, ExtractionLog, ExtractionResult
 from src.utils.datetime_utils import to_utc
-from src.repositories.expenses_repo import ExpensesRepository
+from src.repositories.expenses_repo import AsyncExpensesRepository, ExpensesRepository
+from src.utils.metrics import llm_batch_latency, llm_latency
 
 
-def extract_and_save(original_query: str, provider: ProviderName, model: str, settings_snapshot: Dict) -> Tuple[ExtractionResult, str, str]:
-    db = get_database()
-    ensure_indexes(db)
-    repo = ExpensesRepository(db)
+def _try_fast_path(original_query: str, provider: ProviderName, model: str) -> Tuple[Optional[ExtractionResult], Dict[str, Any]]:
+    """Run the local extractor; return a result only if it clears the confidence threshold."""
+    if not settings.fast_path_enabled:
+        return None, {}
+    started = time.perf_counter()
+    generation, categories, _, _ = get_categories_snapshot()
+    result, confidence = extract_fast(original_query, categories, generation)
+    hit = result.valid and confidence >= settings.fast_path_min_confidence
+    metrics: Dict[str, Any] = {
+        "hit": hit,
+        "confidence": confidence,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    if hit:
+        # Estimated LLM time avoided, from recent latencies of the selected model
+        saved = llm_latency.mean((provider, model))
+        metrics["est_saved_ms"] = round(saved, 1) if saved is not None else None
+    return (result if hit else None), metrics
+
+
+def _is_saveable(result: ExtractionResult) -> bool:
+    return bool(result.valid and result.amount is not None and result.category and result.subcategory and result.description)
 
-    result, debug = run_extraction(provider, model, original_query)
 
-    # Always log the attempt
+def _expense_from_result(result: ExtractionResult, provider: str, model: str, original_query: str) -> ExpenseCreate:
+    return ExpenseCreate(
+        amount=float(result.amount),
+        category=result.category,
+        subcategory=result.subcategory,
+        description=result.description,
+        datetime=to_utc(result.datetime) if isinstance(result.datetime, datetime) else datetime.utcnow(),
+        provider=provider,
+        model=model,
+        original_query=original_query,
+    )
+
+
+def _build_records(original_query: str, provider: str, model: str, settings_snapshot: Dict,
+                   result: ExtractionResult, debug: Dict[str, Any], fast_metrics: Dict[str, Any],
+                   latency_ms: float) -> Tuple[ExtractionLog, Optional[ExpenseCreate], Dict[str, Any]]:
+    """Build the extraction log, the expense to save (if any) and the per-attempt metrics."""
+    cache_metrics = debug.get("result_cache") or {}
+    if debug.get("cascade"):
+        # Attribute each tier's own latency, not the whole cascade, to its model
+        for attempt in debug["cascade"]["attempts"]:
+            if attempt["outcome"] != "error":
+                llm_latency.record((attempt["provider"], attempt["model"]), attempt["latency_ms"])
+    elif debug.get("hedge"):
+        # Each attempt's own latency; a cancelled attempt counts its elapsed time
+        # (a lower bound) so a slow primary still moves the hedge delay
+        for attempt in debug["hedge"]["attempts"]:
+            if attempt["outcome"] != "error" and not attempt.get("cached"):
+                llm_latency.record((attempt["provider"], attempt["model"]), attempt["latency_ms"])
+    elif provider != FAST_PATH_PROVIDER and not cache_metrics.get("hit"):
+        llm_latency.record((provider, model), latency_ms)
+    metrics: Dict[str, Any] = {"fast_path": fast_metrics} if fast_metrics else {}
+    if cache_metrics:
+        metrics["result_cache"] = {
+            "hit": cache_metrics.get("hit", False),
+            "saved_ms": cache_metrics.get("saved_ms"),
+            "hit_rate": cache_metrics.get("hit_rate"),
+        }
+    pruning = debug.get("categories_pruning")
+    if pruning:
+        metrics["prompt_tokens"] = {
+            "full": pruning.get("prompt_tokens_full"),
+            "sent": pruning.get("prompt_tokens_sent"),
+            "pruned": pruning.get("pruned", False),
+        }
+    resilience = debug.get("resilience") or {}
+    if resilience.get("attempts", 0) > 1 or resilience.get("failover"):
+        metrics["resilience"] = {
+            "attempts": resilience.get("attempts"),
+            "failover": resilience.get("failover"),
+        }
+    if debug.get("output_mode"):
+        metrics["output_mode"] = debug["output_mode"]
+    if debug.get("hedge"):
+        metrics["hedge"] = {k: debug["hedge"][k] for k in ("delay_ms", "hedged", "winner")}
+    if debug.get("cascade"):
+        cascade = debug["cascade"]
+        metrics["cascade"] = {
+            "tiers": cascade["tiers"],
+            "accepted_tier": cascade["accepted_tier"],
+            "chosen_tier": cascade["chosen_tier"],
+            "attempts": [
+                {k: attempt[k] for k in ("tier", "provider", "model", "latency_ms", "outcome", "problems")}
+                for attempt in cascade["attempts"]
+            ],
+        }
+
     log = ExtractionLog(
         original_query=original_query,
         provider=provider,
         model=model,
         settings_snapshot=settings_snapshot,
         extraction=result,
+        latency_ms=latency_ms,
+        metrics=metrics,
     )
-    log_id = repo.insert_log(log)
+    expense = _expense_from_result(result, provider, model, original_query) if _is_saveable(result) else None
+    return log, expense, metrics
+
 
-    expense_id = ""
-    if result.valid and result.amount is not None and result.category and result.subcategory and result.description:
-        expense = ExpenseCreate(
-            amount=float(result.amount),
-            category=result.category,
-            subcategory=result.subcategory,
-            description=result.description,
-            datetime=to_utc(result.datetime) if isinstance(result.datetime, datetime) else datetime.utcnow(),
-            provider=provider,
-            model=model,
+def _hedge_logs(original_query: str, settings_snapshot: Dict, debug: Dict[str, Any]) -> List[ExtractionLog]:
+    """Build logs for hedge attempts that did not win."""
+    hedge = debug.get("hedge")
+    if not hedge:
+        return []
+    logs: List[ExtractionLog] = []
+    for attempt in hedge["attempts"]:
+        if attempt["outcome"] == "won":
+            continue
+        if attempt.get("result"):
+            extraction = ExtractionResult(**attempt["result"])
+        else:
+            extraction = ExtractionResult(
+                valid=False,
+                provider=attempt["provider"],
+                model=attempt["model"],
+                error=attempt.get("error") or "cancelled: lost hedge race",
+            )
+        logs.append(ExtractionLog(
             original_query=original_query,
-        )
-        expense_id = repo.insert_expense(expense)
+            provider=attempt["provider"],
+            model=attempt["model"],
+            settings_snapshot=settings_snapshot,
+            extraction=extraction,
+            latency_ms=attempt.get("latency_ms"),
+            metrics={"hedge": {"role": attempt["role"], "outcome": attempt["outcome"], "winner": hedge["winner"]}},
+        ))
+    return logs
+
+
+def _cascade_logs(original_query: str, settings_snapshot: Dict, debug: Dict[str, Any]) -> List[ExtractionLog]:
+    """Build logs for cascade tiers that escalated or errored, so per-tier hit rates can be aggregated."""
+    cascade = debug.get("cascade")
+    if not cascade:
+        return []
+    logs: List[ExtractionLog] = []
+    for attempt in cascade["attempts"]:
+        if attempt["tier"] == cascade["chosen_tier"]:
+            continue
+        if attempt.get("result"):
+            extraction = ExtractionResult(**attempt["result"])
+        else:
+            extraction = ExtractionResult(
+                valid=False,
+                provider=attempt["provider"],
+                model=attempt["model"],
+                error=attempt.get("error"),
+            )
+        logs.append(ExtractionLog(
+            original_query=original_query,
+            provider=attempt["provider"],
+            model=attempt["model"],
+            settings_snapshot=settings_snapshot,
+            extraction=extraction,
+            latency_ms=attempt.get("latency_ms"),
+            metrics={"cascade": {"tier": attempt["tier"], "outcome": attempt["outcome"],
+                                 "problems": attempt["problems"], "chosen_tier": cascade["chosen_tier"]}},
+        ))
+    return logs
+
+
+def _attach_debug(result: ExtractionResult, debug: Dict[str, Any], metrics: Dict[str, Any], latency_ms: float) -> None:
+    result.raw_response = {**(result.raw_response or {}), **{"debug": {**debug, "metrics": metrics, "latency_ms": latency_ms}}}
+
+
+def extract_and_save(original_query: str, provider: ProviderName, model: str, settings_snapshot: Dict,
+                     hedge: Optional[bool] = None, cascade: Optional[bool] = None) -> Tuple[ExtractionResult, str, str]:
+    """Extract one expense (fast path, then cascade, hedged or single-model LLM call) and save it.
+
+    `hedge`/`cascade` default to the corresponding settings; the cascade wins when both are on.
+    """
+    db = get_database()
+    repo = ExpensesRepository(db)
+    hedge = settings.hedge_enabled if hedge is None else hedge
+    cascade = settings.cascade_enabled if cascade is None else cascade
+
+    started = time.perf_counter()
+    result, fast_metrics = _try_fast_path(original_query, provider, model)
+    if result is not None:
+        provider, model = FAST_PATH_PROVIDER, FAST_PATH_MODEL
+        debug: Dict[str, Any] = {}
+    elif cascade:
+        result, debug = run_extraction_cascade(provider, model, original_query)
+        provider, model = result.provider or provider, result.model or model
+    elif hedge:
+        result, debug = run_extraction_hedged(provider, model, original_query)
+        provider, model = result.provider or provider, result.model or model
+    else:
+        result, debug = run_extraction(provider, model, original_query)
+        # Failover may have answered from the alternate provider
+        provider, model = result.provider or provider, result.model or model
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    log, expense, metrics = _build_records(original_query, provider, model, settings_snapshot, result, debug, fast_metrics, latency_ms)
+    extra_logs = [*_hedge_logs(original_query, settings_snapshot, debug),
+                  *_cascade_logs(original_query, settings_snapshot, debug)]
+
+    # Always log the attempt (plus any losing hedge attempts and escalated cascade tiers)
+    log_id = repo.insert_logs_many([log, *extra_logs]).ids[0] if extra_logs else repo.insert_log(log)
+    expense_id = repo.insert_expense(expense) if expense is not None else ""
 
     # Attach debug extras
-    result.raw_response = {**(result.raw_response or {}), **{"debug": debug}}
+    _attach_debug(result, debug, metrics, latency_ms)
 
     return result, expense_id, log_id
 
 
+def extract_voice_and_save(audio_bytes: bytes, mime_type: str, provider: ProviderName, model: str,
+                           settings_snapshot: Dict) -> Tuple[str, ExtractionResult, str, str]:
+    """Turn a voice recording into a saved expense with a single multimodal Gemini call.
+
+    Uses `settings.voice_extraction_model`; when the combined reply can't be
+    parsed, falls back to transcribing and running `extract_and_save` with the
+    selected `provider`/`model`. Returns `(transcript, result, expense_id, log_id)`.
+    """
+    voice_model = settings.voice_extraction_model
+    started = time.perf_counter()
+    # Provider errors (circuit open, auth, quota) propagate: a second Gemini call would fail the same way
+    try:
+        transcript, result, debug = run_voice_extraction(audio_bytes, mime_type, voice_model)
+    except ValueError as e:
+        # Unusable reply (e.g. blocked response, invalid fields)
+        transcript, debug = "", {}
+        result = ExtractionResult(valid=False, missing_fields=["amount"], provider="gemini", model=voice_model,
+                                  error=f"Voice extraction failed: {e}"[:300])
+    if not transcript:
+        # Keep the failed single-call attempt in extraction_logs before paying for the fallback
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        log, _, _ = _build_records("", "gemini", voice_model, settings_snapshot, result, debug, {}, latency_ms)
+        log.metrics["voice"] = {"single_call": True, "fallback": True, "audio_bytes": len(audio_bytes)}
+        ExpensesRepository(get_database()).insert_log(log)
+        transcript = transcribe_with_gemini(audio_bytes=audio_bytes, mime_type=mime_type, model=voice_model)
+        if not transcript:
+            raise ValueError("No transcription returned")
+        result, expense_id, log_id = extract_and_save(transcript, provider, model, settings_snapshot)
+        result.raw_response = {**(result.raw_response or {}), "voice": {"single_call": False, "fallback": True}}
+        return transcript, result, expense_id, log_id
+
+    db = get_database()
+    repo = ExpensesRepository(db)
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    log, expense, metrics = _build_records(transcript, "gemini", voice_model, settings_snapshot, result, debug, {}, latency_ms)
+    metrics["voice"] = {"single_call": True, "audio_bytes": len(audio_bytes)}
+    log_id = repo.insert_log(log)
+    expense_id = repo.insert_expense(expense) if expense is not None else ""
+    _attach_debug(result, debug, metrics, latency_ms)
+    return transcript, result, expense_id, log_id
+
+
+async def extract_and_save_async(original_query: str, provider: ProviderName, model: str, settings_snapshot: Dict,
+                                 hedge: Optional[bool] = None, cascade: Optional[bool] = None) -> Tuple[ExtractionResult, str, str]:
+    """Async `extract_and_save` for bulk imports, CLIs and HTTP ingestion.
+
+    Uses `run_extraction_async` (bounded by `settings.max_concurrent_extractions`)
+    and the async Mongo client when PyMongo provides one; otherwise the sync
+    repository runs in a worker thread.
+    """
+    hedge = settings.hedge_enabled if hedge is None else hedge
+    cascade = settings.cascade_enabled if cascade is None else cascade
+    started = time.perf_counter()
+    result, fast_metrics = await asyncio.to_thread(_try_fast_path, original_query, provider, model)
+    if result is not None:
+        provider, model = FAST_PATH_PROVIDER, FAST_PATH_MODEL
+        debug: Dict[str, Any] = {}
+    elif cascade:
+        result, debug = await run_extraction_cascade_async(provider, model, original_query)
+        provider, model = result.provider or provider, result.model or model
+    elif hedge:
+        result, debug = await run_extraction_hedged_async(provider, model, original_query)
+        provider, model = result.provider or provider, result.model or model
+    else:
+        result, debug = await run_extraction_async(provider, model, original_query)
+        provider, model = result.provider or provider, result.model or model
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    log, expense, metrics = _build_records(original_query, provider, model, settings_snapshot, result, debug, fast_metrics, latency_ms)
+    logs = [log, *_hedge_logs(original_query, settings_snapshot, debug), *_cascade_logs(original_query, settings_snapshot, debug)]
+
+    async_db = get_async_database()
+    if async_db is not None:
+        async_repo = AsyncExpensesRepository(async_db)
+        log_id = (await async_repo.insert_logs_many(logs)).ids[0]
+        expense_id = await async_repo.insert_expense(expense) if expense is not None else ""
+    else:
+        def _save() -> Tuple[str, str]:
+            repo = ExpensesRepository(get_database())
+            saved_log_id = repo.insert_logs_many(logs).ids[0]
+            return saved_log_id, (repo.insert_expense(expense) if expense is not None else "")
+        log_id, expense_id = await asyncio.to_thread(_save)
+
+    _attach_debug(result, debug, metrics, latency_ms)
+    return result, expense_id, log_id
+
+
+async def extract_and_save_many_async(queries: List[str], provider: ProviderName, model: str, settings_snapshot: Dict) -> List[Tuple[ExtractionResult, str, str]]:
+    """Run `extract_and_save_async` for every query concurrently (provider calls stay bounded)."""
+    return list(await asyncio.gather(*(
+        extract_and_save_async(query, provider, model, settings_snapshot) for query in queries
+    )))
+
+
+def extract_and_save_batch(queries: List[str], provider: ProviderName, model: str, settings_snapshot: Dict) -> List[Tuple[ExtractionResult, str, str]]:
+    """Extract and save many expense lines with one LLM call and bulk writes.
+
+    Lines the fast path handles are resolved locally; the rest go through
+    `run_extraction_batch`. Logs and expenses are written with unordered
+    bulk writes. Returns `(result, expense_id, log_id)` per non-empty line.
+    """
+    queries = [q.strip() for q in queries if q and q.strip()]
+    if not queries:
+        return []
+    db = get_database()
+    repo = ExpensesRepository(db)
+
+    started = time.perf_counter()
+    results: List[Optional[ExtractionResult]] = [None] * len(queries)
+    item_metrics: List[Dict[str, Any]] = [{} for _ in queries]
+    pending: List[int] = []
+    for i, query in enumerate(queries):
+        fast_result, fast_metrics = _try_fast_path(query, provider, model)
+        if fast_metrics:
+            item_metrics[i]["fast_path"] = fast_metrics
+        if fast_result is not None:
+            results[i] = fast_result
+        else:
+            pending.append(i)
+
+    debug: Dict[str, Any] = {}
+    if pending:
+        batch_results, debug = run_extraction_batch(provider, model, [queries[i] for i in pending])
+        cache_hits = set(debug.get("result_cache_hits", []))
+        fallbacks = set(debug.get("fallbacks", []))
+        for n, (i, result) in enumerate(zip(pending, batch_results)):
+            results[i] = result
+            item_metrics[i]["batch"] = {
+                "size": len(pending),
+                "llm_items": debug.get("llm_items", 0),
+                "llm_ms": debug.get("llm_ms"),
+                "result_cache_hit": n in cache_hits,
+                "fallback": n in fallbacks,
+                "prompt_tokens": debug.get("categories_pruning"),
+            }
+        if debug.get("llm_ms") is not None:
+            llm_batch_latency.record((provider, model), debug["llm_ms"])
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    # Logs get an amortized per-line share; the whole batch time stays in metrics["batch"]
+    item_latency_ms = round(latency_ms / len(queries), 3)
+    for metrics in item_metrics:
+        metrics["batch"] = {**metrics.get("batch", {}), "batched": True, "lines": len(queries),
+                            "batch_latency_ms": latency_ms}
+
+    logs: List[ExtractionLog] = []
+    expenses: List[ExpenseCreate] = []
+    expense_positions: List[int] = []
+    for i, (query, result) in enumerate(zip(queries, results)):
+        item_provider = result.provider or provider
+        item_model = result.model or model
+        logs.append(ExtractionLog(
+            original_query=query,
+            provider=item_provider,
+            model=item_model,
+            settings_snapshot=settings_snapshot,
+            extraction=result,
+            latency_ms=item_latency_ms,
+            metrics=item_metrics[i],
+        ))
+        if _is_saveable(result):
+            expenses.append(_expense_from_result(result, item_provider, item_model, query))
+            expense_positions.append(i)
+
+    log_ids = repo.insert_logs_many(logs).ids
+    expense_ids = [""] * len(queries)
+    for i, expense_id in zip(expense_positions, repo.insert_many_expenses(expenses).ids):
+        expense_ids[i] = expense_id
+
+    batch_debug = {k: v for k, v in debug.items() if k != "prompt_output"}
+    out: List[Tuple[ExtractionResult, str, str]] = []
+    for i, result in enumerate(results):
+        result.raw_response = {**(result.raw_response or {}), "debug": {"batch": batch_debug, "metrics": item_metrics[i], "latency_ms": item_latency_ms}}
+        out.append((result, expense_ids[i], log_ids[i]))
+    return out
+
+
 def delete_expense(expense_id: str) -> bool:
     """Delete an expense by ID."""
     db = get_database()
-    ensure_indexes(db)
     repo = ExpensesRepository(db)
     return repo.delete_expense(expense_id)
 
@@ -64,7 +418,6 @@ def delete_expense(expense_id: str) -> bool:
 def update_expense(expense_id: str, updates: ExpenseUpdate) -> Optional[Dict[str, Any]]:
     """Update an expense by ID."""
     db = get_database()
-    ensure_indexes(db)
     repo = ExpensesRepository(db)
     return repo.update_expense(expense_id, updates)
 
@@ -72,7 +425,6 @@ def update_expense(expense_id: str, updates: ExpenseUpdate) -> Optional[Dict[str
 def get_expense_by_id(expense_id: str) -> Optional[Dict[str, Any]]:
     """Get an expense by ID."""
     db = get_database()
-    ensure_indexes(db)
     repo = ExpensesRepository(db)
     return repo.get_expense_by_id(expense_id)
 
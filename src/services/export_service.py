@@ -0,0 +1,289 @@
+"""
+Streaming expense export to CSV, JSONL or Parquet.
+
+Expenses are read through `ExpensesRepository.iter_expenses` (projected
+fields, `settings.export_batch_size` documents per cursor round trip) and
+written one batch at a time, so memory is bounded by the batch size rather
+than the collection size. Datetimes are converted to IST per batch:
+with NumPy as one datetime64 shift + format per column, with pyarrow (Parquet)
+as a timezone-aware timestamp column. Without NumPy the same conversion runs
+row by row.
+
+    python -m src.services.export_service expenses.csv
+    python -m src.services.export_service expenses.parquet --category "Food & Dining" --start 2024-01-01 --end 2024-12-31
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from src.config.settings import settings
+from src.db.mongo import get_database
+from src.repositories.expenses_repo import ExpensesRepository
+from src.utils.datetime_utils import UTC, parse_iso_datetime, to_ist
+from src.utils.logger import logger
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+FORMATS = ("csv", "jsonl", "parquet")
+MIME_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+DEFAULT_FIELDS = ["datetime", "amount", "category", "subcategory", "description", "provider", "model",
+                  "original_query", "created_at"]
+DATETIME_FIELDS = {"datetime", "created_at", "updated_at"}
+# IST has no DST, so a fixed offset converts UTC exactly
+_IST_OFFSET = timedelta(hours=5, minutes=30)
+_IST_SUFFIX = "+05:30"
+
+
+class ExportStats(BaseModel):
+    format: str
+    rows: int = 0
+    batches: int = 0
+    bytes: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def rows_per_s(self) -> Optional[float]:
+        return round(self.rows / self.elapsed_s, 1) if self.elapsed_s else None
+
+
+def _batches(docs: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _naive_utc(value: Any) -> Optional[datetime]:
+    """Mongo returns naive UTC datetimes; aware ones (and ISO strings) are normalized to that."""
+    if isinstance(value, str):
+        value = parse_iso_datetime(value)
+    if not isinstance(value, datetime):
+        return None
+    return value.astimezone(UTC).replace(tzinfo=None) if value.tzinfo else value
+
+
+def ist_strings(values: Sequence[Any]) -> List[str]:
+    """ISO-8601 IST strings ('' for missing) for a column of UTC datetimes."""
+    naive = [_naive_utc(v) for v in values]
+    if np is None:
+        return [to_ist(v.replace(tzinfo=UTC)).isoformat(timespec="seconds") if v else "" for v in naive]
+    shifted = np.array(naive, dtype="datetime64[s]") + np.timedelta64(int(_IST_OFFSET.total_seconds()), "s")
+    text = np.char.add(np.datetime_as_string(shifted, unit="s"), _IST_SUFFIX)
+    return np.where(np.isnat(shifted), "", text).tolist()
+
+
+def _columns(batch: List[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, List[Any]]:
+    columns: Dict[str, List[Any]] = {"id": [str(doc.get("_id", "")) for doc in batch]}
+    for field in fields:
+        columns[field] = [doc.get(field) for doc in batch]
+    return columns
+
+
+def _text_columns(batch: List[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, List[Any]]:
+    columns = _columns(batch, fields)
+    for field in fields:
+        if field in DATETIME_FIELDS:
+            columns[field] = ist_strings(columns[field])
+    return columns
+
+
+def _rows(columns: Dict[str, List[Any]]) -> Iterator[Tuple[Any, ...]]:
+    return zip(*columns.values())
+
+
+class _TextSink:
+    """UTF-8 text writer over a binary stream that counts bytes and leaves the stream open."""
+
+    def __init__(self, out: BinaryIO):
+        self._out = out
+        self.bytes = 0
+
+    def write(self, text: str) -> int:
+        data = text.encode("utf-8")
+        self._out.write(data)
+        self.bytes += len(data)
+        return len(text)
+
+
+def _write_csv(batches: Iterable[List[Dict[str, Any]]], fields: Sequence[str], out: BinaryIO,
+               on_batch: Callable[[int], int]) -> int:
+    sink = _TextSink(out)
+    writer = csv.writer(sink)
+    writer.writerow(["id", *fields])
+    for batch in batches:
+        writer.writerows(_rows(_text_columns(batch, fields)))
+        on_batch(len(batch))
+    return sink.bytes
+
+
+def _write_jsonl(batches: Iterable[List[Dict[str, Any]]], fields: Sequence[str], out: BinaryIO,
+                 on_batch: Callable[[int], int]) -> int:
+    sink = _TextSink(out)
+    names = ["id", *fields]
+    for batch in batches:
+        lines = (json.dumps(dict(zip(names, row)), ensure_ascii=False, default=str)
+                 for row in _rows(_text_columns(batch, fields)))
+        sink.write("\n".join(lines) + "\n")
+        on_batch(len(batch))
+    return sink.bytes
+
+
+def _arrow_table(batch: List[Dict[str, Any]], fields: Sequence[str]) -> Any:
+    columns = _columns(batch, fields)
+    arrays = {}
+    for name, values in columns.items():
+        if name in DATETIME_FIELDS:
+            # Stored as UTC instants tagged with IST, so readers show local times
+            arrays[name] = pa.array([_naive_utc(v) for v in values], type=pa.timestamp("ms")).cast(
+                pa.timestamp("ms", tz="Asia/Kolkata"))
+        elif name == "amount":
+            arrays[name] = pa.array([float(v) if v is not None else None for v in values], type=pa.float64())
+        else:
+            arrays[name] = pa.array([str(v) if v is not None else None for v in values], type=pa.string())
+    return pa.table(arrays)
+
+
+def _write_parquet(batches: Iterable[List[Dict[str, Any]]], fields: Sequence[str], out: BinaryIO,
+                   on_batch: Callable[[int], int]) -> int:
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    start = out.tell() if out.seekable() else 0
+    writer = None
+    try:
+        for batch in batches:
+            table = _arrow_table(batch, fields)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression="zstd")
+            # One row group per batch
+            writer.write_table(table)
+            on_batch(len(batch))
+        if writer is None:
+            writer = pq.ParquetWriter(out, _arrow_table([{}], fields).slice(0, 0).schema, compression="zstd")
+    finally:
+        if writer is not None:
+            writer.close()
+    return out.tell() - start if out.seekable() else 0
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def format_for(path: Path) -> str:
+    suffix = path.suffix.lower().lstrip(".")
+    fmt = {"ndjson": "jsonl", "pq": "parquet"}.get(suffix, suffix)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{suffix}' (expected one of {', '.join(FORMATS)})")
+    return fmt
+
+
+def export_expenses(
+    out: BinaryIO,
+    fmt: str = "csv",
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    start_end_utc: Optional[Tuple] = None,
+    fields: Optional[Sequence[str]] = None,
+    batch_size: Optional[int] = None,
+    repo: Optional[ExpensesRepository] = None,
+    on_progress: Optional[Callable[[ExportStats], None]] = None,
+) -> ExportStats:
+    """Write matching expenses to the binary stream `out`; returns row/byte counts and rows/s."""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of {', '.join(FORMATS)})")
+    fields = list(fields or DEFAULT_FIELDS)
+    size = max(1, int(batch_size or settings.export_batch_size))
+    repo = repo or ExpensesRepository(get_database())
+    stats = ExportStats(format=fmt)
+    started = time.perf_counter()
+
+    def on_batch(rows: int) -> int:
+        stats.rows += rows
+        stats.batches += 1
+        stats.elapsed_s = round(time.perf_counter() - started, 3)
+        if on_progress:
+            on_progress(stats)
+        return stats.rows
+
+    docs = repo.iter_expenses(category, subcategory, start_end_utc, fields=fields, batch_size=size)
+    stats.bytes = _WRITERS[fmt](_batches(docs, size), fields, out, on_batch)
+    stats.elapsed_s = round(time.perf_counter() - started, 3)
+    logger.info("Expenses exported", {**stats.model_dump(), "rows_per_s": stats.rows_per_s})
+    return stats
+
+
+def export_bytes(fmt: str = "csv", **filters: Any) -> Tuple[bytes, ExportStats]:
+    """Export into memory for a Streamlit download button (the browser download needs the whole payload)."""
+    buffer = io.BytesIO()
+    stats = export_expenses(buffer, fmt, **filters)
+    return buffer.getvalue(), stats
+
+
+def _day_bounds(start: Optional[str], end: Optional[str]) -> Optional[Tuple[datetime, datetime]]:
+    if not start and not end:
+        return None
+    low = parse_iso_datetime(start) if start else datetime(1970, 1, 1, tzinfo=UTC)
+    high = parse_iso_datetime(end) if end else datetime.now(tz=UTC)
+    if low is None or high is None:
+        raise ValueError("--start/--end must be ISO dates, e.g. 2024-01-31")
+    if end and len(end) <= 10:
+        high += timedelta(days=1) - timedelta(microseconds=1)  # inclusive end day
+    return low, high
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("path", type=Path, help="output file; the extension picks the format (.csv/.jsonl/.parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="override the format implied by the extension")
+    parser.add_argument("--category")
+    parser.add_argument("--subcategory")
+    parser.add_argument("--start", help="first day (IST, inclusive), e.g. 2024-01-01")
+    parser.add_argument("--end", help="last day (IST, inclusive)")
+    parser.add_argument("--fields", help=f"comma-separated fields (default: {','.join(DEFAULT_FIELDS)})")
+    parser.add_argument("--batch-size", type=int, help="documents per cursor batch (default: settings.export_batch_size)")
+    args = parser.parse_args(argv)
+
+    try:
+        fmt = args.format or format_for(args.path)
+        bounds = _day_bounds(args.start, args.end)
+        fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+        with open(args.path, "wb") as out:
+            stats = export_expenses(
+                out, fmt, args.category, args.subcategory, bounds, fields, args.batch_size,
+                on_progress=lambda s: print(f"{s.rows} rows ({s.rows_per_s} rows/s)", end="\r", flush=True),
+            )
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"export failed: {e}", file=sys.stderr)
+        return 1
+    print(f"exported {stats.rows} rows, {stats.bytes} bytes to {args.path} "
+          f"in {stats.elapsed_s:.2f}s ({stats.rows_per_s} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,596 @@
+"""
+Streaming CSV/XLSX expense import.
+
+Files are read row by row and processed in chunks of
+`settings.import_chunk_size`, so memory stays flat for any file size. Per row:
+a category column that names a known category/subcategory is mapped directly;
+otherwise the fast path classifies the description when it finds exactly one
+category match; only the remaining rows go to the LLM, several lines per call
+(`run_extraction_batch`) with at most `settings.import_max_concurrency` calls
+in flight. Amount and date columns always win over extracted values; without
+a date column a row needs a date in its text, or it fails instead of being
+dated "today". With one signed amount column (negative debits, detected from
+the first rows or set with --amount-sign), positive rows are skipped as credits.
+
+Each chunk is written with one unordered bulk insert and then checkpointed.
+Expense ids are derived from the file fingerprint and row number, so re-running
+a chunk after a crash reports its rows as duplicates instead of inserting them
+twice, and a resumed import starts after the last checkpointed chunk.
+
+    python -m src.services.import_service statement.csv --provider openai --model gpt-4o-mini
+    python -m src.services.import_service export.xlsx --sheet Expenses --map description=Notes --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pydantic import BaseModel, Field
+
+from src.ai.chains import get_categories_snapshot, run_extraction_batch
+from src.ai.fast_path import FAST_PATH_MODEL, FAST_PATH_PROVIDER, extract_fast
+from src.ai.providers import ProviderName
+from src.config.settings import settings
+from src.db.indexes import ensure_indexes
+from src.db.mongo import get_database
+from src.models.category import CategoryModel
+from src.models.expense import ExpenseCreate, ExtractionLog, ExtractionResult
+from src.repositories.expenses_repo import ExpensesRepository
+from src.utils.datetime_utils import IST, parse_iso_datetime, resolve_datetime, to_utc
+from src.utils.logger import logger
+
+try:
+    import openpyxl  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    openpyxl = None  # type: ignore
+
+IMPORT_PROVIDER = "import"
+IMPORT_MODEL = "column-mapping"
+
+FIELDS = ("date", "description", "amount", "debit", "credit", "category", "subcategory")
+
+# Lower-cased header names recognised per field (common bank statement exports included).
+# "Type" (debit/credit) and "Time" (time of day next to a date column) are deliberately absent.
+_COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "date": ("date", "datetime", "txn date", "transaction date", "value date", "posting date", "when"),
+    "description": ("description", "narration", "particulars", "details", "remarks", "memo", "note", "notes",
+                    "item", "text", "transaction details"),
+    "amount": ("amount", "amt", "amount (inr)", "amount (rs)", "value", "price", "cost", "spent"),
+    "debit": ("debit", "withdrawal", "withdrawal amt.", "withdrawal amount", "debit amount", "dr"),
+    "credit": ("credit", "deposit", "deposit amt.", "deposit amount", "credit amount", "cr"),
+    "category": ("category",),
+    "subcategory": ("subcategory", "sub category", "sub-category"),
+}
+# Rows scanned for the header (statements often start with account details)
+_HEADER_SCAN_ROWS = 30
+_AMOUNT = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_CREDIT_MARK = re.compile(r"\bcr\b\.?\s*$", re.IGNORECASE)
+# "-1,250.00", "Rs. -40", "-₹40" and accounting-style "(1,250.00)"
+_NEGATIVE = re.compile(r"^\s*\(.*\d.*\)\s*$|[-\u2212]\s*(?:rs\.?|inr|\u20b9)?\s*\d", re.IGNORECASE)
+# Data rows read ahead to tell whether a single amount column is signed
+_SIGN_SCAN_ROWS = 200
+# Tried after ISO when no --date-format is given; numeric day-first dates fall through to resolve_datetime
+_DATE_FORMATS = ("%d-%b-%Y", "%d-%b-%y", "%d %b %Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M")
+# ColumnMapping entries that are settings rather than columns
+_OPTIONS = ("date_format", "amount_sign")
+# Last error messages kept on the progress record
+_MAX_ERRORS = 20
+
+
+class ColumnMapping(BaseModel):
+    """Source column (header text) per expense field; None when the file has no such column."""
+    date: Optional[str] = None
+    description: Optional[str] = None
+    amount: Optional[str] = None
+    debit: Optional[str] = None
+    credit: Optional[str] = None
+    category: Optional[str] = None
+    subcategory: Optional[str] = None
+    date_format: Optional[str] = None
+    # "signed": negative amounts are expenses and positive ones credits; None = detect from the first rows
+    amount_sign: Optional[str] = None
+
+
+class ImportProgress(BaseModel):
+    """Counters of one import; also the checkpoint persisted after every chunk."""
+    source: str
+    fingerprint: str
+    rows_done: int = 0  # data rows processed, i.e. where a resumed run starts
+    inserted: int = 0
+    duplicates: int = 0
+    mapped: int = 0
+    fast_path: int = 0
+    llm_rows: int = 0
+    skipped: int = 0
+    failed: int = 0
+    chunks: int = 0
+    completed: bool = False
+    errors: List[str] = Field(default_factory=list)
+    # Current run only
+    run_rows: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def rows_per_s(self) -> Optional[float]:
+        return round(self.run_rows / self.elapsed_s, 1) if self.elapsed_s else None
+
+    def add_error(self, message: str) -> None:
+        self.errors = (self.errors + [message])[-_MAX_ERRORS:]
+
+
+def detect_mapping(header: Sequence[Any], overrides: Optional[Dict[str, str]] = None) -> ColumnMapping:
+    """Match header cells against `_COLUMN_ALIASES`; `overrides` ({field: column}) take precedence."""
+    names = [str(cell).strip() if cell is not None else "" for cell in header]
+    found: Dict[str, str] = {}
+    for field in FIELDS:
+        for name in names:
+            if name and name.lower() in _COLUMN_ALIASES[field] and name not in found.values():
+                found[field] = name
+                break
+    for field, column in (overrides or {}).items():
+        if field not in FIELDS and field not in _OPTIONS:
+            raise ValueError(f"Unknown import field '{field}' (expected one of {', '.join(FIELDS)})")
+        if field == "amount_sign" and column not in ("signed", "unsigned"):
+            raise ValueError(f"amount_sign must be 'signed' or 'unsigned', not '{column}'")
+        if field not in _OPTIONS and column not in names:
+            raise ValueError(f"Column '{column}' not found in header: {names}")
+        found[field] = column
+    return ColumnMapping(**found)
+
+
+def _recognised(row: Sequence[Any]) -> int:
+    aliases = {alias for names in _COLUMN_ALIASES.values() for alias in names}
+    return sum(1 for cell in row if cell is not None and str(cell).strip().lower() in aliases)
+
+
+def _csv_rows(path: Path) -> Iterator[List[Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        yield from csv.reader(handle)
+
+
+def _xlsx_rows(path: Path, sheet: Optional[str]) -> Iterator[List[Any]]:
+    if openpyxl is None:
+        raise RuntimeError("Reading .xlsx files requires openpyxl (pip install openpyxl)")
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = book[sheet] if sheet else book.active
+        for row in worksheet.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        book.close()
+
+
+def open_rows(
+    path: Path, overrides: Optional[Dict[str, str]] = None, sheet: Optional[str] = None
+) -> Tuple[ColumnMapping, Iterator[Tuple[int, Dict[str, Any]]]]:
+    """Find the header row and return `(mapping, rows)`.
+
+    `rows` lazily yields `(row_number, {column: value})` for every data row;
+    row numbers count data rows from 0, so they are stable across runs and
+    usable as resume positions.
+    """
+    raw = _xlsx_rows(path, sheet) if path.suffix.lower() in (".xlsx", ".xlsm") else _csv_rows(path)
+    header: Optional[List[str]] = None
+    for _ in range(_HEADER_SCAN_ROWS):
+        row = next(raw, None)
+        if row is None:
+            break
+        if _recognised(row) >= 2:
+            header = [str(cell).strip() if cell is not None else "" for cell in row]
+            break
+    if header is None:
+        raise ValueError(f"No header row with recognisable columns in the first {_HEADER_SCAN_ROWS} rows of {path}")
+    mapping = detect_mapping(header, overrides)
+    if not (mapping.amount or mapping.debit or mapping.description):
+        raise ValueError(f"Need an amount, debit or description column; header was {header}")
+
+    def records() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        number = 0
+        for row in raw:
+            if not any(cell not in (None, "") for cell in row):
+                continue
+            yield number, dict(zip(header, row))
+            number += 1
+
+    rows = records()
+    if mapping.amount and not (mapping.debit or mapping.credit) and mapping.amount_sign is None:
+        # Bank exports with one amount column mark debits negative; then positive rows are credits
+        head = list(islice(rows, _SIGN_SCAN_ROWS))
+        signed = any(is_negative_amount(record.get(mapping.amount)) for _, record in head)
+        mapping.amount_sign = "signed" if signed else "unsigned"
+        rows = chain(head, rows)
+    return mapping, rows
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """First number in a cell ('1,250.00', 'Rs. 40', 12.5); None if there is none."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return abs(float(value))
+    match = _AMOUNT.search(str(value or ""))
+    return float(match.group(0).replace(",", "")) if match else None
+
+
+def is_negative_amount(value: Any) -> bool:
+    """Whether an amount cell carries a minus sign (or accounting parentheses)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value < 0
+    return bool(_NEGATIVE.search(str(value or "")))
+
+
+def parse_date(value: Any, date_format: Optional[str] = None, now: Optional[datetime] = None) -> Optional[datetime]:
+    """UTC datetime for a date cell, or None. Date-only values are taken as noon IST."""
+    if isinstance(value, datetime):
+        return to_utc(value)
+    if isinstance(value, date):
+        return to_utc(datetime.combine(value, dt_time(12, 0), tzinfo=IST))
+    text = str(value or "").strip()
+    if not text:
+        return None
+    for fmt in ((date_format,) if date_format else ()) + _DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return to_utc(parsed if "%H" in fmt else parsed.replace(hour=12))
+    if date_format:
+        return None
+    parsed = parse_iso_datetime(text)
+    if parsed is not None:
+        return parsed
+    # Anchored at noon so dates without a time are stable across runs
+    anchor = (now or datetime.now(tz=IST)).replace(hour=12, minute=0, second=0, microsecond=0)
+    when, matched = resolve_datetime(text, anchor, date_hint=True)
+    return to_utc(when) if matched else None
+
+
+def file_fingerprint(path: Path) -> str:
+    """sha1 of the size and first 1 MiB: identifies a file for checkpoints and deterministic ids."""
+    digest = hashlib.sha1(str(path.stat().st_size).encode())
+    with open(path, "rb") as handle:
+        digest.update(handle.read(1 << 20))
+    return digest.hexdigest()
+
+
+def _row_id(fingerprint: str, number: int) -> ObjectId:
+    return ObjectId(hashlib.sha1(f"{fingerprint}:{number}".encode()).digest()[:12])
+
+
+def _checkpoint_path(fingerprint: str) -> Path:
+    return Path(settings.import_checkpoint_dir) / f"{fingerprint}.json"
+
+
+def load_checkpoint(fingerprint: str) -> Optional[ImportProgress]:
+    path = _checkpoint_path(fingerprint)
+    if not path.exists():
+        return None
+    try:
+        return ImportProgress(**json.loads(path.read_text(encoding="utf-8")))
+    except Exception as e:
+        logger.warning("Ignoring unreadable import checkpoint", {"path": str(path), "error": str(e)})
+        return None
+
+
+def save_checkpoint(progress: ImportProgress) -> None:
+    """Write the checkpoint atomically (temp file + rename) so a crash never leaves it half-written."""
+    path = _checkpoint_path(progress.fingerprint)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(progress.model_dump_json(exclude={"run_rows", "elapsed_s"}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class _Row(BaseModel):
+    number: int
+    description: str = ""
+    amount: Optional[float] = None
+    when: Optional[datetime] = None
+    category: Optional[str] = None
+    subcategory: Optional[str] = None
+
+
+def _to_row(number: int, record: Dict[str, Any], mapping: ColumnMapping, now: datetime) -> Tuple[Optional[_Row], Optional[str]]:
+    """Normalise one record; `(None, reason)` when the row is not an expense or can't be read."""
+    def cell(column: Optional[str]) -> Any:
+        return record.get(column) if column else None
+
+    amount = None
+    if mapping.debit or mapping.credit:
+        amount = parse_amount(cell(mapping.debit))
+        if not amount and parse_amount(cell(mapping.credit)):
+            return None, "credit"
+    if amount is None and mapping.amount:
+        raw_amount = cell(mapping.amount)
+        if _CREDIT_MARK.search(str(raw_amount or "")):
+            return None, "credit"
+        amount = parse_amount(raw_amount)
+        if amount and mapping.amount_sign == "signed" and not is_negative_amount(raw_amount):
+            return None, "credit"
+    description = " ".join(str(cell(mapping.description) or "").split())
+    if not amount and not description:
+        return None, "empty"
+
+    when = None
+    raw_date = cell(mapping.date)
+    if raw_date not in (None, ""):
+        when = parse_date(raw_date, mapping.date_format, now)
+        if when is None:
+            return None, f"row {number}: unreadable date {raw_date!r}"
+    category = str(cell(mapping.category) or "").strip() or None
+    subcategory = str(cell(mapping.subcategory) or "").strip() or None
+    return _Row(number=number, description=description, amount=amount or None, when=when,
+                category=category, subcategory=subcategory), None
+
+
+def _taxonomy(categories: List[CategoryModel]) -> Dict[str, Tuple[str, Dict[str, str]]]:
+    return {c.name.lower(): (c.name, {s.name.lower(): s.name for s in c.subcategories}) for c in categories}
+
+
+def _direct_category(row: _Row, taxonomy: Dict[str, Tuple[str, Dict[str, str]]]) -> Optional[Tuple[str, str]]:
+    """Category/subcategory taken straight from the file's columns when both name known entries."""
+    known = taxonomy.get((row.category or "").lower())
+    if known is None:
+        return None
+    name, subcategories = known
+    subcategory = subcategories.get((row.subcategory or "").lower())
+    return (name, subcategory) if subcategory else None
+
+
+def _fast_category(row: _Row, categories: List[CategoryModel], generation: int,
+                   now: Optional[datetime] = None) -> Optional[ExtractionResult]:
+    """Fast-path result, only when exactly one category from its keyword index matches.
+
+    Relative dates in the text are anchored to the row's date, else to `now`.
+    """
+    if not settings.fast_path_enabled or not row.description:
+        return None
+    result, _ = extract_fast(row.description, categories, generation, now=row.when or now)
+    matches = (result.raw_response or {}).get("fast_path", {}).get("matches") or []
+    if len({tuple(m) for m in matches}) != 1 or not (result.category and result.subcategory):
+        return None
+    return result
+
+
+def _llm_text(row: _Row) -> str:
+    if row.amount is not None and parse_amount(row.description) != row.amount:
+        return f"{row.description} {row.amount:g}".strip()
+    return row.description
+
+
+def _extract_rows(
+    rows: List[_Row], provider: ProviderName, model: str, executor: ThreadPoolExecutor,
+    now: Optional[datetime] = None,
+) -> List[Tuple[_Row, Optional[ExtractionResult], dict, Optional[str]]]:
+    """Batched LLM extraction; sub-batches run concurrently on `executor`."""
+    size = max(1, int(settings.import_llm_batch_size))
+    batches = [rows[i:i + size] for i in range(0, len(rows), size)]
+    futures = [executor.submit(run_extraction_batch, provider, model, [_llm_text(r) for r in batch], now)
+               for batch in batches]
+    out: List[Tuple[_Row, Optional[ExtractionResult], dict, Optional[str]]] = []
+    for batch, future in zip(batches, futures):
+        try:
+            results, debug = future.result()
+        except Exception as e:
+            out.extend((row, None, {}, str(e)) for row in batch)
+            continue
+        out.extend((row, result, debug, None) for row, result in zip(batch, results))
+    return out
+
+
+def _text_date(row: _Row, result: Optional[ExtractionResult]) -> Optional[datetime]:
+    """Extracted datetime for a row without a date cell, only when its text says when.
+
+    Otherwise the extraction's datetime is just the import time, which would
+    date every row of an undated file "today".
+    """
+    if result is None or not isinstance(result.datetime, datetime):
+        return None
+    hint = (result.raw_response or {}).get("date")
+    if (isinstance(hint, str) and hint.strip()) or resolve_datetime(row.description)[1]:
+        return to_utc(result.datetime)
+    return None
+
+
+def _expense(row: _Row, category: str, subcategory: str, provider: str, model: str,
+             result: Optional[ExtractionResult] = None) -> Optional[ExpenseCreate]:
+    amount = row.amount if row.amount is not None else (result.amount if result else None)
+    when = row.when or _text_date(row, result)
+    description = row.description or (result.description if result else "") or ""
+    if amount is None or when is None or not description:
+        return None
+    return ExpenseCreate(amount=float(amount), category=category, subcategory=subcategory, description=description,
+                         datetime=when, provider=provider, model=model, original_query=row.description or description)
+
+
+def _process_chunk(
+    rows: List[_Row], progress: ImportProgress, repo: Optional[ExpensesRepository], provider: ProviderName,
+    model: str, executor: ThreadPoolExecutor, source: str, now: Optional[datetime] = None,
+) -> None:
+    generation, categories, _, _ = get_categories_snapshot()
+    taxonomy = _taxonomy(categories)
+    expenses: List[ExpenseCreate] = []
+    ids: List[ObjectId] = []
+    logs: List[ExtractionLog] = []
+    pending: List[_Row] = []
+
+    def add(row: _Row, expense: Optional[ExpenseCreate]) -> bool:
+        if expense is None:
+            progress.failed += 1
+            progress.add_error(f"row {row.number}: missing amount, date or description")
+            return False
+        expenses.append(expense)
+        ids.append(_row_id(progress.fingerprint, row.number))
+        return True
+
+    for row in rows:
+        direct = _direct_category(row, taxonomy)
+        fast = None if direct else _fast_category(row, categories, generation, now)
+        if direct:
+            progress.mapped += add(row, _expense(row, *direct, IMPORT_PROVIDER, IMPORT_MODEL))
+        elif fast:
+            row.when = row.when or _text_date(row, fast)
+            progress.fast_path += add(row, _expense(row, fast.category, fast.subcategory, FAST_PATH_PROVIDER, FAST_PATH_MODEL))
+        else:
+            pending.append(row)
+
+    progress.llm_rows += len(pending)
+    if pending and repo is not None:
+        for row, result, debug, error in _extract_rows(pending, provider, model, executor, now):
+            if result is None or not (result.valid and result.category and result.subcategory):
+                progress.failed += 1
+                progress.add_error(f"row {row.number}: {error or (result.error if result else None) or 'not extracted'}")
+            else:
+                add(row, _expense(row, result.category, result.subcategory, provider, model, result))
+            if result is not None:
+                logs.append(ExtractionLog(
+                    original_query=_llm_text(row), provider=provider, model=model,
+                    settings_snapshot={"import": source}, extraction=result,
+                    metrics={"import": {"row": row.number, "batch": debug.get("items")}},
+                ))
+
+    if repo is None or not expenses:
+        return
+    result = repo.insert_many_expenses(expenses, ids=ids)
+    duplicates = sum(1 for e in result.errors if e.code == 11000)
+    progress.inserted += result.inserted
+    progress.duplicates += duplicates
+    progress.failed += len(result.errors) - duplicates
+    for error in result.errors:
+        if error.code != 11000:
+            progress.add_error(f"insert {error.index}: {error.message}")
+    if logs:
+        repo.insert_logs_many(logs)
+
+
+def import_file(
+    path: Path,
+    provider: Optional[ProviderName] = None,
+    model: Optional[str] = None,
+    overrides: Optional[Dict[str, str]] = None,
+    sheet: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    resume: bool = True,
+    dry_run: bool = False,
+    on_progress: Optional[Callable[[ImportProgress], None]] = None,
+) -> ImportProgress:
+    """Import a CSV/XLSX file of expenses; returns the final counters.
+
+    `dry_run` reads and maps every row without calling the LLM or writing
+    anything (`llm_rows` then counts the rows that would be sent).
+    """
+    path = Path(path)
+    provider = provider or settings.default_ai_provider
+    model = model or settings.default_ai_model
+    fingerprint = file_fingerprint(path)
+    progress = (load_checkpoint(fingerprint) if resume and not dry_run else None) or \
+        ImportProgress(source=str(path), fingerprint=fingerprint)
+    if progress.completed:
+        logger.info("Import already completed", {"source": str(path), "inserted": progress.inserted})
+        return progress
+
+    mapping, records = open_rows(path, overrides, sheet)
+    size = max(1, int(chunk_size or settings.import_chunk_size))
+    repo = None if dry_run else ExpensesRepository(get_database())
+    logger.info("Import started", {"source": str(path), "resume_from": progress.rows_done,
+                                   "mapping": mapping.model_dump(exclude_none=True)})
+    started = time.perf_counter()
+    now = datetime.now(tz=IST)
+
+    def flush(chunk: List[_Row], last: int) -> None:
+        if chunk:
+            _process_chunk(chunk, progress, repo, provider, model, executor, str(path), now)
+        progress.rows_done = last + 1
+        progress.chunks += 1
+        progress.elapsed_s = round(time.perf_counter() - started, 3)
+        if not dry_run:
+            save_checkpoint(progress)
+        if on_progress:
+            on_progress(progress)
+
+    with ThreadPoolExecutor(max_workers=max(1, int(settings.import_max_concurrency))) as executor:
+        chunk: List[_Row] = []
+        read = 0
+        last = progress.rows_done - 1
+        for number, record in records:
+            if number < progress.rows_done:
+                continue
+            last = number
+            read += 1
+            progress.run_rows += 1
+            row, reason = _to_row(number, record, mapping, now)
+            if row is None:
+                progress.skipped += 1
+                if reason and reason.startswith("row "):
+                    progress.add_error(reason)
+            else:
+                chunk.append(row)
+            if read % size == 0:
+                flush(chunk, last)
+                chunk = []
+        if read % size:
+            flush(chunk, last)
+
+    progress.completed = True
+    progress.elapsed_s = round(time.perf_counter() - started, 3)
+    if not dry_run:
+        save_checkpoint(progress)
+    logger.info("Import finished", {**progress.model_dump(exclude={"errors"}), "rows_per_s": progress.rows_per_s})
+    return progress
+
+
+def _format(progress: ImportProgress) -> str:
+    return (f"rows {progress.rows_done}: inserted {progress.inserted}, duplicates {progress.duplicates}, "
+            f"mapped {progress.mapped}, fast path {progress.fast_path}, llm {progress.llm_rows}, "
+            f"skipped {progress.skipped}, failed {progress.failed} ({progress.rows_per_s} rows/s)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("path", type=Path, help=".csv or .xlsx file")
+    parser.add_argument("--provider", default=settings.default_ai_provider, choices=("openai", "gemini"))
+    parser.add_argument("--model", default=settings.default_ai_model)
+    parser.add_argument("--map", action="append", default=[], metavar="FIELD=COLUMN",
+                        help=f"column for a field ({', '.join(FIELDS)}); repeatable")
+    parser.add_argument("--date-format", help="strptime format of the date column, e.g. %%d/%%m/%%Y")
+    parser.add_argument("--amount-sign", choices=("auto", "signed", "unsigned"), default="auto",
+                        help="signed: negative amounts are expenses, positive ones credits (auto: detect)")
+    parser.add_argument("--sheet", help="worksheet name for .xlsx files (default: the active sheet)")
+    parser.add_argument("--chunk-size", type=int, help="rows per chunk/checkpoint (default: settings.import_chunk_size)")
+    parser.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint and start over")
+    parser.add_argument("--dry-run", action="store_true", help="map rows and report counts without LLM calls or writes")
+    args = parser.parse_args(argv)
+
+    overrides = dict(item.split("=", 1) for item in args.map if "=" in item)
+    if args.date_format:
+        overrides["date_format"] = args.date_format
+    if args.amount_sign != "auto":
+        overrides["amount_sign"] = args.amount_sign
+    if not args.dry_run:
+        ensure_indexes(get_database())
+    try:
+        progress = import_file(args.path, args.provider, args.model, overrides, args.sheet, args.chunk_size,
+                               resume=not args.no_resume, dry_run=args.dry_run,
+                               on_progress=lambda p: print(_format(p), flush=True))
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"import failed: {e}", file=sys.stderr)
+        return 1
+    print(_format(progress))
+    for message in progress.errors:
+        print(f"  {message}")
+    return 0 if not progress.failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+WhatsApp chat-export importer.
+
+Streams an exported chat (`.txt`, Android "12/03/24, 9:41 pm - Name: text" or
+iOS "[12/03/24, 9:41:05 PM] Name: text" lines; continuation lines belong to
+the previous message) one message at a time. Only messages that contain an
+amount (`fast_path.has_amount`) are candidates. Candidates go through the
+fast path and, when it is not confident, through batched LLM extraction.
+Relative dates ("kaale", "somvare", "3 divas pehla") resolve against the
+message's own timestamp, not the import time.
+
+Chunks, checkpoints and resume work as in `src.services.import_service`.
+Expense ids hash the message timestamp, sender and text, so importing a
+later, longer export of the same chat only adds the new messages.
+
+    python -m src.services.whatsapp_import_service "WhatsApp Chat with Me.txt" --sender "Me"
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pydantic import BaseModel
+
+from src.ai.chains import get_categories_snapshot, run_extraction_batch
+from src.ai.fast_path import FAST_PATH_MODEL, FAST_PATH_PROVIDER, extract_fast, has_amount
+from src.ai.providers import ProviderName
+from src.config.settings import settings
+from src.db.indexes import ensure_indexes
+from src.db.mongo import get_database
+from src.models.expense import ExpenseCreate, ExtractionLog, ExtractionResult
+from src.repositories.expenses_repo import ExpensesRepository
+from src.services.import_service import ImportProgress, file_fingerprint, load_checkpoint, save_checkpoint
+from src.utils.datetime_utils import IST, resolve_datetime, to_ist, to_utc
+from src.utils.logger import logger
+
+# Optional "[", date, time with optional seconds and am/pm, optional "]" and " - ", then the rest
+_MESSAGE_START = re.compile(
+    r"^\[?(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4}),?\s+(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([ap]\.?\s?m\.?)?\]?\s*(?:-\s+)?(.*)$",
+    re.IGNORECASE,
+)
+# Direction marks and the narrow no-break space newer exports put before "pm"
+_INVISIBLE = dict.fromkeys(map(ord, "\u200e\u200f\u202a\u202c"), None) | {0x202F: " ", 0x00A0: " "}
+_MEDIA = re.compile(r"^<(?:media omitted|attached:.*)>$|\(file attached\)$|omitted$", re.IGNORECASE)
+
+
+class ChatMessage(BaseModel):
+    number: int  # position in the export, used as the resume point
+    timestamp: datetime  # IST
+    sender: str
+    text: str
+
+
+def _message_start(line: str, month_first: bool) -> Optional[Tuple[datetime, str]]:
+    """`(timestamp, rest of line)` if `line` starts a new message, else None."""
+    m = _MESSAGE_START.match(line)
+    if not m:
+        return None
+    first, second, year, hour, minute, second_s, ampm, rest = m.groups()
+    day, month = (int(second), int(first)) if month_first else (int(first), int(second))
+    hour = int(hour)
+    if ampm:
+        pm = ampm.lower().startswith("p")
+        hour = hour % 12 + (12 if pm else 0)
+    try:
+        when = datetime(int(year) + (2000 if len(year) == 2 else 0), month, day, hour, int(minute),
+                        int(second_s or 0), tzinfo=IST)
+    except ValueError:
+        return None
+    return when, rest
+
+
+def parse_messages(lines: Iterable[str], month_first: bool = False) -> Iterator[ChatMessage]:
+    """Stream messages out of export lines; system notices (no "Sender: ") are dropped."""
+    number = 0
+    current: Optional[Tuple[datetime, str]] = None
+    parts: List[str] = []
+
+    def finish() -> Optional[ChatMessage]:
+        if current is None:
+            return None
+        sender, sep, first = current[1].partition(": ")
+        if not sep:
+            return None
+        return ChatMessage(number=number, timestamp=current[0], sender=sender.strip(),
+                           text="\n".join([first] + parts).strip())
+
+    for raw in lines:
+        line = raw.translate(_INVISIBLE).rstrip("\r\n")
+        start = _message_start(line, month_first)
+        if start is None:
+            if current is not None:
+                parts.append(line)
+            continue
+        message = finish()
+        if message is not None:
+            yield message
+            number += 1
+        current, parts = start, []
+    message = finish()
+    if message is not None:
+        yield message
+
+
+def message_id(message: ChatMessage) -> ObjectId:
+    """Content-derived id: the same message in a re-exported chat maps to the same expense."""
+    key = f"whatsapp:{message.timestamp.isoformat()}:{message.sender}:{message.text}"
+    return ObjectId(hashlib.sha1(key.encode()).digest()[:12])
+
+
+def _single_line(message: ChatMessage) -> str:
+    return " ".join(message.text.split())
+
+
+def _is_candidate(message: ChatMessage, senders: Optional[Sequence[str]]) -> bool:
+    if senders and message.sender not in senders:
+        return False
+    return not _MEDIA.search(message.text.strip()) and has_amount(message.text)
+
+
+def _when(message: ChatMessage, result: ExtractionResult) -> datetime:
+    """Expense time resolved locally against the message timestamp (the model saw its batch's anchor).
+
+    The model's date hint wins; a null hint means no date was mentioned, so the
+    text is only read when the model gave no hint at all.
+    """
+    raw = result.raw_response or {}
+    hint = raw.get("date")
+    if isinstance(hint, str) and hint.strip():
+        resolved, matched = resolve_datetime(hint, message.timestamp, date_hint=True)
+        if matched:
+            return to_utc(resolved)
+    elif "date" in raw:
+        return to_utc(message.timestamp)
+    resolved, matched = resolve_datetime(_single_line(message), message.timestamp)
+    return to_utc(resolved if matched else message.timestamp)
+
+
+def _day_batches(messages: List[ChatMessage]) -> List[List[ChatMessage]]:
+    """LLM batches of at most import_llm_batch_size messages, never spanning two IST days."""
+    size = max(1, int(settings.import_llm_batch_size))
+    batches: List[List[ChatMessage]] = []
+    for message in messages:
+        if (batches and len(batches[-1]) < size
+                and to_ist(batches[-1][0].timestamp).date() == to_ist(message.timestamp).date()):
+            batches[-1].append(message)
+        else:
+            batches.append([message])
+    return batches
+
+
+def _process_chunk(
+    messages: List[ChatMessage], progress: ImportProgress, repo: Optional[ExpensesRepository],
+    provider: ProviderName, model: str, executor: ThreadPoolExecutor, source: str,
+) -> None:
+    generation, categories, _, _ = get_categories_snapshot()
+    expenses: List[ExpenseCreate] = []
+    ids: List[ObjectId] = []
+    logs: List[ExtractionLog] = []
+    pending: List[ChatMessage] = []
+
+    def add(message: ChatMessage, result: ExtractionResult, provider_name: str, model_name: str,
+            when: datetime) -> None:
+        if not (result.valid and result.amount is not None and result.category and result.subcategory):
+            # Chats mention numbers that aren't expenses; only errors count as failures
+            if result.error:
+                progress.failed += 1
+                progress.add_error(f"message {message.number}: {result.error}")
+            else:
+                progress.skipped += 1
+            return
+        expenses.append(ExpenseCreate(
+            amount=float(result.amount), category=result.category, subcategory=result.subcategory,
+            description=_single_line(message), datetime=when, provider=provider_name, model=model_name,
+            original_query=message.text,
+        ))
+        ids.append(message_id(message))
+
+    for message in messages:
+        if settings.fast_path_enabled:
+            result, confidence = extract_fast(_single_line(message), categories, generation, now=message.timestamp)
+            if result.valid and confidence >= settings.fast_path_min_confidence:
+                progress.fast_path += 1
+                add(message, result, FAST_PATH_PROVIDER, FAST_PATH_MODEL, to_utc(result.datetime))
+                continue
+        pending.append(message)
+
+    progress.llm_rows += len(pending)
+    if pending and repo is not None:
+        # Each batch is anchored on its first message, so the model sees the right "today"
+        batches = _day_batches(pending)
+        futures = [executor.submit(run_extraction_batch, provider, model, [_single_line(m) for m in batch],
+                                   batch[0].timestamp) for batch in batches]
+        for batch, future in zip(batches, futures):
+            try:
+                results, debug = future.result()
+            except Exception as e:
+                progress.failed += len(batch)
+                progress.add_error(f"messages {batch[0].number}-{batch[-1].number}: {e}")
+                continue
+            for message, result in zip(batch, results):
+                add(message, result, provider, model, _when(message, result))
+                logs.append(ExtractionLog(
+                    original_query=_single_line(message), provider=provider, model=model,
+                    settings_snapshot={"import": source}, extraction=result,
+                    metrics={"import": {"message": message.number, "batch": debug.get("items")}},
+                ))
+
+    if repo is None or not expenses:
+        return
+    result = repo.insert_many_expenses(expenses, ids=ids)
+    duplicates = sum(1 for e in result.errors if e.code == 11000)
+    progress.inserted += result.inserted
+    progress.duplicates += duplicates
+    progress.failed += len(result.errors) - duplicates
+    for error in result.errors:
+        if error.code != 11000:
+            progress.add_error(f"insert {error.index}: {error.message}")
+    if logs:
+        repo.insert_logs_many(logs)
+
+
+def import_chat(
+    path: Path,
+    provider: Optional[ProviderName] = None,
+    model: Optional[str] = None,
+    senders: Optional[Sequence[str]] = None,
+    month_first: bool = False,
+    chunk_size: Optional[int] = None,
+    resume: bool = True,
+    dry_run: bool = False,
+    on_progress: Optional[Callable[[ImportProgress], None]] = None,
+) -> ImportProgress:
+    """Import expenses from a WhatsApp chat export; returns the final counters.
+
+    `rows_done` counts messages; `skipped` counts messages without an amount,
+    from other senders or not read as an expense. `dry_run` only parses and
+    pre-filters.
+    """
+    path = Path(path)
+    provider = provider or settings.default_ai_provider
+    model = model or settings.default_ai_model
+    fingerprint = file_fingerprint(path)
+    progress = (load_checkpoint(fingerprint) if resume and not dry_run else None) or \
+        ImportProgress(source=str(path), fingerprint=fingerprint)
+    if progress.completed:
+        logger.info("Chat import already completed", {"source": str(path), "inserted": progress.inserted})
+        return progress
+
+    size = max(1, int(chunk_size or settings.import_chunk_size))
+    repo = None if dry_run else ExpensesRepository(get_database())
+    logger.info("Chat import started", {"source": str(path), "resume_from": progress.rows_done})
+    started = time.perf_counter()
+
+    def flush(chunk: List[ChatMessage], last: int) -> None:
+        if chunk:
+            _process_chunk(chunk, progress, repo, provider, model, executor, str(path))
+        progress.rows_done = last + 1
+        progress.chunks += 1
+        progress.elapsed_s = round(time.perf_counter() - started, 3)
+        if not dry_run:
+            save_checkpoint(progress)
+        if on_progress:
+            on_progress(progress)
+
+    with open(path, encoding="utf-8-sig", errors="replace") as handle, \
+            ThreadPoolExecutor(max_workers=max(1, int(settings.import_max_concurrency))) as executor:
+        chunk: List[ChatMessage] = []
+        read = 0
+        last = progress.rows_done - 1
+        for message in parse_messages(handle, month_first):
+            if message.number < progress.rows_done:
+                continue
+            last = message.number
+            read += 1
+            progress.run_rows += 1
+            if _is_candidate(message, senders):
+                chunk.append(message)
+            else:
+                progress.skipped += 1
+            if read % size == 0:
+                flush(chunk, last)
+                chunk = []
+        if read % size:
+            flush(chunk, last)
+
+    progress.completed = True
+    progress.elapsed_s = round(time.perf_counter() - started, 3)
+    if not dry_run:
+        save_checkpoint(progress)
+    logger.info("Chat import finished", {**progress.model_dump(exclude={"errors"}), "rows_per_s": progress.rows_per_s})
+    return progress
+
+
+def _format(progress: ImportProgress) -> str:
+    return (f"messages {progress.rows_done}: inserted {progress.inserted}, duplicates {progress.duplicates}, "
+            f"fast path {progress.fast_path}, llm {progress.llm_rows}, skipped {progress.skipped}, "
+            f"failed {progress.failed} ({progress.rows_per_s} messages/s)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("path", type=Path, help="exported chat .txt")
+    parser.add_argument("--provider", default=settings.default_ai_provider, choices=("openai", "gemini"))
+    parser.add_argument("--model", default=settings.default_ai_model)
+    parser.add_argument("--sender", action="append", default=[], help="only import messages from this sender; repeatable")
+    parser.add_argument("--month-first", action="store_true", help="dates in the export are MM/DD/YY (default DD/MM/YY)")
+    parser.add_argument("--chunk-size", type=int, help="messages per chunk/checkpoint (default: settings.import_chunk_size)")
+    parser.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint and start over")
+    parser.add_argument("--dry-run", action="store_true", help="parse and pre-filter only; no LLM calls or writes")
+    args = parser.parse_args(argv)
+
+    if not args.dry_run:
+        ensure_indexes(get_database())
+    try:
+        progress = import_chat(args.path, args.provider, args.model, args.sender, args.month_first, args.chunk_size,
+                               resume=not args.no_resume, dry_run=args.dry_run,
+                               on_progress=lambda p: print(_format(p), flush=True))
+    except (OSError, ValueError) as e:
+        print(f"import failed: {e}", file=sys.stderr)
+        return 1
+    print(_format(progress))
+    for message in progress.errors:
+        print(f"  {message}")
+    return 0 if not progress.failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
 # Main page components & flow
 import streamlit as st
 from datetime import datetime
-from src.services.expense_service import extract_and_save, update_expense, delete_expense
+from src.services.expense_service import extract_and_save, extract_and_save_batch, extract_voice_and_save, update_expense, delete_expense
+from src.services.export_service import FORMATS, MIME_TYPES, export_bytes
 from src.db.mongo import get_database
 from src.repositories.expenses_repo import ExpensesRepository
 from src.models.expense import ExpenseUpdate, ExtractionResult
 from src.utils.datetime_utils import to_utc, to_ist
+from src.ai.audio import preprocess_audio
 from src.ai.providers import transcribe_with_gemini
 from src.config.settings import settings
 
@@ -36,6 +38,11 @@ def main_page():
                     placeholder="e.g., Paid 250 for lunch at SpiceHub yesterday, or Bus fare 45 to office",
                     help="Enter your expense or use voice above; we'll transcribe and fill this for confirmation."
                 )
+                batch_mode = st.checkbox(
+                    "Multiple expenses (one per line)",
+                    value=False,
+                    help="Extract every line as a separate expense with a single AI call."
+                )
 
             # Inline controls under input
             c1, c2, c3 = st.columns([1, 1, 2])
@@ -43,6 +50,12 @@ def main_page():
                 transcribe_btn = st.form_submit_button("📝 Transcribe", use_container_width=True)
             with c2:
                 clear_voice_btn = st.form_submit_button("❌ Clear Voice", use_container_width=True)
+            with c3:
+                voice_extract_btn = st.form_submit_button(
+                    "⚡ Voice → Expense",
+                    use_container_width=True,
+                    help="Transcribe and extract in one Gemini call; the transcript is shown for review."
+                ) if settings.voice_single_call_enabled else False
 
             col_extract, col_clear = st.columns(2)
 
@@ -63,8 +76,10 @@ def main_page():
         # Initialize placeholders to avoid reference issues
         audio = None
         expense_text = st.session_state.get('expense_input', '')
+        batch_mode = False
         transcribe_btn = False
         clear_voice_btn = False
+        voice_extract_btn = False
         extract_button = False
         clear_button = False
 
@@ -81,19 +96,11 @@ def main_page():
             try:
                 st.session_state.is_transcribing = True
                 with st.spinner("Transcribing voice to text with Gemini…"):
-                    audio_bytes = audio.getvalue()
-                    # Normalize MIME to prefer explicit codec hints for better STT
-                    raw_mime = audio.type or ""
-                    if raw_mime == "audio/webm":
-                        mime_type = "audio/webm;codecs=opus"
-                    elif raw_mime == "audio/ogg":
-                        mime_type = "audio/ogg;codecs=opus"
-                    else:
-                        mime_type = raw_mime or "audio/wav"
+                    prepared = _prepare_recording(audio)
                     # Prefer a cheap, STT-capable Gemini model
                     transcript = transcribe_with_gemini(
-                        audio_bytes=audio_bytes,
-                        mime_type=mime_type,
+                        audio_bytes=prepared.data,
+                        mime_type=prepared.mime_type,
                         model="gemini-1.5-flash",
                         prompt=None,
                     )
@@ -114,11 +121,76 @@ def main_page():
         else:
             st.warning("Please record audio first.")
 
+    if is_admin and voice_extract_btn:
+        if audio and audio.type:
+            provider = st.session_state.settings['provider']
+            model = st.session_state.settings['model']
+            try:
+                with st.spinner("Transcribing and extracting with Gemini…"):
+                    prepared = _prepare_recording(audio)
+                    transcript, result, expense_id, log_id = extract_voice_and_save(
+                        audio_bytes=prepared.data,
+                        mime_type=prepared.mime_type,
+                        provider=provider,
+                        model=model,
+                        settings_snapshot={'provider': provider, 'model': model, 'mode': 'voice'},
+                    )
+            except Exception as e:
+                transcript = ""
+                result = ExtractionResult(valid=False, missing_fields=["amount"], error=str(e))
+                expense_id = ""
+                log_id = ""
+            st.session_state.extraction_result = {**result.model_dump(), 'expense_id': expense_id,
+                                                  'log_id': log_id, 'transcript': transcript}
+            st.session_state.batch_results = None
+            if expense_id:
+                try:
+                    st.session_state.expenses = ExpensesRepository(get_database()).list_recent(limit=20)
+                except Exception:
+                    pass
+                st.session_state.show_success = True
+            elif transcript:
+                # Nothing saved: put the transcript in the text box to fix and extract
+                st.session_state.expense_input = transcript
+                st.session_state.show_success = False
+        else:
+            st.warning("Please record audio first.")
+
     # Handle extract submission
-    if is_admin and extract_button:
+    batch_lines = [line for line in expense_text.splitlines() if line.strip()] if batch_mode else []
+    if is_admin and extract_button and len(batch_lines) > 1:
+        provider = st.session_state.settings['provider']
+        model = st.session_state.settings['model']
+        try:
+            outcomes = extract_and_save_batch(
+                queries=batch_lines,
+                provider=provider,
+                model=model,
+                settings_snapshot={'provider': provider, 'model': model, 'mode': 'batch'},
+            )
+            st.session_state.batch_results = [
+                {**result.model_dump(), 'expense_id': expense_id, 'log_id': log_id}
+                for result, expense_id, log_id in outcomes
+            ]
+        except Exception as e:
+            st.session_state.batch_results = None
+            st.error(f"Batch extraction failed: {e}")
+        st.session_state.extraction_result = None
+        if st.session_state.get('batch_results') and all(r['expense_id'] for r in st.session_state.batch_results):
+            st.session_state.expense_input = ""
+        else:
+            st.session_state.expense_input = expense_text
+        try:
+            db = get_database()
+            repo = ExpensesRepository(db)
+            st.session_state.expenses = repo.list_recent(limit=20)
+        except Exception:
+            pass
+    elif is_admin and extract_button:
         if expense_text.strip():
             provider = st.session_state.settings['provider']
             model = st.session_state.settings['model']
+            strategy = st.session_state.settings.get('strategy', 'single')
             try:
                 result, expense_id, log_id = extract_and_save(
                     original_query=expense_text,
@@ -127,7 +199,10 @@ def main_page():
                     settings_snapshot={
                         'provider': provider,
                         'model': model,
+                        'strategy': strategy,
                     },
+                    hedge=strategy == 'hedged',
+                    cascade=strategy == 'cascade',
                 )
             except Exception as e:
                 # Surface error in UI and debug panel
@@ -136,6 +211,7 @@ def main_page():
                 log_id = ""
 
             st.session_state.extraction_result = result.model_dump()
+            st.session_state.batch_results = None
             st.session_state.extraction_result['expense_id'] = expense_id
             st.session_state.extraction_result['log_id'] = log_id
             st.session_state.expense_input = expense_text
@@ -158,8 +234,12 @@ def main_page():
     if is_admin and clear_button:
         st.session_state.expense_input = ""
         st.session_state.extraction_result = None
+        st.session_state.batch_results = None
         st.session_state.show_success = False
 
+    if st.session_state.get('batch_results'):
+        display_batch_results()
+
     # Show extraction result
     if st.session_state.extraction_result:
         display_extraction_result()
@@ -205,6 +285,8 @@ def main_page():
     else:
         st.info("No expenses yet. Add your first expense above!")
 
+    show_export()
+
     # Handle edit expense dialog
     if st.session_state.get('role') == 'admin' and st.session_state.editing_expense:
         show_edit_expense_dialog()
@@ -214,6 +296,43 @@ def main_page():
         show_delete_confirmation_dialog()
 
 
+def show_export():
+    """Export all expenses; the file is built only when requested, then offered for download."""
+    with st.expander("⬇️ Export Expenses", expanded=False):
+        fmt = st.selectbox("Format", FORMATS, key="export_format")
+        if st.button("Prepare export", key="prepare_export"):
+            try:
+                with st.spinner("Exporting..."):
+                    data, stats = export_bytes(fmt)
+                st.session_state.export_file = (fmt, data)
+                st.caption(f"{stats.rows} rows, {stats.bytes} bytes in {stats.elapsed_s:.2f}s ({stats.rows_per_s} rows/s)")
+            except Exception as e:
+                st.error(f"Export failed: {e}")
+        prepared = st.session_state.get("export_file")
+        if prepared and prepared[0] == fmt:
+            st.download_button(
+                "Download", data=prepared[1], file_name=f"expenses_{datetime.now():%Y%m%d}.{fmt}",
+                mime=MIME_TYPES[fmt], key="download_export",
+            )
+
+
+def _prepare_recording(audio):
+    """Normalize the recording's MIME type and shrink it for Gemini."""
+    audio_bytes = audio.getvalue()
+    # Normalize MIME to prefer explicit codec hints for better STT
+    raw_mime = audio.type or ""
+    if raw_mime == "audio/webm":
+        mime_type = "audio/webm;codecs=opus"
+    elif raw_mime == "audio/ogg":
+        mime_type = "audio/ogg;codecs=opus"
+    else:
+        mime_type = raw_mime or "audio/wav"
+    # Downmix/resample/trim locally to cut upload size and audio tokens
+    prepared = preprocess_audio(audio_bytes, mime_type)
+    st.session_state.last_audio_prep = prepared.summary()
+    return prepared
+
+
 def show_edit_expense_dialog():
     """Display the edit expense dialog"""
     expense = st.session_state.editing_expense
@@ -350,6 +469,27 @@ def mock_extract_expense(text):
     }
 
 
+def display_batch_results():
+    """Summarize a multi-line extraction"""
+    results = st.session_state.batch_results
+    saved = [r for r in results if r.get('expense_id')]
+    if len(saved) == len(results):
+        st.success(f"✅ Saved {len(saved)} expenses")
+    else:
+        st.warning(f"Saved {len(saved)} of {len(results)} expenses. Lines that could not be extracted are listed below.")
+
+    for r in results:
+        if r.get('expense_id'):
+            st.write(f"✅ ₹{r.get('amount')} - {r.get('category')} / {r.get('subcategory')} — {r.get('description')}")
+        else:
+            missing = ", ".join(r.get('missing_fields') or []) or (r.get('error') or "unknown error")
+            st.write(f"❌ {r.get('description') or ''} (missing: {missing})")
+
+    if st.session_state.get('debug_mode', False):
+        with st.expander("🔎 Batch Debug Details", expanded=False):
+            st.json([r.get('raw_response', {}) for r in results])
+
+
 def display_extraction_result():
     """Display the extraction result"""
     result = st.session_state.extraction_result
@@ -381,6 +521,8 @@ def display_extraction_result():
             st.write(f"**Date (IST):** {dt_show}")
 
         st.write(f"**Description:** {result.get('description', '')}")
+        if result.get('transcript'):
+            st.caption(f"🎙️ Heard: “{result['transcript']}” — use ✏️ Edit below if anything was misheard.")
 
         # Debug panel (if enabled)
         if st.session_state.get('debug_mode', False):
@@ -388,6 +530,13 @@ def display_extraction_result():
                 st.write("**Expense ID:**", result.get('expense_id', ''))
                 st.write("**Log ID:**", result.get('log_id', ''))
                 st.write("**LangSmith Tracing:**", "✅ Enabled" if settings.langsmith_api_key else "❌ Disabled")
+                debug_info = (result.get('raw_response') or {}).get('debug', {})
+                if debug_info.get('metrics') or debug_info.get('latency_ms') is not None:
+                    st.write("**Performance:**")
+                    st.json({"latency_ms": debug_info.get('latency_ms'), **(debug_info.get('metrics') or {})})
+                if st.session_state.get('last_audio_prep'):
+                    st.write("**Audio Preprocessing:**")
+                    st.json(st.session_state.last_audio_prep)
                 st.write("**Raw Response:**")
                 st.json(result.get('raw_response', {}))
     else:
@@ -397,6 +546,8 @@ def display_extraction_result():
         for field in result.get('missing_fields', []):
             st.write(f"- {field.title()}")
 
+        if result.get('transcript'):
+            st.write(f"**Heard:** {result['transcript']} (copied to the input box to edit and extract)")
         if result.get('reason'):
             st.write(f"**Reason:** {result['reason']}")
         if result.get('error'):
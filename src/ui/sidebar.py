@@ -3,9 +3,12 @@ Sidebar helpers - extracted from app.py for better organization
 """
 import streamlit as st
 from datetime import datetime
-from src.db.mongo import get_database
-from src.db.indexes import ensure_indexes
+from src.db.mongo import available_compressors, get_database
+from src.db.monitoring import get_pool_stats
+from src.db.indexes import get_index_stats
 from src.config.settings import settings
+from src.ai.chains import get_cascade_stats, get_chain_cache_stats, get_parse_stats, get_result_cache_stats
+from src.ai.providers import get_resilience_stats, get_transcription_cache_stats
 from src.services.category_service import CategoryService
 from src.models.category import CategoryCreate, SubcategoryCreate
 
@@ -182,9 +185,27 @@ def sidebar():
             disabled=st.session_state.get('role') != 'admin'
         )
 
+        # Extraction strategy: one model, race an alternate, or cheap models first
+        strategies = {
+            'single': "Single model",
+            'hedged': "Hedged (race alternate when slow)",
+            'cascade': "Cascade (cheap first, escalate on failed checks)",
+        }
+        current_strategy = st.session_state.settings.get('strategy', 'single')
+        new_strategy = st.selectbox(
+            "Extraction Strategy",
+            options=list(strategies.keys()),
+            format_func=strategies.get,
+            index=list(strategies.keys()).index(current_strategy) if current_strategy in strategies else 0,
+            disabled=st.session_state.get('role') != 'admin'
+        )
+        if new_strategy == 'cascade':
+            st.caption("Tiers: " + " → ".join([*settings.cascade_models, f"{new_provider}:{new_model}"]))
+
         if st.button("Save Settings", disabled=st.session_state.get('role') != 'admin'):
             st.session_state.settings['provider'] = new_provider
             st.session_state.settings['model'] = new_model
+            st.session_state.settings['strategy'] = new_strategy
             st.session_state.settings['updated_at'] = datetime.now()
             st.success("Settings saved!")
 
@@ -196,6 +217,27 @@ def sidebar():
     st.session_state['debug_mode'] = debug_mode
     if debug_mode:
         st.caption("Debug mode will show detailed logs, raw model output, and errors.")
+        with st.expander("AI Cache Stats", expanded=False):
+            st.write("**LLM chain cache:**")
+            st.json(get_chain_cache_stats())
+            st.write("**Extraction result cache:**")
+            st.json(get_result_cache_stats())
+            st.write("**Transcription cache:**")
+            st.json(get_transcription_cache_stats())
+            st.write("**Output parsing (per model):**")
+            st.json(get_parse_stats())
+            st.write("**Provider circuit breakers:**")
+            st.json(get_resilience_stats())
+            st.write("**Cascade tiers (hit rate, mean latency):**")
+            st.json(get_cascade_stats())
+        with st.expander("Database Pool Stats", expanded=False):
+            st.write("**Connection pool (per server):**")
+            st.json(get_pool_stats())
+            st.caption(f"maxPoolSize={settings.mongo_max_pool_size}, "
+                       f"waitQueueTimeoutMS={settings.mongo_wait_queue_timeout_ms}, "
+                       f"compressors={','.join(available_compressors(settings.mongo_compressors)) or 'none'}")
+            st.write("**Index registry (create_index round trips):**")
+            st.json(get_index_stats())
 
     # DB status
     with st.expander("Database Status", expanded=True):  # Expanded by default for debugging
@@ -208,7 +250,7 @@ def sidebar():
 
             # Try database connection
             db = get_database()
-            ensure_indexes(db)
+            db.command("ping")
             st.success("Connected to MongoDB")
         except Exception as e:
             st.error(f"MongoDB connection error: {e}")
@@ -0,0 +1,95 @@
+"""
+In-process caching helpers.
+Provides a thread-safe bounded LRU cache with optional TTL and hit/miss counters.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[V]):
+    """Bounded least-recently-used cache shared across Streamlit sessions.
+
+    Entries older than `ttl_seconds` (if set) are treated as misses and dropped
+    on access. All operations are guarded by a lock so a single instance can be
+    used from the Streamlit script threads concurrently.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl_seconds: Optional[float] = None):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and (time.monotonic() - stored_at) > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key` and mark it most recently used."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or self._expired(entry[0]):  # type: ignore[index]
+                if entry is not _MISSING:
+                    del self._data[key]
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry[1]  # type: ignore[index]
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Store `value`, evicting the least recently used entry when full."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], V]) -> Tuple[V, bool]:
+        """Return `(value, hit)`; build and store the value with `factory` on a miss."""
+        with self._lock:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value, True
+            value = factory()
+            self.set(key, value)
+            return value, False
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+            return default if entry is _MISSING else entry[1]  # type: ignore[index]
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters for debug panels and logs."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
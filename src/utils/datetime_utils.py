@@ -4,8 +4,9 @@ Timezone & datetime parsing helpers for IST handling.
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional, Union
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
 
 from zoneinfo import ZoneInfo
 
@@ -54,3 +55,217 @@ def parse_to_utc(value: Union[str, datetime], default_tz: ZoneInfo = IST) -> dat
         parsed = parsed.replace(tzinfo=default_tz)
     return parsed.astimezone(UTC)
 
+
+
+# --- Local relative-date resolution -------------------------------------------------
+
+# Relative day words -> day offset from "now" ('kaale' means yesterday for expenses)
+RELATIVE_DAY_WORDS: Dict[str, int] = {
+    "aaje": 0, "aje": 0, "aaj": 0, "today": 0, "tonight": 0,
+    "kaale": -1, "kale": -1, "kaal": -1, "kal": -1, "yesterday": -1,
+    "parmdivase": -2, "parmdivas": -2, "parmdi": -2, "parso": -2,
+    "tomorrow": 1,
+}
+_RELATIVE_PHRASES: Dict[str, int] = {
+    "day before yesterday": -2,
+    "day after tomorrow": 2,
+    "aavti kaale": 1,
+    "last week": -7,
+    "gaya week": -7,
+    "gaya athvadiye": -7,
+    "gaye athvadiye": -7,
+}
+_WORD_RE = re.compile(r"[a-z]+")
+_DAYS_AGO = re.compile(r"\b(\d{1,2})\s*(?:days?|divas)\s*(?:ago|pehla|pehlan|pela|agau)\b")
+
+# Weekday words (English and Gujarati, incl. the locative "-e" forms like 'somvare')
+_WEEKDAYS = re.compile(
+    r"\b(?:(?P<last>last|gaya|gaye|pichhla|pichla)\s+)?"
+    r"(?P<day>monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|somvare?|mangalvare?|budhvare?|guruvare?|shukravare?|shanivare?|ravivare?)\b"
+)
+_WEEKDAY_INDEX = {
+    "monday": 0, "somvar": 0, "tuesday": 1, "mangalvar": 1, "wednesday": 2, "budhvar": 2,
+    "thursday": 3, "guruvar": 3, "friday": 4, "shukravar": 4, "saturday": 5, "shanivar": 5,
+    "sunday": 6, "ravivar": 6,
+}
+
+# Times of day -> default hour, and whether a bare "7" in that period means 7 pm
+_PERIODS: Dict[str, Tuple[int, bool]] = {
+    "morning": (9, False), "savare": (9, False), "savar": (9, False), "savaare": (9, False),
+    "afternoon": (14, True), "bapore": (14, True), "bapor": (14, True),
+    "evening": (19, True), "sanje": (19, True), "saanje": (19, True), "sanj": (19, True),
+    "night": (21, True), "tonight": (21, True), "raate": (21, True), "raatre": (21, True),
+}
+# Meals only disambiguate a bare clock time ("lunch at 1:30" is 13:30); they don't set one
+_PM_MEALS = re.compile(r"\b(?:lunch|bapor|dinner|jaman)\b")
+_PERIOD_WORDS = re.compile(r"\b(" + "|".join(sorted(_PERIODS, key=len, reverse=True)) + r")\b")
+_CLOCK_AMPM = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)\b")
+_CLOCK_VAGE = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(?:vage|vaage|baje|o'?clock)\b")
+_CLOCK_24H = re.compile(r"(?<![\d/.-])(\d{1,2}):(\d{2})(?![\d/])")
+
+# Explicit dates: ISO, day-first numeric (Indian), "12 march" / "march 12"
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NUMERIC_DATE = re.compile(r"(?<![\d.])(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})(?![\d/-])|(?<![\d.])(\d{1,2})\.(\d{1,2})\.(\d{2,4})(?![\d.])")
+# A year-less "1/2" or "2-3" is usually a fraction or a range ("chicken 1/2 kg", "2-3 samosa"):
+# only read it as a date when a time or "ni/na tarikh" follows ("5/3 ni tarikh", "12/03 at 7pm"),
+# or when the whole text is a date hint/column value
+_BARE_DATE_CONTEXT = (
+    r"\s+(?:(?:ni|na|no|nu)\s+)?(?:tarikh|tareekh|date)\b"
+    r"|\s+(?:at\s+)?\d{1,2}(?:[:.]\d{2})?\s*(?:am|pm|vage|vaage|baje|o'?clock)\b"
+    r"|\s+(?:at\s+)?\d{1,2}:\d{2}(?!\d)"
+    r"|\s+(?:morning|savare?|savaare|afternoon|bapore?|evening|sanje|saanje|sanj|night|raate|raatre)\b"
+)
+_BARE_NUMERIC_DATE = re.compile(r"(?<![\d.])(\d{1,2})[/-](\d{1,2})(?![\d/-])(?=" + _BARE_DATE_CONTEXT + ")")
+_BARE_NUMERIC_HINT = re.compile(r"(?<![\d.])(\d{1,2})[/-](\d{1,2})(?![\d/-])")
+_MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+# Full or 3-letter names only, so Gujlish words like 'mara' aren't read as March
+_MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?"
+_DAY_MONTH = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH + r"(?:,?\s+(\d{4}))?\b")
+_MONTH_DAY = re.compile(r"\b" + _MONTH + r"\s+(\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(\d{4}))?")
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _full_year(raw: Optional[str]) -> Optional[int]:
+    if not raw:
+        return None
+    year = int(raw)
+    return year + 2000 if year < 100 else year
+
+
+def _explicit_date(text: str, today: date, date_hint: bool = False) -> Tuple[Optional[date], Optional[str]]:
+    """First explicit calendar date in `text`; year-less dates in the future roll back a year."""
+    found: Optional[date] = None
+    matched: Optional[str] = None
+    year: Optional[int] = None
+    m = _ISO_DATE.search(text)
+    if m:
+        found, matched = _safe_date(int(m.group(1)), int(m.group(2)), int(m.group(3))), m.group(0)
+        year = found.year if found else None
+    if found is None:
+        for m in _NUMERIC_DATE.finditer(text):
+            day, month, raw_year = (m.group(1), m.group(2), m.group(3)) if m.group(1) else (m.group(4), m.group(5), m.group(6))
+            year = _full_year(raw_year)
+            found = _safe_date(year or today.year, int(month), int(day))
+            if found:
+                matched = m.group(0)
+                break
+    if found is None:
+        year = None
+        for m in (_BARE_NUMERIC_HINT if date_hint else _BARE_NUMERIC_DATE).finditer(text):
+            found = _safe_date(today.year, int(m.group(2)), int(m.group(1)))
+            if found:
+                matched = m.group(0)
+                break
+    if found is None:
+        for pattern, day_group, month_group in ((_DAY_MONTH, 1, 2), (_MONTH_DAY, 2, 1)):
+            m = pattern.search(text)
+            if m:
+                year = _full_year(m.group(3))
+                found = _safe_date(year or today.year, _MONTHS.index(m.group(month_group)[:3]) + 1, int(m.group(day_group)))
+                if found:
+                    matched = m.group(0)
+                    break
+    if found is not None and year is None and found > today:
+        found = _safe_date(found.year - 1, found.month, found.day) or found
+    return found, matched
+
+
+def _relative_offset(text: str, today: date) -> Tuple[Optional[int], List[str]]:
+    for phrase, offset in _RELATIVE_PHRASES.items():
+        if phrase in text:
+            return offset, phrase.split()
+    m = _DAYS_AGO.search(text)
+    if m:
+        return -int(m.group(1)), m.group(0).split()
+    m = _WEEKDAYS.search(text)
+    if m:
+        name = m.group("day")
+        target = _WEEKDAY_INDEX[name[:-1] if name.endswith("vare") else name]
+        back = (today.weekday() - target) % 7
+        if back == 0 and m.group("last"):
+            back = 7
+        return -back, m.group(0).split()
+    for word in _WORD_RE.findall(text):
+        if word in RELATIVE_DAY_WORDS:
+            return RELATIVE_DAY_WORDS[word], [word]
+    return None, []
+
+
+def _time_of_day(text: str) -> Tuple[Optional[Tuple[int, int]], List[str]]:
+    period = _PERIOD_WORDS.search(text)
+    period_hour, pm_period = _PERIODS[period.group(1)] if period else (None, False)
+    pm_period = pm_period or bool(_PM_MEALS.search(text))
+    matched = [period.group(1)] if period else []
+    m = _CLOCK_AMPM.search(text)
+    if m:
+        hour, minute = int(m.group(1)) % 12, int(m.group(2) or 0)
+        hour += 12 if m.group(3) == "pm" else 0
+        return ((hour, minute) if hour < 24 and minute < 60 else None), matched + m.group(0).split()
+    m = _CLOCK_VAGE.search(text) or _CLOCK_24H.search(text)
+    if m:
+        hour, minute = int(m.group(1)), int(m.group(2) or 0)
+        # "sanje 7 vage" is 19:00; "raate 2 vage" stays 02:00
+        if pm_period and hour < 12 and not (period_hour == 21 and hour < 5):
+            hour += 12
+        if hour < 24 and minute < 60:
+            return (hour, minute), matched + m.group(0).split()
+    if period_hour is not None:
+        return (period_hour, 0), matched
+    return None, []
+
+
+def resolve_datetime(text: Optional[str], now: Optional[datetime] = None,
+                     date_hint: bool = False) -> Tuple[datetime, List[str]]:
+    """Resolve when an expense happened from Gujlish/English text, deterministically.
+
+    Handles relative day words ('aaje', 'kaale', 'parmdivase', 'yesterday',
+    '3 divas pehla'), weekdays ('somvare', 'last monday', most recent past
+    occurrence), explicit dates ('12/03/25', '2025-03-12', '12 march'; day-first;
+    a year-less '12/03' only before a time or 'ni tarikh', since '1/2 kg' is not a date,
+    unless `date_hint` says `text` is already known to be about the date)
+    and times of day ('sanje', '7 vage', '9:30', '8pm'). Without a time the
+    time of `now` is kept. Returns `(IST datetime, matched words)`; no matched
+    words means nothing was found and the result is `now`.
+    """
+    now = to_ist(now) if now is not None else datetime.now(tz=IST)
+    lowered = (text or "").lower()
+    today = now.date()
+    matched: List[str] = []
+
+    day, explicit = _explicit_date(lowered, today, date_hint)
+    if day is not None:
+        matched.append(explicit or "")
+        # Keep a trailing clock time, but don't read the date's digits as one
+        lowered = lowered.replace(explicit or "", " ")
+    else:
+        offset, words = _relative_offset(lowered, today)
+        if offset is not None:
+            day = today + timedelta(days=offset)
+            matched.extend(words)
+
+    clock, words = _time_of_day(lowered)
+    matched.extend(words)
+    when = now.replace(year=(day or today).year, month=(day or today).month, day=(day or today).day)
+    if clock is not None:
+        when = when.replace(hour=clock[0], minute=clock[1], second=0, microsecond=0)
+    return when, matched
+
+
+def parse_iso_datetime(value: Union[str, datetime, None], default_tz: ZoneInfo = IST) -> Optional[datetime]:
+    """Like `parse_to_utc`, but returns None instead of "now" when `value` isn't a datetime."""
+    if isinstance(value, datetime):
+        return parse_to_utc(value, default_tz)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parse_to_utc(parsed, default_tz)
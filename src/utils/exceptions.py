@@ -179,6 +179,17 @@ class AIProcessingError(AIError):
         super().__init__(message, "AI_PROCESSING_ERROR", error_details)
 
 
+class ProviderUnavailableError(AIError):
+    """Raised when a provider's circuit breaker is open and calls are being short-circuited."""
+
+    def __init__(self, provider: str, retry_in_seconds: float = 0.0, details: Dict[str, Any] = None):
+        message = f"Provider '{provider}' is temporarily unavailable (circuit open, retry in {retry_in_seconds:.0f}s)"
+        error_details = {"provider": provider, "retry_in_seconds": retry_in_seconds}
+        if details:
+            error_details.update(details)
+        super().__init__(message, "PROVIDER_UNAVAILABLE", error_details)
+
+
 # Configuration Exceptions
 class ConfigurationError(ExpenseTrackerError):
     """Base class for configuration-related errors."""
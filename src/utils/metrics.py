@@ -0,0 +1,73 @@
+"""
+Lightweight in-process latency metrics.
+Keeps a bounded window of recent samples per key for percentiles and averages.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Hashable, Iterable, List, Optional
+
+
+def percentile(samples: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `samples` (pct in 0-100); None when empty."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class LatencyTracker:
+    """Thread-safe rolling window of latency samples (milliseconds) per key."""
+
+    def __init__(self, window: int = 200):
+        self.window = max(1, int(window))
+        self._samples: Dict[Hashable, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, elapsed_ms: float) -> None:
+        with self._lock:
+            bucket = self._samples.get(key)
+            if bucket is None:
+                bucket = self._samples[key] = deque(maxlen=self.window)
+            bucket.append(float(elapsed_ms))
+
+    def samples(self, key: Hashable) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(key, ()))
+
+    def count(self, key: Hashable) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def mean(self, key: Hashable) -> Optional[float]:
+        values = self.samples(key)
+        return sum(values) / len(values) if values else None
+
+    def percentile(self, key: Hashable, pct: float) -> Optional[float]:
+        return percentile(self.samples(key), pct)
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Per-key count/mean/p50/p95 for debug panels."""
+        with self._lock:
+            keys = list(self._samples.keys())
+        out: Dict[str, Dict[str, Optional[float]]] = {}
+        for key in keys:
+            values = self.samples(key)
+            out[str(key)] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 1) if values else None,
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+            }
+        return out
+
+
+# Shared tracker for provider/model extraction latencies (single-item calls only)
+llm_latency = LatencyTracker()
+# Whole-call latencies of multi-line batch extractions, kept apart so they don't
+# skew the single-call percentiles used for hedge delays and fast-path savings
+llm_batch_latency = LatencyTracker()
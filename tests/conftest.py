@@ -0,0 +1,38 @@
+"""Shared fixtures: offline app state (in-memory Mongo, fake LLMs, fresh breakers)."""
+
+import pytest
+
+from benchmarks.fake_mongo import InMemoryMongoClient
+from benchmarks.fakes import uninstall_fake_llm
+from src.ai import providers
+from src.ai.chains import clear_chain_cache, clear_result_cache
+from src.config.settings import settings
+from src.db.indexes import ensure_indexes
+from src.db.mongo import get_database, set_mongo_client
+from src.services.category_service import CategoryService
+
+
+@pytest.fixture
+def fresh_breakers(monkeypatch):
+    """Per-test circuit breakers, so failures in one test don't open circuits in the next."""
+    monkeypatch.setattr(providers, "_breakers", {})
+    return providers._breakers
+
+
+@pytest.fixture
+def offline(monkeypatch, fresh_breakers):
+    """In-memory Mongo with seeded categories; extraction always goes to the (fake) LLM."""
+    for name in ("fast_path_enabled", "result_cache_enabled", "hedge_enabled", "cascade_enabled",
+                 "structured_output_enabled", "category_pruning_enabled"):
+        monkeypatch.setattr(settings, name, False)
+    set_mongo_client(InMemoryMongoClient())
+    ensure_indexes(get_database())
+    CategoryService().seed_default_categories()
+    clear_chain_cache()
+    clear_result_cache()
+    yield
+    for provider in ("openai", "gemini"):
+        uninstall_fake_llm(provider)
+    clear_chain_cache()
+    clear_result_cache()
+    set_mongo_client(None)
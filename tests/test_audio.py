@@ -0,0 +1,68 @@
+import io
+import wave
+
+import pytest
+
+from src.ai.audio import decode_wav, preprocess_audio, resample, to_mono, trim_silence
+from src.config.settings import settings
+
+np = pytest.importorskip("numpy")
+
+RATE = 44100
+
+
+def _stereo_wav(seconds=(1.0, 1.0, 1.0), rate=RATE):
+    """Silence, a 440 Hz tone, silence; 16-bit stereo PCM."""
+    silence, tone, tail = (np.zeros(int(rate * s), dtype=np.float32) for s in seconds)
+    tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(tone.size) / rate).astype(np.float32)
+    mono = np.concatenate([silence, tone, tail])
+    pcm = (np.stack([mono, mono], axis=1) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def test_decode_wav_returns_frames_by_channels():
+    samples, rate, width = decode_wav(_stereo_wav())
+    assert (samples.shape, rate, width) == ((3 * RATE, 2), RATE, 2)
+    assert float(np.abs(samples).max()) == pytest.approx(0.5, abs=1e-3)
+
+
+def test_resample_keeps_the_duration():
+    mono = to_mono(decode_wav(_stereo_wav())[0])
+    assert mono.ndim == 1
+    assert resample(mono, RATE, 16000).size == 3 * 16000
+
+
+def test_trim_silence_keeps_the_voiced_part_with_padding():
+    mono = resample(to_mono(decode_wav(_stereo_wav())[0]), RATE, 16000)
+    trimmed = trim_silence(mono, 16000, threshold_db=-45.0, padding_ms=200.0)
+    assert 1.0 <= trimmed.size / 16000 <= 1.5
+
+
+def test_trim_silence_leaves_all_silent_input_alone():
+    silent = np.zeros(16000, dtype=np.float32)
+    assert trim_silence(silent, 16000, threshold_db=-45.0, padding_ms=200.0).size == silent.size
+
+
+def test_preprocess_returns_shorter_16k_mono_wav(monkeypatch):
+    monkeypatch.setattr(settings, "audio_preprocess_enabled", True)
+    monkeypatch.setattr(settings, "audio_target_sample_rate", 16000)
+    original = _stereo_wav()
+
+    prepared = preprocess_audio(original, "audio/wav")
+
+    assert prepared.applied and prepared.mime_type == "audio/wav"
+    assert prepared.processed_duration_s < prepared.original_duration_s == 3.0
+    with wave.open(io.BytesIO(prepared.data), "rb") as wav:
+        assert (wav.getnchannels(), wav.getframerate(), wav.getsampwidth()) == (1, 16000, 2)
+    assert len(prepared.data) < len(original) / 5
+
+
+def test_preprocess_passes_other_formats_through():
+    prepared = preprocess_audio(b"OggS...", "audio/ogg")
+    assert not prepared.applied and prepared.data == b"OggS..."
@@ -0,0 +1,52 @@
+import pytest
+
+from src.utils import cache
+from src.utils.cache import LRUCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now the oldest
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses(clock):
+    lru = LRUCache(maxsize=4, ttl_seconds=10)
+    lru.set("a", 1)
+    clock[0] += 10
+    assert lru.get("a") == 1
+    clock[0] += 0.1
+    assert lru.get("a", "gone") == "gone"
+    assert len(lru) == 0
+
+
+def test_get_or_create_builds_once():
+    lru = LRUCache(maxsize=4)
+    built = []
+    assert lru.get_or_create("k", lambda: built.append(1) or "v") == ("v", False)
+    assert lru.get_or_create("k", lambda: built.append(1) or "other") == ("v", True)
+    assert built == [1]
+
+
+def test_stats_count_hits_and_misses():
+    lru = LRUCache(maxsize=0)
+    assert lru.maxsize == 1
+    lru.get("missing")
+    lru.set("a", 1)
+    lru.get("a")
+    stats = lru.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    lru.clear()
+    assert len(lru) == 0 and lru.stats()["hits"] == 1
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.fakes import install_fake_llm
+from src.ai.chains import expand_output, run_extraction, run_extraction_batch, validate_result
+from src.config.settings import settings
+from src.models.category import CategoryModel, SubcategoryModel
+from src.models.expense import ExtractionResult
+from src.services.category_service import bump_category_generation
+from src.utils.datetime_utils import IST, to_ist
+
+CATEGORIES = [CategoryModel(name="Food & Dining", subcategories=[SubcategoryModel(name="Snacks")])]
+
+
+@pytest.fixture
+def compact(monkeypatch):
+    monkeypatch.setattr(settings, "date_resolution_mode", "local")
+    monkeypatch.setattr(settings, "compact_output_enabled", True)
+
+
+def _reply(date):
+    return json.dumps({"a": 250, "c": "Food & Dining", "s": "Groceries", "d": date, "m": []})
+
+
+def test_date_hint_is_resolved_locally(offline, compact):
+    install_fake_llm("openai", responses=[_reply("kaale")])
+    result, _ = run_extraction("openai", "gpt-fake", "kaale chicken 250")
+    assert to_ist(result.datetime).date() == datetime.now(tz=IST).date() - timedelta(days=1)
+
+
+def test_null_date_hint_does_not_reread_the_text(offline, compact):
+    install_fake_llm("openai", responses=[_reply(None)])
+    result, _ = run_extraction("openai", "gpt-fake", "chicken 1/2 kg 250 kaale")
+    assert to_ist(result.datetime).date() == datetime.now(tz=IST).date()
+
+
+def test_bare_numeric_date_hint_is_used(offline, compact):
+    install_fake_llm("openai", responses=[_reply("12/03")])
+    result, _ = run_extraction("openai", "gpt-fake", "12/03 chicken 250")
+    assert (to_ist(result.datetime).month, to_ist(result.datetime).day) == (3, 12)
+
+
+def test_result_cache_is_per_prompt_variant(monkeypatch, offline, compact):
+    monkeypatch.setattr(settings, "result_cache_enabled", True)
+    fake = install_fake_llm("openai", responses=[_reply("kaale")])
+    run_extraction("openai", "gpt-fake", "kaale chicken 250")
+    run_extraction("openai", "gpt-fake", "kaale chicken 250")
+    assert fake.calls == 1
+
+    monkeypatch.setattr(settings, "compact_output_enabled", False)
+    run_extraction("openai", "gpt-fake", "kaale chicken 250")
+    assert fake.calls == 2
+
+
+
+def test_result_cache_key_normalizes_the_text(monkeypatch, offline, compact):
+    monkeypatch.setattr(settings, "result_cache_enabled", True)
+    fake = install_fake_llm("openai", responses=[_reply("kaale")])
+    run_extraction("openai", "gpt-fake", "kaale chicken 250")
+    cached, _ = run_extraction("openai", "gpt-fake", "  Kaale   CHICKEN 250 ")
+    assert fake.calls == 1
+    assert cached.amount == 250
+
+    run_extraction("openai", "gpt-other", "kaale chicken 250")
+    assert fake.calls == 2
+
+
+def test_result_cache_misses_after_taxonomy_change(monkeypatch, offline, compact):
+    monkeypatch.setattr(settings, "result_cache_enabled", True)
+    fake = install_fake_llm("openai", responses=[_reply("kaale")])
+    run_extraction("openai", "gpt-fake", "kaale chicken 250")
+    bump_category_generation()
+    run_extraction("openai", "gpt-fake", "kaale chicken 250")
+    assert fake.calls == 2
+
+
+def _batch_responder(prompt):
+    if "chicken" in prompt and "bad line" in prompt:
+        return "not a json array"  # every line falls back to single extraction
+    if "bad line" in prompt:
+        raise ValueError("fallback failed")
+    return _reply("kaale")
+
+
+def test_batch_fallback_keeps_now_and_isolates_failures(offline, compact):
+    install_fake_llm("openai", responder=_batch_responder)
+    now = datetime(2024, 3, 13, 12, 0, tzinfo=IST)
+    results, debug = run_extraction_batch("openai", "gpt-fake", ["kaale chicken 250", "bad line"], now=now)
+    assert debug["fallbacks"] == [0, 1]
+    assert to_ist(results[0].datetime).date() == datetime(2024, 3, 12).date()
+    assert results[1].valid is False
+    assert results[1].error == "fallback failed"
+
+def test_expand_output_maps_compact_keys():
+    out = expand_output({"a": 20, "c": "Food & Dining", "s": "Snacks", "d": "kaale", "m": []}, "kaale 20rs na padika")
+    assert out == {"amount": 20, "category": "Food & Dining", "subcategory": "Snacks", "date": "kaale",
+                   "missing_fields": [], "description": "kaale 20rs na padika", "valid": True}
+
+
+def test_expand_output_derives_missing_fields_and_validity():
+    out = expand_output({"a": None, "c": "Food & Dining", "s": "Snacks"}, "padika")
+    assert out["missing_fields"] == ["amount"]
+    assert out["valid"] is False
+    # Explicit values from the model are kept
+    assert expand_output({"amount": 20, "valid": True, "missing_fields": [], "description": "x"}, "y")["description"] == "x"
+
+
+def _result(**overrides):
+    fields = {"valid": True, "amount": 20, "category": "Food & Dining", "subcategory": "Snacks",
+              "datetime": datetime.now(tz=IST), "raw_response": {"date": "kaale"}}
+    return ExtractionResult(**{**fields, **overrides})
+
+
+def test_validate_result_accepts_a_complete_answer():
+    assert validate_result(_result(), CATEGORIES) == []
+
+
+@pytest.mark.parametrize("overrides, problem", [
+    ({"valid": False}, "missing_fields"),
+    ({"missing_fields": ["amount"]}, "missing_fields"),
+    ({"amount": 0}, "amount"),
+    ({"amount": float("inf")}, "amount"),
+    ({"category": "Travel"}, "category"),
+    ({"subcategory": "Lunch"}, "subcategory"),
+    ({"raw_response": {"date": "sometime"}}, "date"),
+    ({"raw_response": {"datetime": "not a date"}}, "date"),
+    ({"datetime": None}, "date"),
+])
+def test_validate_result_reports_failed_checks(overrides, problem):
+    assert validate_result(_result(**overrides), CATEGORIES) == [problem]
+
+
+def test_validate_result_without_taxonomy_only_needs_names():
+    assert validate_result(_result(category="Anything", subcategory="Else"), []) == []
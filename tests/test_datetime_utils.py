@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from src.utils.datetime_utils import IST, resolve_datetime
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=IST)
+
+
+@pytest.mark.parametrize("text", [
+    "chicken 1/2 kg 250",
+    "2-3 samosa 40",
+    "3/4 litre dudh 45",
+    "10-12 vada pav 150",
+    "12/03 petrol 500",
+])
+def test_fractions_and_ranges_are_not_dates(text):
+    when, matched = resolve_datetime(text, NOW)
+    assert matched == []
+    assert when == NOW
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12/03/25 petrol 500", datetime(2025, 3, 12, 12, 0, tzinfo=IST)),
+    ("12.03.2025 petrol 500", datetime(2025, 3, 12, 12, 0, tzinfo=IST)),
+    ("5/3 ni tarikh petrol 500", datetime(2026, 3, 5, 12, 0, tzinfo=IST)),
+    ("12/03 at 7pm dinner 400", datetime(2026, 3, 12, 19, 0, tzinfo=IST)),
+    ("12-03 9:30 chai 20", datetime(2026, 3, 12, 9, 30, tzinfo=IST)),
+])
+def test_numeric_dates_need_a_year_or_date_context(text, expected):
+    when, matched = resolve_datetime(text, NOW)
+    assert matched
+    assert when == expected
+
+
+def test_fraction_does_not_hide_relative_day():
+    when, matched = resolve_datetime("kaale 1/2 kg dudh 30", NOW)
+    assert matched == ["kaale"]
+    assert when.date() == datetime(2026, 10, 17).date()
+
+
+def test_bare_numeric_date_hint_is_a_date():
+    when, matched = resolve_datetime("12/03", NOW, date_hint=True)
+    assert matched == ["12/03"]
+    assert when == datetime(2026, 3, 12, 12, 0, tzinfo=IST)
+
+
+@pytest.mark.parametrize("text, expected, words", [
+    ("aaje chai 20", datetime(2026, 10, 18, 12, 0, tzinfo=IST), ["aaje"]),
+    ("kaale bus ma 15", datetime(2026, 10, 17, 12, 0, tzinfo=IST), ["kaale"]),
+    ("parmdivase petrol 500", datetime(2026, 10, 16, 12, 0, tzinfo=IST), ["parmdivase"]),
+    ("3 divas pehla dawa 120", datetime(2026, 10, 15, 12, 0, tzinfo=IST), ["3", "divas", "pehla"]),
+    # 18 Oct 2026 is a Sunday
+    ("somvare lunch 150", datetime(2026, 10, 12, 12, 0, tzinfo=IST), ["somvare"]),
+    ("last sunday movie 300", datetime(2026, 10, 11, 12, 0, tzinfo=IST), ["last", "sunday"]),
+    ("kaale sanje 7 vage pizza 400", datetime(2026, 10, 17, 19, 0, tzinfo=IST), ["kaale", "sanje", "7", "vage"]),
+    ("dinner 9:30 600", datetime(2026, 10, 18, 21, 30, tzinfo=IST), ["9:30"]),
+    ("chai 9:30 20", datetime(2026, 10, 18, 9, 30, tzinfo=IST), ["9:30"]),
+    ("cab 8pm 250", datetime(2026, 10, 18, 20, 0, tzinfo=IST), ["8pm"]),
+    ("2025-03-12 chai 20", datetime(2025, 3, 12, 12, 0, tzinfo=IST), ["2025-03-12"]),
+    ("12 march books 800", datetime(2026, 3, 12, 12, 0, tzinfo=IST), ["12 march"]),
+    ("dec 25 gifts 2000", datetime(2025, 12, 25, 12, 0, tzinfo=IST), ["dec 25"]),
+])
+def test_resolves_gujlish_and_english_dates(text, expected, words):
+    assert resolve_datetime(text, NOW) == (expected, words)
+
+
+def test_nothing_found_is_now():
+    assert resolve_datetime("samosa 40", NOW) == (NOW, [])
+    assert resolve_datetime(None, NOW) == (NOW, [])
+
+
+def test_gujlish_words_are_not_months():
+    when, matched = resolve_datetime("mara 2 samosa 40", NOW)
+    assert matched == [] and when == NOW
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from benchmarks.fake_mongo import InMemoryMongoClient
+from src.models.expense import ExpenseCreate, ExpenseUpdate
+from src.repositories.expenses_repo import ExpensesRepository
+
+
+def _expense(amount):
+    return ExpenseCreate(amount=amount, category="Food & Dining", subcategory="Snacks", description=f"padika {amount}",
+                         datetime=datetime(2024, 3, 13), provider="local", model="fast-path",
+                         original_query=f"padika {amount}")
+
+
+@pytest.fixture
+def db():
+    return InMemoryMongoClient()["expense_tracker"]
+
+
+def test_inserts_are_written_in_chunks(db):
+    result = ExpensesRepository(db).insert_many_expenses([_expense(n) for n in range(1, 6)], chunk_size=2)
+
+    assert (result.requested, result.inserted, result.chunks) == (5, 5, 3)
+    assert result.ok and len(result.ids) == 5
+    assert db["expenses"].round_trips == 3
+    assert [db["expenses"].find_one({"_id": ObjectId(_id)})["amount"] for _id in result.ids] == [1, 2, 3, 4, 5]
+
+
+def test_failed_items_do_not_stop_the_batch(db):
+    ids = ["a", "b", "a", "c", "b"]
+    result = ExpensesRepository(db).insert_many_expenses([_expense(n) for n in range(1, 6)], chunk_size=2, ids=ids)
+
+    assert result.inserted == 3
+    assert result.failed_indexes() == [2, 4]
+    assert all(error.code == 11000 for error in result.errors)
+    assert result.ids == ["a", "b", "", "c", ""]
+
+
+def test_update_errors_and_counts_refer_to_input_positions(db):
+    repo = ExpensesRepository(db)
+    ids = repo.insert_many_expenses([_expense(n) for n in (1, 2, 3)]).ids
+    updates = [(ids[0], ExpenseUpdate(amount=10)), (ids[1], ExpenseUpdate()), (ids[2], ExpenseUpdate(amount=30))]
+
+    result = repo.bulk_update_expenses(updates, chunk_size=1)
+
+    # The empty update is skipped without a round trip
+    assert (result.requested, result.matched, result.modified, result.chunks) == (3, 2, 2, 2)
+    assert [db["expenses"].find_one({"_id": ObjectId(_id)})["amount"] for _id in ids] == [10, 2, 30]
+
+
+def test_deletes_count_only_existing_documents(db):
+    repo = ExpensesRepository(db)
+    ids = repo.insert_many_expenses([_expense(n) for n in (1, 2)]).ids
+
+    result = repo.bulk_delete_expenses([*ids, "missing"], chunk_size=2)
+
+    assert (result.requested, result.deleted, result.chunks) == (3, 2, 2)
+    assert result.ok
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.services import export_service
+from src.services.export_service import ist_strings
+
+VALUES = [
+    datetime(2026, 3, 14, 14, 45),  # naive UTC, as Mongo returns it
+    datetime(2026, 3, 14, 23, 0, tzinfo=timezone.utc),
+    "2026-03-14T20:15:00+05:30",
+    None,
+    "not a date",
+]
+EXPECTED = ["2026-03-14T20:15:00+05:30", "2026-03-15T04:30:00+05:30", "2026-03-14T20:15:00+05:30", "", ""]
+
+
+def test_ist_strings_vectorized():
+    pytest.importorskip("numpy")
+    assert ist_strings(VALUES) == EXPECTED
+
+
+def test_ist_strings_without_numpy(monkeypatch):
+    monkeypatch.setattr(export_service, "np", None)
+    assert ist_strings(VALUES) == EXPECTED
+
+
+def test_ist_strings_empty_column():
+    assert ist_strings([]) == []
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from src.ai.fast_path import extract_fast
+from src.config.settings import settings
+from src.models.category import CategoryModel, SubcategoryModel
+from src.services.expense_service import _try_fast_path
+from src.utils.datetime_utils import IST, to_ist
+
+CATEGORIES = [
+    CategoryModel(name="Food & Dining", subcategories=[SubcategoryModel(name="Snacks")]),
+    CategoryModel(name="Transportation", subcategories=[SubcategoryModel(name="Bus")]),
+]
+NOW = datetime(2024, 3, 13, 12, 0, tzinfo=IST)
+
+
+@pytest.mark.parametrize("text, amount, subcategory", [
+    ("20rs na padika", 20, "Snacks"),
+    ("kaale bus ma 15 rupiya", 15, "Bus"),
+    ("samosa 40", 40, "Snacks"),
+])
+def test_well_formed_inputs_clear_the_threshold(text, amount, subcategory):
+    result, confidence = extract_fast(text, CATEGORIES, now=NOW)
+    assert result.valid
+    assert (result.amount, result.subcategory) == (amount, subcategory)
+    assert confidence >= settings.fast_path_min_confidence
+
+
+@pytest.mark.parametrize("text", [
+    "2 samosa 40",         # two bare numbers: quantity or amount?
+    "padika",              # no amount
+    "40 for something",    # no category
+    "samosa and bus 40",   # two categories
+])
+def test_ambiguous_inputs_miss_the_threshold(text):
+    _, confidence = extract_fast(text, CATEGORIES, now=NOW)
+    assert confidence < settings.fast_path_min_confidence
+
+
+def test_relative_day_is_anchored_to_now():
+    result, _ = extract_fast("kaale bus ma 15 rupiya", CATEGORIES, now=NOW)
+    assert to_ist(result.datetime).date() == datetime(2024, 3, 12).date()
+
+
+def test_service_falls_back_below_threshold(monkeypatch, offline):
+    monkeypatch.setattr(settings, "fast_path_enabled", True)
+    result, metrics = _try_fast_path("2 samosa 40", "openai", "gpt-fake")
+    assert result is None and metrics["hit"] is False
+
+    result, metrics = _try_fast_path("samosa 40", "openai", "gpt-fake")
+    assert metrics["hit"] is True and result.amount == 40
+
+    monkeypatch.setattr(settings, "fast_path_min_confidence", 1.01)
+    result, metrics = _try_fast_path("samosa 40", "openai", "gpt-fake")
+    assert result is None and metrics["hit"] is False
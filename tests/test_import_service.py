@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+from src.services import import_service
+from src.models.category import CategoryModel, SubcategoryModel
+from src.models.expense import ExtractionResult
+from src.services.import_service import (
+    ImportProgress, _fast_category, _process_chunk, _Row, _text_date, _to_row, detect_mapping, open_rows,
+)
+from src.utils.datetime_utils import IST, to_ist
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=IST)
+CATEGORIES = [CategoryModel(name="Transportation", subcategories=[SubcategoryModel(name="Fuel")])]
+
+
+def test_detect_mapping_matches_bank_statement_headers():
+    header = ["Txn Date", "Narration", "Chq./Ref.No.", "Withdrawal Amt.", "Deposit Amt.", "Closing Balance"]
+    mapping = detect_mapping(header)
+    assert mapping.model_dump(exclude_none=True) == {
+        "date": "Txn Date", "description": "Narration", "debit": "Withdrawal Amt.", "credit": "Deposit Amt.",
+    }
+
+
+def test_detect_mapping_uses_each_column_once():
+    mapping = detect_mapping(["Date", "Category", "Amount", None, "Note"])
+    assert (mapping.date, mapping.category, mapping.amount, mapping.description) == ("Date", "Category", "Amount", "Note")
+    assert mapping.subcategory is None
+
+
+def test_detect_mapping_ignores_type_and_time_columns():
+    mapping = detect_mapping(["Time", "Date", "Type", "Amount", "Narration"])
+    assert (mapping.date, mapping.category) == ("Date", None)
+
+
+def test_detect_mapping_overrides():
+    mapping = detect_mapping(["When", "Spent on", "Rs"], {"description": "Spent on", "amount": "Rs", "date_format": "%d/%m/%Y"})
+    assert (mapping.date, mapping.description, mapping.amount, mapping.date_format) == ("When", "Spent on", "Rs", "%d/%m/%Y")
+
+
+@pytest.mark.parametrize("overrides", [{"colour": "Rs"}, {"amount": "Total"}])
+def test_detect_mapping_rejects_bad_overrides(overrides):
+    with pytest.raises(ValueError):
+        detect_mapping(["Date", "Amount"], overrides)
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "statement.csv"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_signed_amount_column_skips_credits(tmp_path):
+    path = _write(tmp_path, "Date,Narration,Amount\n01/10/2026 10:00,Swiggy,-250.00\n"
+                            "02/10/2026 10:00,Salary,50000.00\n03/10/2026 10:00,Refund,(40)\n")
+    mapping, records = open_rows(path)
+    assert mapping.amount_sign == "signed"
+    rows = [_to_row(number, record, mapping, NOW) for number, record in records]
+    assert [(row.amount if row else reason) for row, reason in rows] == [250.0, "credit", 40.0]
+
+
+def test_unsigned_amount_column_keeps_positive_rows(tmp_path):
+    path = _write(tmp_path, "Date,Description,Amount\n01/10/2026 10:00,chai,20\n02/10/2026 10:00,petrol,500\n")
+    mapping, records = open_rows(path)
+    assert mapping.amount_sign == "unsigned"
+    assert [_to_row(n, r, mapping, NOW)[0].amount for n, r in records] == [20.0, 500.0]
+
+
+def test_amount_sign_override(tmp_path):
+    path = _write(tmp_path, "Date,Description,Amount\n01/10/2026 10:00,salary,50000\n")
+    mapping, records = open_rows(path, {"amount_sign": "signed"})
+    assert [_to_row(n, r, mapping, NOW) for n, r in records] == [(None, "credit")]
+    with pytest.raises(ValueError):
+        open_rows(path, {"amount_sign": "maybe"})
+
+
+@pytest.fixture
+def fast_only(monkeypatch, offline):
+    monkeypatch.setattr(import_service.settings, "fast_path_enabled", True)
+
+
+def test_row_without_date_column_or_text_date_fails(fast_only):
+    progress = ImportProgress(source="test", fingerprint="f")
+    rows = [_Row(number=0, description="petrol", amount=500.0), _Row(number=1, description="kaale petrol", amount=500.0)]
+    _process_chunk(rows, progress, None, "openai", "gpt-fake", None, "test")
+    assert progress.fast_path == 1
+    assert progress.failed == 1
+    assert progress.errors == ["row 0: missing amount, date or description"]
+
+
+@pytest.mark.parametrize("when, day", [
+    (None, datetime(2026, 10, 17)),                               # import time
+    (datetime(2024, 3, 13, 12, 0, tzinfo=IST), datetime(2024, 3, 12)),  # the row's own date
+])
+def test_fast_path_dates_are_anchored_to_the_row(fast_only, when, day):
+    row = _Row(number=0, description="kaale petrol", amount=500.0, when=when)
+    result = _fast_category(row, CATEGORIES, None, NOW)
+    assert to_ist(result.datetime).date() == day.date()
+
+
+@pytest.mark.parametrize("description, hint, dated", [
+    ("swiggy order 250", None, False),
+    ("swiggy order 250", "kaale", True),
+    ("kaale swiggy order 250", None, True),
+])
+def test_llm_datetime_is_used_only_when_the_text_says_when(description, hint, dated):
+    result = ExtractionResult(valid=True, amount=250, datetime=NOW, raw_response={"date": hint})
+    assert (_text_date(_Row(number=0, description=description), result) is not None) == dated
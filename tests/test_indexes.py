@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from src.db.indexes import ensure_collection_indexes, get_index_stats, reset_index_registry
+
+SPECS = [("created_at", {}), ("provider", {})]
+
+
+class _Collection:
+    def __init__(self, gate=None, fail=False):
+        self.calls = 0
+        self.gate = gate
+        self.fail = fail
+
+    def create_index(self, keys, **options):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        if self.fail:
+            raise RuntimeError("index build failed")
+
+
+class _Database:
+    name = "test_db"
+
+    def __init__(self, **collections):
+        self.collections = collections
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    reset_index_registry()
+    yield
+    reset_index_registry()
+
+
+def test_indexes_are_created_once_per_collection():
+    db = _Database(expenses=_Collection())
+    assert ensure_collection_indexes(db, "expenses", SPECS) is True
+    assert ensure_collection_indexes(db, "expenses", SPECS) is False
+    assert db["expenses"].calls == 2
+    assert get_index_stats()["skipped"] == 1
+
+
+def test_failure_leaves_the_collection_unregistered():
+    db = _Database(expenses=_Collection(fail=True))
+    with pytest.raises(RuntimeError):
+        ensure_collection_indexes(db, "expenses", SPECS)
+    db["expenses"].fail = False
+    assert ensure_collection_indexes(db, "expenses", SPECS) is True
+
+
+def test_slow_collection_does_not_block_others_or_duplicate_calls():
+    gate = threading.Event()
+    db = _Database(expenses=_Collection(gate=gate), categories=_Collection())
+    threads = [threading.Thread(target=ensure_collection_indexes, args=(db, "expenses", SPECS)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    # expenses is still building; another collection goes straight through
+    other = threading.Thread(target=ensure_collection_indexes, args=(db, "categories", SPECS))
+    other.start()
+    other.join(timeout=1)
+    assert not other.is_alive()
+    assert db["categories"].calls == len(SPECS)
+
+    gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert db["expenses"].calls == len(SPECS)
+    assert get_index_stats()["ensured"] == ["test_db.categories", "test_db.expenses"]
@@ -0,0 +1,29 @@
+import pytest
+
+from src.utils.metrics import LatencyTracker, percentile
+
+
+def test_percentile_is_nearest_rank():
+    samples = [5, 1, 4, 2, 3]
+    assert percentile(samples, 50) == 3
+    assert percentile(samples, 0) == 1
+    assert percentile(samples, 100) == 5
+    assert percentile(range(1, 101), 95) == 95
+    assert percentile(range(1, 101), 99) == 99
+
+
+def test_percentile_of_nothing_is_none():
+    assert percentile([], 50) is None
+
+
+@pytest.mark.parametrize("pct, expected", [(-10, 1), (150, 3)])
+def test_percentile_clamps_out_of_range(pct, expected):
+    assert percentile([1, 2, 3], pct) == expected
+
+
+def test_latency_tracker_keeps_a_rolling_window():
+    tracker = LatencyTracker(window=3)
+    for ms in (100, 1, 2, 3):
+        tracker.record("k", ms)
+    assert tracker.samples("k") == [1, 2, 3]
+    assert tracker.percentile("k", 50) == 2
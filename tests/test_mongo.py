@@ -0,0 +1,14 @@
+from src.db import mongo
+from src.db.mongo import available_compressors
+
+
+def test_available_compressors_keeps_order_and_drops_unknown(monkeypatch):
+    monkeypatch.setattr(mongo.importlib.util, "find_spec", lambda name: object())
+    assert available_compressors(["Zstd", " snappy", "lz4", "zstd", "zlib"]) == ["zstd", "snappy", "zlib"]
+
+
+def test_available_compressors_skips_missing_libraries(monkeypatch):
+    monkeypatch.setattr(mongo.importlib.util, "find_spec", lambda name: None)
+    # zlib ships with Python, so it is always available
+    assert available_compressors(["zstd", "snappy", "zlib"]) == ["zlib"]
+    assert available_compressors([]) == []
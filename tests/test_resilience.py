@@ -0,0 +1,226 @@
+import json
+
+import pytest
+
+from benchmarks.fakes import FakeProviderError, install_fake_llm
+from src.ai import providers
+from src.ai.chains import run_extraction, run_extraction_hedged
+from src.ai.providers import (
+    CircuitBreaker, ProviderUnavailableError, call_with_retries, get_circuit_breaker, retry_delay_seconds,
+)
+from src.config.settings import settings
+from src.models.expense import ExtractionResult
+from src.services.expense_service import _build_records
+from src.utils.metrics import llm_latency
+
+RESPONSE = json.dumps({
+    "valid": True, "amount": 20, "category": "Food & Dining", "subcategory": "Snacks",
+    "description": "20rs na padika", "missing_fields": [],
+})
+INVALID = json.dumps({
+    "valid": False, "amount": None, "category": None, "subcategory": None,
+    "description": "padika", "missing_fields": ["amount"],
+})
+HEDGE = ("gemini", "gemini-fake")
+
+
+class _Clock:
+    """Stand-in for time.monotonic that tests can move forward."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(providers.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(providers.time, "sleep", slept.append)
+    return slept
+
+
+def test_retry_delay_is_full_jitter_within_cap(monkeypatch):
+    monkeypatch.setattr(settings, "retry_base_delay_ms", 100)
+    monkeypatch.setattr(settings, "retry_max_delay_ms", 1000)
+    for attempt in range(8):
+        delays = [retry_delay_seconds(attempt) for _ in range(200)]
+        upper = min(1.0, 0.1 * 2 ** attempt)
+        assert all(0 <= d <= upper for d in delays)
+        assert len(set(delays)) > 1
+
+
+def test_retry_delay_never_shorter_than_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "retry_max_delay_ms", 500)
+    error = FakeProviderError(429, retry_after=3)
+    assert all(retry_delay_seconds(0, error) == 3.0 for _ in range(20))
+
+
+def test_call_with_retries_recovers_after_transient_errors(monkeypatch, fresh_breakers, no_sleep):
+    monkeypatch.setattr(settings, "provider_max_retries", 3)
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 5)
+    fake = install_fake_llm("openai", fail_first=2, responses=["ok"])
+    info = {}
+    try:
+        reply = call_with_retries("openai", lambda: fake.invoke("hi"), info)
+    finally:
+        providers.set_llm_override("openai", None)
+    assert reply.content == "ok"
+    assert info["attempts"] == 3
+    assert len(info["errors"]) == 2 and len(no_sleep) == 2
+    assert get_circuit_breaker("openai").state == "closed"
+
+
+def test_call_with_retries_does_not_retry_bad_requests(monkeypatch, fresh_breakers, no_sleep):
+    monkeypatch.setattr(settings, "provider_max_retries", 3)
+    fake = install_fake_llm("openai", fail_first=1, error_status=400)
+    try:
+        with pytest.raises(FakeProviderError):
+            call_with_retries("openai", lambda: fake.invoke("hi"))
+    finally:
+        providers.set_llm_override("openai", None)
+    assert fake.calls == 1 and no_sleep == []
+
+
+def test_breaker_opens_at_threshold_and_probes_after_reset(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+
+    clock.now += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow() and breaker.is_open()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats()["trips"] == 1
+
+
+def test_failed_probe_reopens_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.stats()["trips"] == 2
+
+
+def test_bad_request_leaves_half_open_breaker_unchanged(monkeypatch, fresh_breakers, clock):
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 1)
+    monkeypatch.setattr(settings, "circuit_reset_seconds", 10)
+    breaker = get_circuit_breaker("openai")
+    breaker.record_failure()
+    clock.now += 10
+
+    def bad_request():
+        raise FakeProviderError(400)
+
+    with pytest.raises(FakeProviderError):
+        call_with_retries("openai", bad_request)
+    # Not closed by a 400, and the probe slot is free for the next real probe
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_open_circuit_rejects_without_calling(monkeypatch, fresh_breakers, clock):
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 1)
+    get_circuit_breaker("openai").record_failure()
+    calls = []
+    with pytest.raises(ProviderUnavailableError):
+        call_with_retries("openai", lambda: calls.append(1))
+    assert calls == []
+
+
+def test_run_extraction_fails_over_to_alternate(monkeypatch, offline, no_sleep):
+    monkeypatch.setattr(settings, "failover_enabled", True)
+    monkeypatch.setattr(settings, "provider_max_retries", 1)
+    monkeypatch.setattr(settings, "alternate_provider", "gemini")
+    monkeypatch.setattr(settings, "alternate_model", "gemini-fake")
+    primary = install_fake_llm("openai", error_rate=1.0, error_status=503)
+    alternate = install_fake_llm("gemini", responses=[RESPONSE])
+
+    result, debug = run_extraction("openai", "gpt-fake", "20rs na padika")
+
+    assert primary.calls == 2
+    assert alternate.calls == 1
+    assert result.valid and result.amount == 20
+    assert (result.provider, result.model) == ("gemini", "gemini-fake")
+    assert debug["resilience"]["failover"]["from"] == "openai:gpt-fake"
+    assert debug["resilience"]["failover"]["to"] == "gemini:gemini-fake"
+
+
+def test_run_extraction_does_not_fail_over_on_bad_request(monkeypatch, offline, no_sleep):
+    monkeypatch.setattr(settings, "failover_enabled", True)
+    monkeypatch.setattr(settings, "alternate_provider", "gemini")
+    monkeypatch.setattr(settings, "alternate_model", "gemini-fake")
+    install_fake_llm("openai", error_rate=1.0, error_status=400)
+    alternate = install_fake_llm("gemini", responses=[RESPONSE])
+
+    with pytest.raises(FakeProviderError):
+        run_extraction("openai", "gpt-fake", "20rs na padika")
+    assert alternate.calls == 0
+
+
+def test_hedge_returns_the_hedge_result_when_the_primary_errored(offline, fresh_breakers):
+    install_fake_llm("openai", error_rate=1.0, error_status=400)
+    install_fake_llm("gemini", responses=[INVALID])
+
+    result, debug = run_extraction_hedged("openai", "gpt-fake", "padika", hedge_target=HEDGE, delay_s=0)
+
+    assert (result.provider, result.valid) == ("gemini", False)
+    assert debug["hedge"]["winner"] == "hedge"
+
+
+def test_hedge_reraises_the_primary_error_when_nothing_answered(offline, fresh_breakers):
+    install_fake_llm("openai", error_rate=1.0, error_status=400)
+    install_fake_llm("gemini", error_rate=1.0, error_status=400)
+
+    with pytest.raises(FakeProviderError):
+        run_extraction_hedged("openai", "gpt-fake", "padika", hedge_target=HEDGE, delay_s=0)
+
+
+def test_hedge_reports_each_attempts_own_latency(offline, fresh_breakers):
+    install_fake_llm("openai", responses=[RESPONSE], latency_ms=300)
+    install_fake_llm("gemini", responses=[RESPONSE])
+
+    result, debug = run_extraction_hedged("openai", "gpt-fake", "20rs na padika", hedge_target=HEDGE, delay_s=0.05)
+
+    attempts = {a["role"]: a for a in debug["hedge"]["attempts"]}
+    assert result.provider == "gemini"
+    assert attempts["primary"]["outcome"] == "cancelled"
+    assert attempts["primary"]["latency_ms"] >= 50
+    assert attempts["hedge"]["started_ms"] >= 50
+    assert attempts["hedge"]["latency_ms"] < attempts["primary"]["latency_ms"]
+
+
+def test_hedged_records_latency_per_attempt():
+    primary, hedge = ("openai", "hedge-primary"), ("gemini", "hedge-alternate")
+    debug = {"hedge": {"delay_ms": 50.0, "hedged": True, "winner": "hedge", "attempts": [
+        {"role": "hedge", "provider": hedge[0], "model": hedge[1], "outcome": "won", "latency_ms": 40.0, "cached": False},
+        {"role": "primary", "provider": primary[0], "model": primary[1], "outcome": "cancelled", "latency_ms": 90.0,
+         "cached": False},
+    ]}}
+    result = ExtractionResult(valid=True, amount=20, category="Food & Dining", subcategory="Snacks",
+                              description="20rs na padika", provider=hedge[0], model=hedge[1])
+
+    _build_records("20rs na padika", hedge[0], hedge[1], {}, result, debug, {}, latency_ms=90.0)
+
+    assert llm_latency.samples(hedge) == [40.0]
+    assert llm_latency.samples(primary) == [90.0]
@@ -0,0 +1,29 @@
+import json
+
+from benchmarks.fakes import install_fake_llm
+from src.ai.chains import get_parse_stats, run_extraction, use_structured_output
+from src.config.settings import settings
+
+RESPONSE = json.dumps({
+    "valid": True, "amount": 120, "category": "Food & Dining", "subcategory": "Lunch",
+    "description": "aaje lunch 120", "missing_fields": [],
+})
+
+
+def test_structured_output_is_skipped_while_a_cassette_is_active(monkeypatch, offline, tmp_path):
+    monkeypatch.setattr(settings, "structured_output_enabled", True)
+    monkeypatch.setattr(settings, "cassette_mode", "record")
+    monkeypatch.setattr(settings, "cassette_path", str(tmp_path / "llm.jsonl.gz"))
+    install_fake_llm("openai", responses=[RESPONSE])
+
+    assert not use_structured_output("openai", "gpt-cassette")
+    result, debug = run_extraction("openai", "gpt-cassette", "aaje lunch 120")
+
+    assert result.valid and result.amount == 120
+    assert debug["output_mode"]["mode"] == "text"
+    stats = get_parse_stats()["openai:gpt-cassette"]
+    assert stats["structured_calls"] == 0 and stats["parse_failures"] == 0
+    # The real model is still eligible once the cassette is off
+    monkeypatch.setattr(settings, "cassette_mode", "off")
+    assert use_structured_output("openai", "gpt-cassette")
+    assert stats["structured_supported"]
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from benchmarks.fakes import install_fake_llm
+from src.ai import chains
+from src.ai.providers import ProviderUnavailableError
+from src.db.mongo import get_database
+from src.services import expense_service
+from src.services.expense_service import extract_voice_and_save
+
+RESPONSE = json.dumps({
+    "valid": True, "amount": 120, "category": "Food & Dining", "subcategory": "Lunch",
+    "description": "aaje lunch 120", "missing_fields": [],
+})
+
+
+@pytest.fixture
+def transcripts(monkeypatch):
+    calls = []
+
+    def transcribe(audio_bytes, mime_type, model=None, prompt=None):
+        calls.append(model)
+        return "aaje lunch 120"
+
+    monkeypatch.setattr(expense_service, "transcribe_with_gemini", transcribe)
+    return calls
+
+
+def test_unparseable_voice_reply_is_logged_then_falls_back(monkeypatch, offline, transcripts):
+    monkeypatch.setattr(chains, "generate_from_audio", lambda *args: "sorry, I can't help with that")
+    install_fake_llm("openai", responses=[RESPONSE])
+
+    transcript, result, expense_id, _ = extract_voice_and_save(b"audio", "audio/wav", "openai", "gpt-fake", {})
+
+    assert transcript == "aaje lunch 120"
+    assert result.amount == 120 and expense_id
+    assert len(transcripts) == 1
+    failed, fallback = list(get_database()["extraction_logs"].find({}))
+    assert failed["provider"] == "gemini" and not failed["extraction"]["valid"]
+    assert failed["metrics"]["voice"]["fallback"]
+    assert fallback["original_query"] == "aaje lunch 120"
+
+
+def test_provider_errors_are_not_retried_as_a_transcription(monkeypatch, offline, transcripts):
+    def unavailable(*args):
+        raise ProviderUnavailableError("gemini", 30)
+
+    monkeypatch.setattr(chains, "generate_from_audio", unavailable)
+
+    with pytest.raises(ProviderUnavailableError):
+        extract_voice_and_save(b"audio", "audio/wav", "openai", "gpt-fake", {})
+    assert transcripts == []
+    assert get_database()["extraction_logs"].count_documents({}) == 0
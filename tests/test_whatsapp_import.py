@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from src.models.expense import ExtractionResult
+from src.services.whatsapp_import_service import ChatMessage, _when, parse_messages
+from src.utils.datetime_utils import IST, to_ist
+
+SENT = datetime(2026, 3, 14, 20, 15, tzinfo=IST)
+
+
+def _message(text):
+    return ChatMessage(number=1, timestamp=SENT, sender="Me", text=text)
+
+
+def _result(raw):
+    return ExtractionResult(valid=True, amount=250, raw_response=raw)
+
+
+def test_when_resolves_the_hint_against_the_message_time():
+    when = to_ist(_when(_message("kaale chicken 250"), _result({"date": "kaale"})))
+    assert when.date() == datetime(2026, 3, 13).date()
+
+
+def test_when_keeps_the_message_time_for_a_null_hint():
+    assert _when(_message("chicken 1/2 kg 250 kaale"), _result({"date": None})) == SENT
+
+
+def test_when_reads_the_text_without_a_hint():
+    when = to_ist(_when(_message("2-3 samosa 40 parmdivase"), _result({})))
+    assert when.date() == datetime(2026, 3, 12).date()
+
+
+ANDROID = """\
+14/03/2026, 8:15 pm - Messages and calls are end-to-end encrypted.
+14/03/2026, 8:15 pm - Me: kaale chicken 250
+14/03/2026, 9:02 pm - Asha: petrol 500
+ane chai 20
+15/03/2026, 7:05 am - Me: <Media omitted>
+"""
+
+
+def test_parse_messages_drops_notices_and_joins_continuation_lines():
+    messages = list(parse_messages(ANDROID.splitlines(keepends=True)))
+    assert [(m.number, m.sender, m.text) for m in messages] == [
+        (0, "Me", "kaale chicken 250"),
+        (1, "Asha", "petrol 500\nane chai 20"),
+        (2, "Me", "<Media omitted>"),
+    ]
+    assert messages[0].timestamp == SENT
+    assert messages[2].timestamp == datetime(2026, 3, 15, 7, 5, tzinfo=IST)
+
+
+def test_parse_messages_reads_ios_brackets_and_invisible_marks():
+    lines = ["\u200e[14/03/26, 8:15:30\u202fPM] Me: chai 20\r\n"]
+    (message,) = parse_messages(lines)
+    assert message.timestamp == datetime(2026, 3, 14, 20, 15, 30, tzinfo=IST)
+    assert (message.sender, message.text) == ("Me", "chai 20")
+
+
+def test_parse_messages_month_first():
+    (message,) = parse_messages(["3/14/26, 20:15 - Me: chai 20"], month_first=True)
+    assert message.timestamp == SENT